@@ -0,0 +1,153 @@
+"""Catalog latency during a login storm.
+
+Starts the app in a separate process on a throwaway SQLite database and measures
+``GET /movies/batch`` latency. It measures once on its own, then again while many clients
+hammer ``POST /auth/login``. Run from ``Backend/``::
+
+    python benchmarks/login_storm.py --catalog-clients 8 --login-clients 64 --seconds 10
+"""
+import argparse
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+import httpx
+import uvicorn
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from database import Base  # noqa: E402
+from deps import get_db  # noqa: E402
+from main import app  # noqa: E402
+from models import Movie, User  # noqa: E402
+from password_hashing import hash_password  # noqa: E402
+
+EMAIL = "storm@example.com"
+PASSWORD = "storm-password"
+
+
+def serve(database_path: Path, port: int) -> None:
+    engine = create_engine(f"sqlite:///{database_path}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    with SessionLocal() as db:
+        db.add_all(Movie(title=f"Movie {i}") for i in range(200))
+        db.add(User(username="storm", email=EMAIL, password_hash=hash_password(PASSWORD)))
+        db.commit()
+
+    def override_get_db():
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning")
+
+
+def start_server(database_path: Path) -> tuple[subprocess.Popen, str]:
+    # A separate process keeps the load generator's threads off the server's GIL.
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    process = subprocess.Popen([sys.executable, __file__, "--serve", str(database_path), str(port)])
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(f"{base_url}/health/cache", timeout=1)
+            return process, base_url
+        except httpx.TransportError:
+            time.sleep(0.1)
+    process.kill()
+    raise SystemExit("Server did not start")
+
+
+def hammer(base_url: str, request, stop: threading.Event, sink: list):
+    with httpx.Client(base_url=base_url, timeout=30) as client:
+        while not stop.is_set():
+            started = time.perf_counter()
+            status = request(client).status_code
+            sink.append((time.perf_counter() - started, status))
+
+
+def catalog_request(client):
+    return client.get("/movies/batch", params={"ids": ",".join(str(i) for i in range(1, 41))})
+
+
+def login_request(client):
+    return client.post("/auth/login", json={"email": EMAIL, "password": PASSWORD})
+
+
+def run_phase(base_url: str, seconds: float, catalog_clients: int, login_clients: int):
+    stop = threading.Event()
+    catalog, logins = [], []
+    threads = [
+        threading.Thread(target=hammer, args=(base_url, catalog_request, stop, catalog))
+        for _ in range(catalog_clients)
+    ] + [
+        threading.Thread(target=hammer, args=(base_url, login_request, stop, logins))
+        for _ in range(login_clients)
+    ]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return catalog, logins
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def report(label: str, samples: list):
+    latencies = [latency * 1000 for latency, _ in samples]
+    if not latencies:
+        print(f"{label}: no requests completed")
+        return
+    statuses = dict(Counter(status for _, status in samples))
+    print(
+        f"{label}: n={len(latencies)} p50={statistics.median(latencies):.1f}ms "
+        f"p99={percentile(latencies, 0.99):.1f}ms statuses={statuses}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure catalog latency during a login storm.")
+    parser.add_argument("--catalog-clients", type=int, default=8)
+    parser.add_argument("--login-clients", type=int, default=64)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--serve", nargs=2, metavar=("DATABASE", "PORT"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(Path(args.serve[0]), int(args.serve[1]))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        process, base_url = start_server(Path(tmp) / "bench.db")
+        try:
+            catalog, _ = run_phase(base_url, args.seconds, args.catalog_clients, 0)
+            report("catalog (idle)", catalog)
+            catalog, logins = run_phase(base_url, args.seconds, args.catalog_clients, args.login_clients)
+            report("catalog (login storm)", catalog)
+            report("login", logins)
+        finally:
+            process.terminate()
+            process.wait()
+
+
+if __name__ == "__main__":
+    main()
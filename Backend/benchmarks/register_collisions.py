@@ -0,0 +1,181 @@
+"""Registration throughput when thousands of users share an email local part.
+
+Seeds ``--existing`` users named ``nguyen``, ``nguyen2``, ... into a throwaway SQLite database.
+It first times one username allocation with the old one-query-per-suffix loop and with
+``auth.build_username``. Then it starts the app in a separate process and registers
+``--registrations`` more ``nguyen@...`` accounts from concurrent clients. Run from ``Backend/``::
+
+    python benchmarks/register_collisions.py --existing 5000 --registrations 1000 --clients 16
+
+Password hashing normally dominates a registration; ``--hash-rounds`` (default 1000) lowers the
+PBKDF2 cost in the server so the username allocation is what gets measured.
+"""
+import argparse
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+import httpx
+import uvicorn
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import password_hashing  # noqa: E402
+from database import Base  # noqa: E402
+from deps import get_db  # noqa: E402
+from main import app  # noqa: E402
+from models import User  # noqa: E402
+from routers.auth import build_username  # noqa: E402
+
+LOCAL_PART = "nguyen"
+
+
+def make_sessions(database_path: Path):
+    engine = create_engine(f"sqlite:///{database_path}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    return engine, sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def seed(SessionLocal, existing: int) -> None:
+    with SessionLocal() as db:
+        db.add_all(
+            User(
+                username=LOCAL_PART if i == 1 else f"{LOCAL_PART}{i}",
+                email=f"{LOCAL_PART}@seed{i}.example.com",
+                password_hash="x",
+            )
+            for i in range(1, existing + 1)
+        )
+        db.commit()
+
+
+def legacy_build_username(db, email: str) -> str:
+    base = email.split("@")[0]
+    candidate = base
+    counter = 1
+    while db.query(User).filter(User.username == candidate).first():
+        counter += 1
+        candidate = f"{base}{counter}"
+    return candidate
+
+
+def time_allocation(database_path: Path) -> None:
+    engine, SessionLocal = make_sessions(database_path)
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    for label, allocate in (("legacy loop", legacy_build_username), ("build_username", build_username)):
+        with SessionLocal() as db:
+            statements.clear()
+            started = time.perf_counter()
+            username = allocate(db, f"{LOCAL_PART}@example.com")
+            elapsed = (time.perf_counter() - started) * 1000
+        print(f"{label}: {username} in {elapsed:.1f}ms, {len(statements)} queries")
+
+
+def serve(database_path: Path, port: int, hash_rounds: int) -> None:
+    _, SessionLocal = make_sessions(database_path)
+    password_hashing.PBKDF2_ROUNDS = hash_rounds
+
+    def override_get_db():
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning")
+
+
+def start_server(database_path: Path, hash_rounds: int) -> tuple[subprocess.Popen, str]:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    process = subprocess.Popen(
+        [sys.executable, __file__, "--serve", str(database_path), str(port), "--hash-rounds", str(hash_rounds)]
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(f"{base_url}/health/cache", timeout=1)
+            return process, base_url
+        except httpx.TransportError:
+            time.sleep(0.1)
+    process.kill()
+    raise SystemExit("Server did not start")
+
+
+def register_all(base_url: str, registrations: int, clients: int) -> Counter:
+    statuses = Counter()
+    lock = threading.Lock()
+    remaining = iter(range(registrations))
+
+    def worker():
+        with httpx.Client(base_url=base_url, timeout=60) as client:
+            while True:
+                with lock:
+                    index = next(remaining, None)
+                if index is None:
+                    return
+                resp = client.post(
+                    "/auth/register",
+                    json={"email": f"{LOCAL_PART}@bench{index}.example.com", "password": "bench-password"},
+                )
+                with lock:
+                    statuses[resp.status_code] += 1
+
+    threads = [threading.Thread(target=worker) for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return statuses
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure registration throughput with colliding usernames.")
+    parser.add_argument("--existing", type=int, default=5000)
+    parser.add_argument("--registrations", type=int, default=1000)
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--hash-rounds", type=int, default=1000)
+    parser.add_argument("--serve", nargs=2, metavar=("DATABASE", "PORT"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(Path(args.serve[0]), int(args.serve[1]), args.hash_rounds)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database_path = Path(tmp) / "bench.db"
+        _, SessionLocal = make_sessions(database_path)
+        seed(SessionLocal, args.existing)
+        time_allocation(database_path)
+
+        process, base_url = start_server(database_path, args.hash_rounds)
+        try:
+            started = time.perf_counter()
+            statuses = register_all(base_url, args.registrations, args.clients)
+            elapsed = time.perf_counter() - started
+        finally:
+            process.terminate()
+            process.wait()
+
+        with SessionLocal() as db:
+            created = db.query(User).filter(User.email.like(f"{LOCAL_PART}@bench%")).count()
+            distinct = db.query(User.username).distinct().count()
+        print(
+            f"register: {args.registrations} in {elapsed:.2f}s ({args.registrations / elapsed:.0f}/s) "
+            f"statuses={dict(statuses)} created={created} distinct_usernames={distinct}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+import hashlib
+import json
+import socket
+import ssl
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlparse
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from config import CACHE_MAX_ENTRIES, CACHE_TTL_SECONDS, CACHE_URL
+from database import PINNED_TO_PRIMARY, READ_PIN_SECONDS, canonical_engine, off_event_loop, reads_replica
+
+
+class MemoryBackend:
+    """In-process LRU with per-entry TTL; generation counters are kept outside the LRU."""
+
+    def __init__(self, max_entries: int = 10_000):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[bytes, float]] = OrderedDict()
+        self._counters: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> bytes | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def counter(self, key: str) -> int:
+        return self._counters.get(key, 0)
+
+    def incr(self, key: str) -> int:
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+            return self._counters[key]
+
+    def size(self) -> int:
+        return len(self._entries)
+
+
+class RedisError(Exception):
+    pass
+
+
+class RedisBackend:
+    """Minimal RESP client (GET/SET EX/INCR) for sharing the cache between workers.
+
+    ``rediss://`` connects over TLS, verifying the server against the system CA store.
+    """
+
+    def __init__(self, url: str, timeout: float = 0.5, ssl_context: ssl.SSLContext | None = None):
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.password = parsed.password
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self.timeout = timeout
+        self.ssl_context = None
+        if parsed.scheme == "rediss":
+            self.ssl_context = ssl_context or ssl.create_default_context()
+        self._local = threading.local()
+
+    def _connect(self):
+        sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        if self.ssl_context is not None:
+            try:
+                sock = self.ssl_context.wrap_socket(sock, server_hostname=self.host)
+            except OSError:
+                sock.close()
+                raise
+        reader = sock.makefile("rb")
+        self._local.conn = (sock, reader)
+        if self.password:
+            self._command("AUTH", self.password)
+        if self.db:
+            self._command("SELECT", str(self.db))
+        return self._local.conn
+
+    def _read_reply(self, reader):
+        line = reader.readline()
+        if not line:
+            raise RedisError("Connection closed")
+        kind, body = line[:1], line[1:-2]
+        if kind == b"+":
+            return body
+        if kind == b"-":
+            raise RedisError(body.decode("utf-8", "replace"))
+        if kind == b":":
+            return int(body)
+        if kind == b"$":
+            length = int(body)
+            if length < 0:
+                return None
+            data = reader.read(length + 2)
+            return data[:-2]
+        if kind == b"*":
+            return [self._read_reply(reader) for _ in range(int(body))]
+        raise RedisError(f"Unexpected reply: {line!r}")
+
+    def _command(self, *args):
+        return off_event_loop(self._blocking_command, *args)
+
+    def _blocking_command(self, *args):
+        conn = getattr(self._local, "conn", None) or self._connect()
+        sock, reader = conn
+        parts = [f"*{len(args)}\r\n".encode()]
+        for arg in args:
+            data = arg if isinstance(arg, bytes) else str(arg).encode("utf-8")
+            parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        try:
+            sock.sendall(b"".join(parts))
+            return self._read_reply(reader)
+        except (OSError, RedisError):
+            self._local.conn = None
+            sock.close()
+            raise
+
+    def get(self, key: str) -> bytes | None:
+        return self._command("GET", key)
+
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        self._command("SET", key, value, "PX", str(max(1, int(ttl * 1000))))
+
+    def counter(self, key: str) -> int:
+        value = self._command("GET", key)
+        return int(value) if value is not None else 0
+
+    def incr(self, key: str) -> int:
+        return self._command("INCR", key)
+
+    def size(self) -> int | None:
+        return None
+
+
+class CatalogCache:
+    """Read-through cache for catalog reads, invalidated by entity tags.
+
+    A tag is an invalidation key such as ``movie:12``, ``genres`` or ``people``. Each tag has
+    a generation counter that is part of every cache key stored under it, so ``invalidate``
+    only bumps the counter and stale entries age out through TTL/LRU.
+
+    For ``READ_PIN_SECONDS`` after an invalidation, replica reads of the tag are served but not
+    stored: the replica may not have the write yet, and its copy would outlive the lag.
+    """
+
+    def __init__(self, backend, ttl: float = 60.0):
+        self.backend = backend
+        self.ttl = ttl
+        self._stats_lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "invalidations": 0, "errors": 0}
+        self.stats_by_tag: dict[str, dict[str, int]] = {}
+
+    def _namespace(self, db) -> str:
+        # Separate databases (tests, multiple deployments on one Redis) never share entries.
+        url = canonical_engine(db).url.render_as_string(hide_password=True)
+        return hashlib.sha1(url.encode("utf-8")).hexdigest()[:10]
+
+    def _count(self, tag: str, outcome: str) -> None:
+        family = tag.split(":", 1)[0]
+        with self._stats_lock:
+            self.stats[outcome] += 1
+            by_tag = self.stats_by_tag.setdefault(family, {"hits": 0, "misses": 0})
+            if outcome in by_tag:
+                by_tag[outcome] += 1
+
+    def get_or_load(self, db, tag: str, variant, loader):
+        """Return the cached value for ``(tag, variant)`` or store ``loader()``'s result.
+
+        ``loader`` returning None is not cached (e.g. 404s).
+        """
+        if db.info.get(PINNED_TO_PRIMARY):
+            # The client has just written; a replica read may have cached the state before it.
+            value = loader()
+            return None if value is None else jsonable_encoder(value)
+        namespace = self._namespace(db)
+        try:
+            generation = self.backend.counter(f"{namespace}:gen:{tag}")
+            key = f"{namespace}:{tag}:g{generation}:{variant}"
+            raw = self.backend.get(key)
+        except (OSError, RedisError):
+            self._count(tag, "errors")
+            return loader()
+        if raw is not None:
+            self._count(tag, "hits")
+            return json.loads(raw)
+
+        self._count(tag, "misses")
+        value = loader()
+        if value is None:
+            return None
+        encoded = jsonable_encoder(value)
+        try:
+            if reads_replica(db) and self.backend.get(f"{namespace}:written:{tag}") is not None:
+                return encoded
+            self.backend.set(key, json.dumps(encoded, separators=(",", ":")).encode("utf-8"), self.ttl)
+        except (OSError, RedisError):
+            self._count(tag, "errors")
+        return encoded
+
+    def invalidate(self, db, *tags: str) -> None:
+        namespace = self._namespace(db)
+        for tag in tags:
+            try:
+                self.backend.incr(f"{namespace}:gen:{tag}")
+                self.backend.set(f"{namespace}:written:{tag}", b"1", READ_PIN_SECONDS)
+            except (OSError, RedisError):
+                self._count(tag, "errors")
+                continue
+            with self._stats_lock:
+                self.stats["invalidations"] += 1
+
+    def snapshot(self) -> dict:
+        with self._stats_lock:
+            lookups = self.stats["hits"] + self.stats["misses"]
+            return {
+                "backend": type(self.backend).__name__,
+                "ttl_seconds": self.ttl,
+                "size": self.backend.size(),
+                **self.stats,
+                "hit_ratio": self.stats["hits"] / lookups if lookups else None,
+                "by_tag": {tag: dict(counts) for tag, counts in self.stats_by_tag.items()},
+            }
+
+
+def build_backend(url: str | None):
+    if url and url.startswith(("redis://", "rediss://")):
+        return RedisBackend(url)
+    return MemoryBackend(CACHE_MAX_ENTRIES)
+
+
+catalog_cache = CatalogCache(build_backend(CACHE_URL), ttl=CACHE_TTL_SECONDS)
+
+
+_PENDING_TAGS = "catalog_cache_pending_tags"
+
+
+def invalidate_on_commit(db, *tags: str) -> None:
+    """Invalidate ``tags`` once ``db`` commits, so readers never re-cache the pre-commit state."""
+    db.info.setdefault(_PENDING_TAGS, set()).update(tags)
+
+
+@event.listens_for(Session, "after_commit")
+def _flush_pending_tags(session):
+    tags = session.info.pop(_PENDING_TAGS, None)
+    if tags:
+        catalog_cache.invalidate(session, *sorted(tags))
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_pending_tags(session):
+    session.info.pop(_PENDING_TAGS, None)
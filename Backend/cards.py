@@ -0,0 +1,69 @@
+from models import Genre, Movie, MovieGenre
+
+MAX_BATCH_IDS = 300
+
+
+def parse_id_list(raw: str | list[str] | None) -> list[int]:
+    """Parse ``"3,1,2"`` (or repeated query values) into unique ids, keeping first-seen order."""
+    if not raw:
+        return []
+    parts = raw if isinstance(raw, list) else [raw]
+    ids = []
+    seen = set()
+    for part in parts:
+        for value in part.split(","):
+            value = value.strip()
+            if not value:
+                continue
+            movie_id = int(value)
+            if movie_id not in seen:
+                seen.add(movie_id)
+                ids.append(movie_id)
+    return ids
+
+
+CARD_COLUMNS = (
+    Movie.movie_id,
+    Movie.title,
+    Movie.release_date,
+    Movie.imdb_score,
+    Movie.poster_url,
+    Genre.name,
+)
+
+
+def join_card_genres(query):
+    return query.outerjoin(MovieGenre, MovieGenre.movie_id == Movie.movie_id).outerjoin(
+        Genre, Genre.genre_id == MovieGenre.genre_id
+    )
+
+
+def fold_card_rows(rows) -> dict[int, dict]:
+    """Collapse one-row-per-genre results (leading ``CARD_COLUMNS``) into cards, in first-seen order."""
+    cards: dict[int, dict] = {}
+    for movie_id, title, release_date, imdb_score, poster_url, genre_name, *_ in rows:
+        card = cards.get(movie_id)
+        if card is None:
+            card = cards[movie_id] = {
+                "movie_id": movie_id,
+                "title": title,
+                "release_date": release_date,
+                "year": release_date.year if release_date else None,
+                "imdb_score": float(imdb_score) if imdb_score is not None else None,
+                "poster_url": poster_url,
+                "genres": [],
+            }
+        if genre_name:
+            card["genres"].append(genre_name)
+    for card in cards.values():
+        card["genres"].sort(key=str.lower)
+    return cards
+
+
+def load_movie_cards(db, movie_ids) -> dict[int, dict]:
+    """Card projections keyed by movie id, fetched with a single ``IN`` query."""
+    movie_ids = list(movie_ids)
+    if not movie_ids:
+        return {}
+    rows = join_card_genres(db.query(*CARD_COLUMNS)).filter(Movie.movie_id.in_(movie_ids)).all()
+    return fold_card_rows(rows)
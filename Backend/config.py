@@ -21,9 +21,42 @@ _load_local_env()
 
 DATABASE_URL = os.getenv("DATABASE_URL")
 
+# Debug responses carry X-SQL-Count / X-SQL-Time-Ms with the statements each request ran.
+DEBUG = os.getenv("DEBUG", "").lower() in ("1", "true", "yes")
+
+# Statements slower than this (0 disables) are kept, with their EXPLAIN plan, for /health/slow-queries.
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "500"))
+SLOW_QUERY_LOG_SIZE = int(os.getenv("SLOW_QUERY_LOG_SIZE", "200"))
+# EXPLAIN ANALYZE re-runs the slow SELECT (Postgres only) to capture actual row counts and timings.
+SLOW_QUERY_EXPLAIN_ANALYZE = os.getenv("SLOW_QUERY_EXPLAIN_ANALYZE", "").lower() in ("1", "true", "yes")
+
+# Admin requests sent with X-Profile: 1 are sampled at this interval; the last PROFILE_KEEP are kept.
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", "20"))
+
 JWT_SECRET = os.getenv("JWT_SECRET", "secretkey")
 JWT_ALGORITHM = "HS256"
+JWT_EXPIRE_MINUTES = int(os.getenv("JWT_EXPIRE_MINUTES", str(7 * 24 * 60)))
+# How long a role read from the database (or a fresh token) is trusted before re-checking.
+PRINCIPAL_TTL_SECONDS = float(os.getenv("PRINCIPAL_TTL_SECONDS", "60"))
 
 TMDB_API_KEY = os.getenv("TMDB_API_KEY")
 OMDB_API_KEY = os.getenv("OMDB_API_KEY")
 TRAKT_CLIENT_ID = os.getenv("TRAKT_CLIENT_ID")
+
+# Catalog read cache: unset/"memory" keeps it in-process, "redis://host:port/db" shares it between workers.
+CACHE_URL = os.getenv("CACHE_URL")
+CACHE_TTL_SECONDS = float(os.getenv("CACHE_TTL_SECONDS", "60"))
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "10000"))
+# Each worker rebuilds its /homepage/feed snapshot at least this often, so writes served by
+# other workers show up.
+HOMEPAGE_FEED_TTL_SECONDS = float(os.getenv("HOMEPAGE_FEED_TTL_SECONDS", "60"))
+# Same for the /movies/suggest index; a rebuild reads every movie and person.
+SUGGEST_INDEX_TTL_SECONDS = float(os.getenv("SUGGEST_INDEX_TTL_SECONDS", "300"))
+FACET_INDEX_TTL_SECONDS = float(os.getenv("FACET_INDEX_TTL_SECONDS", "300"))
+# The /leaderboards/* boards; a rebuild also re-evaluates the trending decay and window.
+LEADERBOARD_TTL_SECONDS = float(os.getenv("LEADERBOARD_TTL_SECONDS", "60"))
+
+# Password hashing runs on its own bounded pool; requests beyond workers + queue get a 503.
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+PASSWORD_HASH_QUEUE = int(os.getenv("PASSWORD_HASH_QUEUE", "32"))
@@ -1,11 +1,19 @@
 
 import os
 import re
+import threading
+import time
+import weakref
 from pathlib import Path
 from typing import Optional
 from dotenv import load_dotenv
-from sqlalchemy import create_engine, event, text
-from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy import create_engine, event, inspect, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session, sessionmaker, declarative_base
+from sqlalchemy.util import await_only
+from sqlalchemy.util.concurrency import in_greenlet
+from starlette.concurrency import run_in_threadpool
 
 def _load_local_env() -> None:
     base_dir = Path(__file__).resolve().parent
@@ -23,6 +31,12 @@ _load_local_env()
 
 DATABASE_URL = os.getenv("DATABASE_URL")
 DATABASE_SCHEMA = os.getenv("DATABASE_SCHEMA")
+# Serve the catalog read endpoints from an asyncio engine (asyncpg / aiosqlite) instead of the thread pool.
+DATABASE_ASYNC = os.getenv("DATABASE_ASYNC", "").lower() in ("1", "true", "yes")
+# Optional read replica for GET requests; a client that just wrote reads the primary for a few seconds.
+DATABASE_READ_URL = os.getenv("DATABASE_READ_URL")
+DATABASE_READ_SCHEMA = os.getenv("DATABASE_READ_SCHEMA") or DATABASE_SCHEMA
+READ_PIN_SECONDS = float(os.getenv("DATABASE_READ_PIN_SECONDS", "5"))
 
 def normalize_schema(schema: Optional[str]) -> Optional[str]:
     if not schema:
@@ -33,6 +47,8 @@ def normalize_schema(schema: Optional[str]) -> Optional[str]:
         raise ValueError(f"DATABASE_SCHEMA contains invalid characters: {schema}")
     return schema
 
+schema_name = None
+
 if not DATABASE_URL:
     # DÙNG TẠM SQLite khi chưa có PostgreSQL cloud
     DATABASE_URL = "sqlite:///./local_dev.db"
@@ -47,20 +63,44 @@ else:
         DATABASE_URL,
         pool_pre_ping=True
     )
-    if schema_name:
-        @event.listens_for(engine, "connect")
-        def set_search_path(dbapi_connection, _connection_record):
-            cursor = dbapi_connection.cursor()
-            cursor.execute(f"SET search_path TO {schema_name}, public")
-            cursor.close()
 
 SCHEMA_NAME = schema_name
 
 
+def _search_path_listener(schema: str):
+    def set_search_path(dbapi_connection, _connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f"SET search_path TO {schema}, public")
+        cursor.close()
+    return set_search_path
+
+
+if SCHEMA_NAME:
+    event.listen(engine, "connect", _search_path_listener(SCHEMA_NAME))
+
+
+_SEARCH_PATH = "search_path"
+
+
 def apply_schema(session) -> None:
-    if not SCHEMA_NAME:
+    """Point each of ``session``'s transactions at its schema as it begins.
+
+    Nothing is sent until the session first touches the database, so a request answered from
+    in-process caches (such as the admin role check) stays free of SQL.
+    """
+    schema = session.info.get("schema", SCHEMA_NAME)
+    if not schema or session.info.get(_SEARCH_PATH) == schema:
         return
-    session.execute(text(f"SET search_path TO {SCHEMA_NAME}, public"))
+    session.info[_SEARCH_PATH] = schema
+    if session.in_transaction():
+        session.execute(text(f"SET search_path TO {schema}, public"))
+
+
+@event.listens_for(Session, "after_begin")
+def _set_search_path(session, _transaction, connection):
+    schema = session.info.get(_SEARCH_PATH)
+    if schema:
+        connection.exec_driver_sql(f"SET search_path TO {schema}, public")
 
 SessionLocal = sessionmaker(
     autocommit=False,
@@ -68,4 +108,190 @@ SessionLocal = sessionmaker(
     bind=engine
 )
 
+# Session.info keys: the search_path schema for non-primary engines, and whether a read was
+# sent to the primary because the client has just written.
+REPLICA_INFO = {"schema": normalize_schema(DATABASE_READ_SCHEMA)}
+PINNED_TO_PRIMARY = "pinned_to_primary"
+
 Base = declarative_base()
+
+_engine_aliases = weakref.WeakKeyDictionary()
+_replica_engines = weakref.WeakSet()
+
+
+def alias_engine(alias, primary, replica: bool = False) -> None:
+    """Let ``alias`` (another engine on the same database) share ``primary``'s in-process state and cache keys.
+
+    A ``replica`` lags behind the primary, so its reads never populate that shared state.
+    """
+    _engine_aliases[alias] = primary
+    if replica:
+        _replica_engines.add(alias)
+
+
+def reads_replica(db) -> bool:
+    return db.get_bind().engine in _replica_engines
+
+
+def canonical_engine(db):
+    engine = db.get_bind().engine
+    return _engine_aliases.get(engine, engine)
+
+
+ASYNC_DRIVERS = {"postgresql": "postgresql+asyncpg", "sqlite": "sqlite+aiosqlite"}
+
+
+def create_database_engine(url: str, schema: Optional[str] = None):
+    if make_url(url).get_backend_name() == "sqlite":
+        bind = create_engine(url, connect_args={"check_same_thread": False})
+    else:
+        bind = create_engine(url, pool_pre_ping=True)
+    if schema:
+        event.listen(bind, "connect", _search_path_listener(schema))
+    return bind
+
+
+def create_async_database_engine(url: str, schema: Optional[str] = None):
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    url = make_url(url)
+    options = {}
+    if url.get_backend_name() == "postgresql":
+        options["pool_pre_ping"] = True
+        # asyncpg spells libpq's ``sslmode`` as the ``ssl`` connect argument.
+        sslmode = url.query.get("sslmode")
+        if sslmode:
+            url = url.difference_update_query(["sslmode"])
+            options["connect_args"] = {"ssl": sslmode}
+    async_engine = create_async_engine(url.set(drivername=ASYNC_DRIVERS[url.get_backend_name()]), **options)
+    if schema:
+        event.listen(async_engine.sync_engine, "connect", _search_path_listener(schema))
+    return async_engine
+
+
+read_engine = None
+ReadSessionLocal = None
+if DATABASE_READ_URL:
+    read_engine = create_database_engine(DATABASE_READ_URL, REPLICA_INFO["schema"])
+    # Same data as the primary: in-process indexes and catalog cache keys are shared.
+    alias_engine(read_engine, engine, replica=True)
+    ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine, info=REPLICA_INFO)
+
+async_engine = None
+async_read_engine = None
+AsyncSessionLocal = None
+AsyncReadSessionLocal = None
+if DATABASE_ASYNC:
+    from sqlalchemy.ext.asyncio import async_sessionmaker
+
+    async_engine = create_async_database_engine(DATABASE_URL, SCHEMA_NAME)
+    alias_engine(async_engine.sync_engine, engine)
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+    if DATABASE_READ_URL:
+        async_read_engine = create_async_database_engine(DATABASE_READ_URL, REPLICA_INFO["schema"])
+        alias_engine(async_read_engine.sync_engine, engine, replica=True)
+        AsyncReadSessionLocal = async_sessionmaker(
+            async_read_engine, autoflush=False, expire_on_commit=False, info=REPLICA_INFO
+        )
+
+
+def off_event_loop(fn, *args):
+    """Call ``fn(*args)``; from ``AsyncSession.run_sync`` it runs in the thread pool instead.
+
+    ``run_sync`` executes sync code on the event loop, where blocking I/O or a long CPU-bound
+    build would stall every other request.
+    """
+    if in_greenlet():
+        return await_only(run_in_threadpool(fn, *args))
+    return fn(*args)
+
+
+def on_primary(db, fn, *args):
+    """``fn(db, *args)``, or ``fn`` on a blocking session of the primary when ``db`` reads a replica
+    or runs inside ``AsyncSession.run_sync`` (then in the thread pool)."""
+    if not in_greenlet() and not reads_replica(db):
+        return fn(db, *args)
+    return off_event_loop(_on_primary_blocking, canonical_engine(db), fn, args)
+
+
+def _on_primary_blocking(engine, fn, args):
+    with Session(bind=engine) as db:
+        apply_schema(db)
+        return fn(db, *args)
+
+
+class EngineLocal:
+    """Lazily built, per-engine in-process state (search indexes, snapshots).
+
+    Values are always built from the primary: under ``DATABASE_ASYNC`` in the thread pool on a
+    blocking session, not on the event loop, and for a replica session on a primary session, so
+    a snapshot never misses a write the replica has not applied yet. With ``ttl`` a value is
+    rebuilt once it is that many seconds old.
+    """
+
+    def __init__(self, factory, ttl: Optional[float] = None):
+        self._factory = factory
+        self._ttl = ttl
+        # engine -> (value, monotonic expiry or None)
+        self._values = weakref.WeakKeyDictionary()
+        # Reentrant: async sessions build on the event loop thread, where a second request can
+        # arrive while the first build is suspended on I/O.
+        self._lock = threading.RLock()
+
+    def _current(self, engine):
+        entry = self._values.get(engine)
+        if entry is None or (entry[1] is not None and entry[1] <= time.monotonic()):
+            return None
+        return entry[0]
+
+    def get(self, db):
+        engine = canonical_engine(db)
+        value = self._current(engine)
+        if value is None and (in_greenlet() or reads_replica(db)):
+            return on_primary(db, self.get)
+        if value is None:
+            with self._lock:
+                value = self._current(engine)
+                if value is None:
+                    value = self._factory(db)
+                    expires_at = None if self._ttl is None else time.monotonic() + self._ttl
+                    self._values[engine] = (value, expires_at)
+        return value
+
+    def loaded(self, db):
+        """Return the value only if already built, so writes never trigger a full load."""
+        return self._current(canonical_engine(db))
+
+    def discard(self, db) -> None:
+        self._values.pop(canonical_engine(db), None)
+
+
+UPSERT_DIALECTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+def upsert_insert(db):
+    """The dialect's ``insert`` (with ``on_conflict_*``) for the session's bind, or None if unsupported."""
+    return UPSERT_DIALECTS.get(db.get_bind().dialect.name)
+
+
+def add_missing_columns(bind, metadata) -> None:
+    """Add columns declared on existing tables; ``create_all`` only creates missing tables."""
+    inspector = inspect(bind)
+    with bind.begin() as conn:
+        for table in metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            if any(column.name not in existing for column in table.primary_key.columns):
+                # A different (legacy) layout; adding columns would not make it usable.
+                continue
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                ddl = f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column.type.compile(dialect=bind.dialect)}"
+                default = getattr(column.server_default, "arg", None)
+                if isinstance(default, str):
+                    ddl += f" DEFAULT '{default}'"
+                    if not column.nullable:
+                        ddl += " NOT NULL"
+                conn.execute(text(ddl))
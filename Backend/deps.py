@@ -1,38 +1,150 @@
-from fastapi import Depends, HTTPException
+import math
+import time
+
+from fastapi import Depends, HTTPException, Request, Response
 from fastapi.security import HTTPBearer
 from jose import jwt
 from sqlalchemy.orm import Session
-from database import SessionLocal, apply_schema
-from models import User, UserRole
+from starlette.concurrency import run_in_threadpool
+from database import (
+    DATABASE_ASYNC,
+    PINNED_TO_PRIMARY,
+    READ_PIN_SECONDS,
+    AsyncReadSessionLocal,
+    AsyncSessionLocal,
+    ReadSessionLocal,
+    SessionLocal,
+    apply_schema,
+)
+from models import UserRole
 from config import JWT_SECRET, JWT_ALGORITHM
+from principals import principal_caches
 
 security = HTTPBearer()
+optional_security = HTTPBearer(auto_error=False)
 
-def get_db():
-    db = SessionLocal()
+READ_METHODS = ("GET", "HEAD")
+PRIMARY_PIN_COOKIE = "read_primary_until"
+PRIMARY_PIN_HEADER = "X-Read-Primary-Until"
+
+
+def pinned_to_primary(request: Request) -> bool:
+    raw = request.headers.get(PRIMARY_PIN_HEADER) or request.cookies.get(PRIMARY_PIN_COOKIE)
+    if not raw:
+        return False
+    try:
+        until = float(raw)
+    except ValueError:
+        return False
+    now = time.time()
+    # Capped at one pin window so a hand-made marker cannot keep a client on the primary.
+    return now < until <= now + READ_PIN_SECONDS
+
+
+def pin_to_primary(response: Response) -> None:
+    """Send the client's reads to the primary until its write has reached the replica."""
+    until = f"{time.time() + READ_PIN_SECONDS:.3f}"
+    response.set_cookie(PRIMARY_PIN_COOKIE, until, max_age=math.ceil(READ_PIN_SECONDS), httponly=True, samesite="lax")
+    response.headers[PRIMARY_PIN_HEADER] = until
+
+
+def read_only(endpoint):
+    """Route a non-GET endpoint that only reads (e.g. a POST carrying a long id list) like a GET.
+
+    Apply it under the ``@router.post(...)`` decorator.
+    """
+    endpoint.read_only = True
+    return endpoint
+
+
+def _is_read(request: Request) -> bool:
+    if request.method in READ_METHODS:
+        return True
+    endpoint = getattr(request.scope.get("route"), "endpoint", None)
+    return getattr(endpoint, "read_only", False)
+
+
+def _route(request: Request, response: Response, primary, replica):
+    """``(session factory, pinned)``: reads use the replica unless the client has just written."""
+    if replica is None:
+        return primary, False
+    if not _is_read(request):
+        # Only applied when the route returns normally; error responses are built without it.
+        pin_to_primary(response)
+        return primary, False
+    if pinned_to_primary(request):
+        return primary, True
+    return replica, False
+
+
+def get_db(request: Request, response: Response):
+    factory, pinned = _route(request, response, SessionLocal, ReadSessionLocal)
+    db = factory()
+    if pinned:
+        db.info[PINNED_TO_PRIMARY] = True
     try:
         apply_schema(db)
         yield db
     finally:
         db.close()
 
-def get_current_user(token=Depends(security)):
+
+async def get_async_db(request: Request, response: Response):
+    factory, pinned = _route(request, response, AsyncSessionLocal, AsyncReadSessionLocal)
+    async with factory() as db:
+        if pinned:
+            db.info[PINNED_TO_PRIMARY] = True
+        await db.run_sync(apply_schema)
+        yield db
+
+
+# Catalog reads are ``async def`` endpoints that hand a ``fn(db, ...)`` to ``run_db``. The same
+# sync query code then runs on the event loop over asyncpg/aiosqlite when ``DATABASE_ASYNC`` is
+# set, and in the thread pool on the blocking engine otherwise.
+if DATABASE_ASYNC:
+    def get_db_runner(db=Depends(get_async_db)):
+        async def run_db(fn, *args):
+            return await db.run_sync(fn, *args)
+        return run_db
+else:
+    def get_db_runner(db: Session = Depends(get_db)):
+        async def run_db(fn, *args):
+            return await run_in_threadpool(fn, db, *args)
+        return run_db
+
+
+def get_token_claims(token=Depends(security)) -> dict:
+    # ``exp`` is enforced when present; tokens issued before it was added carry only ``user_id``.
     try:
         payload = jwt.decode(
             token.credentials,
             JWT_SECRET,
             algorithms=[JWT_ALGORITHM]
         )
-        return payload["user_id"]
     except:
         raise HTTPException(status_code=401, detail="Invalid token")
+    if "user_id" not in payload:
+        raise HTTPException(status_code=401, detail="Invalid token")
+    return payload
+
+
+def get_current_user(token=Depends(security)):
+    return get_token_claims(token)["user_id"]
+
+
+def get_optional_user(token=Depends(optional_security)):
+    # Anonymous callers get None; a token that is present must still be valid.
+    if token is None:
+        return None
+    return get_current_user(token)
 
 
 def get_current_admin(
-    user_id=Depends(get_current_user),
+    claims: dict = Depends(get_token_claims),
     db: Session = Depends(get_db)
 ):
-    user = db.query(User).filter(User.user_id == user_id).first()
-    if not user or user.role != UserRole.admin:
+    # Served from the principal cache; the database is read at most once per user per TTL.
+    user_id = claims["user_id"]
+    if principal_caches.get(db).role(db, user_id, claims) != UserRole.admin:
         raise HTTPException(status_code=403, detail="Admin required")
-    return user
+    return user_id
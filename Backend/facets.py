@@ -0,0 +1,314 @@
+import heapq
+import threading
+
+from config import FACET_INDEX_TTL_SECONDS
+from database import EngineLocal
+from models import Genre, Movie, MovieGenre
+
+DURATION_BUCKETS = (
+    ("<90", None, 89),
+    ("90-119", 90, 119),
+    ("120-149", 120, 149),
+    ("150+", 150, None),
+)
+SORT_FIELDS = {
+    "score": "imdb_score",
+    "year": "release_date",
+    "title": "title",
+    "votes": "imdb_vote_count",
+}
+
+
+def _iter_bits(bitmap: int):
+    # One pass over the bytes; clearing bits off the int itself would copy it for every bit.
+    data = bitmap.to_bytes((bitmap.bit_length() + 7) // 8, "little")
+    for index, byte in enumerate(data):
+        base = index * 8
+        while byte:
+            low = byte & -byte
+            yield base + low.bit_length() - 1
+            byte ^= low
+
+
+def _bitmap(slots) -> int:
+    """The bitmap with ``slots`` set, built in one pass instead of one big-int OR per slot."""
+    slots = list(slots)
+    if not slots:
+        return 0
+    data = bytearray(max(slots) // 8 + 1)
+    for slot in slots:
+        data[slot >> 3] |= 1 << (slot & 7)
+    return int.from_bytes(data, "little")
+
+
+class _ValueBitmaps:
+    """One bitmap (a Python int used as a bit set over movie slots) per distinct value."""
+
+    def __init__(self):
+        self.bitmaps: dict = {}
+
+    def set(self, value, slot: int):
+        if value is None:
+            return
+        self.bitmaps[value] = self.bitmaps.get(value, 0) | (1 << slot)
+
+    def load(self, slots_by_value: dict):
+        self.bitmaps = {value: _bitmap(slots) for value, slots in slots_by_value.items()}
+
+    def clear(self, value, slot: int):
+        if value is None or value not in self.bitmaps:
+            return
+        remaining = self.bitmaps[value] & ~(1 << slot)
+        if remaining:
+            self.bitmaps[value] = remaining
+        else:
+            del self.bitmaps[value]
+
+    def union(self, predicate) -> int:
+        result = 0
+        for value, bitmap in self.bitmaps.items():
+            if predicate(value):
+                result |= bitmap
+        return result
+
+
+class FacetIndex:
+    """Bitmap indexes over genre, release year, duration, IMDb score and age rating."""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._slots: dict[int, int] = {}
+        self._free: list[int] = []
+        self._records: list[dict | None] = []
+        self._all = 0
+        self._genre_names: dict[str, str] = {}
+        self.genres = _ValueBitmaps()
+        self.years = _ValueBitmaps()
+        self.durations = _ValueBitmaps()
+        self.scores = _ValueBitmaps()
+        self.age_ratings = _ValueBitmaps()
+        self._sort_ranks: dict[tuple[str, bool], list[int]] = {}
+
+    def __len__(self):
+        return len(self._slots)
+
+    def _fields(self, record: dict):
+        for genre in record["genre_keys"]:
+            yield self.genres, genre
+        yield self.years, record["year"]
+        yield self.durations, record["duration_minutes"]
+        yield self.scores, record["score_tenths"]
+        yield self.age_ratings, record["age_rating"]
+
+    def _index(self, record: dict, slot: int, add: bool):
+        for values, value in self._fields(record):
+            if add:
+                values.set(value, slot)
+            else:
+                values.clear(value, slot)
+
+    def _record(self, movie: Movie, genre_names: list[str]) -> dict:
+        for name in genre_names:
+            self._genre_names.setdefault(name.lower(), name)
+        score = float(movie.imdb_score) if movie.imdb_score is not None else None
+        return {
+            "movie_id": movie.movie_id,
+            "title": movie.title,
+            "release_date": movie.release_date,
+            "year": movie.release_date.year if movie.release_date else None,
+            "duration_minutes": movie.duration_minutes,
+            "age_rating": movie.age_rating,
+            "imdb_score": score,
+            "score_tenths": round(score * 10) if score is not None else None,
+            "imdb_vote_count": movie.imdb_vote_count or 0,
+            "poster_url": movie.poster_url,
+            "genres": sorted(genre_names, key=str.lower),
+            "genre_keys": {name.lower() for name in genre_names},
+        }
+
+    def load(self, movies):
+        """Replace the index with ``(movie, genre_names)`` pairs, building each bitmap once."""
+        with self._lock:
+            self._free.clear()
+            self._sort_ranks.clear()
+            self._records = [self._record(movie, genre_names) for movie, genre_names in movies]
+            self._slots = {record["movie_id"]: slot for slot, record in enumerate(self._records)}
+            pending = {values: {} for values in self._value_bitmaps()}
+            for slot, record in enumerate(self._records):
+                for values, value in self._fields(record):
+                    if value is not None:
+                        pending[values].setdefault(value, []).append(slot)
+            for values, slots_by_value in pending.items():
+                values.load(slots_by_value)
+            self._all = _bitmap(range(len(self._records)))
+
+    def _value_bitmaps(self) -> tuple[_ValueBitmaps, ...]:
+        return (self.genres, self.years, self.durations, self.scores, self.age_ratings)
+
+    def upsert_movie(self, movie: Movie, genre_names: list[str] | None = None):
+        """Index ``movie``; ``genre_names=None`` keeps the genres already indexed for it."""
+        with self._lock:
+            slot = self._slots.get(movie.movie_id)
+            previous = self._records[slot] if slot is not None else None
+            if genre_names is None:
+                genre_names = previous["genres"] if previous else []
+            if previous:
+                self._index(previous, slot, add=False)
+            elif self._free:
+                slot = self._free.pop()
+            else:
+                slot = len(self._records)
+                self._records.append(None)
+
+            record = self._record(movie, genre_names)
+            self._records[slot] = record
+            self._slots[movie.movie_id] = slot
+            self._all |= 1 << slot
+            self._index(record, slot, add=True)
+            self._sort_ranks.clear()
+
+    def remove_movie(self, movie_id: int):
+        with self._lock:
+            slot = self._slots.pop(movie_id, None)
+            if slot is None:
+                return
+            self._index(self._records[slot], slot, add=False)
+            self._records[slot] = None
+            self._all &= ~(1 << slot)
+            self._free.append(slot)
+            self._sort_ranks.clear()
+
+    def _ranks(self, sort: str, descending: bool) -> list[int]:
+        ranks = self._sort_ranks.get((sort, descending))
+        if ranks is not None:
+            return ranks
+        field = SORT_FIELDS[sort]
+
+        def value(slot):
+            raw = self._records[slot][field]
+            return raw.lower() if isinstance(raw, str) else raw
+
+        live = list(self._slots.values())
+        present = sorted(
+            (slot for slot in live if value(slot) is not None),
+            key=lambda slot: (value(slot), self._records[slot]["movie_id"]),
+            reverse=descending,
+        )
+        # Movies without a value for the sort field go last in either direction.
+        ordered = present + [slot for slot in live if value(slot) is None]
+        ranks = [0] * len(self._records)
+        for position, slot in enumerate(ordered):
+            ranks[slot] = position
+        self._sort_ranks[(sort, descending)] = ranks
+        return ranks
+
+    def _counts(self, base: int, values: _ValueBitmaps) -> dict:
+        counts = {}
+        for value, bitmap in sorted(values.bitmaps.items()):
+            count = (base & bitmap).bit_count()
+            if count:
+                counts[value] = count
+        return counts
+
+    def discover(
+        self,
+        genres: list[str] | None = None,
+        year_from: int | None = None,
+        year_to: int | None = None,
+        duration_min: int | None = None,
+        duration_max: int | None = None,
+        min_score: float | None = None,
+        age_ratings: list[str] | None = None,
+        sort: str = "score",
+        descending: bool = True,
+        offset: int = 0,
+        limit: int = 20,
+    ) -> dict:
+        with self._lock:
+            filters: dict[str, int] = {}
+            if genres:
+                bitmap = self._all
+                for name in genres:
+                    bitmap &= self.genres.bitmaps.get(name.strip().lower(), 0)
+                filters["genres"] = bitmap
+            if year_from is not None or year_to is not None:
+                filters["years"] = self.years.union(
+                    lambda y: (year_from is None or y >= year_from) and (year_to is None or y <= year_to)
+                )
+            if duration_min is not None or duration_max is not None:
+                filters["durations"] = self.durations.union(
+                    lambda d: (duration_min is None or d >= duration_min)
+                    and (duration_max is None or d <= duration_max)
+                )
+            if min_score is not None:
+                threshold = round(min_score * 10)
+                filters["scores"] = self.scores.union(lambda s: s >= threshold)
+            if age_ratings:
+                wanted = set(age_ratings)
+                filters["age_ratings"] = self.age_ratings.union(lambda a: a in wanted)
+
+            def combined(excluding: str | None = None) -> int:
+                bitmap = self._all
+                for name, value in filters.items():
+                    if name != excluding:
+                        bitmap &= value
+                return bitmap
+
+            matched = combined()
+            ranks = self._ranks(sort, descending)
+            # Only the slots up to the end of the page need ordering.
+            slots = heapq.nsmallest(offset + limit, _iter_bits(matched), key=ranks.__getitem__)
+            page = [self._card(slot) for slot in slots[offset:]]
+
+            # Each facet is counted against every filter except its own, so selecting
+            # one value does not hide the alternatives for that facet.
+            genre_counts = self._counts(combined("genres"), self.genres)
+            score_counts: dict[int, int] = {}
+            for tenths, count in self._counts(combined("scores"), self.scores).items():
+                score_counts[tenths // 10] = score_counts.get(tenths // 10, 0) + count
+            duration_base = combined("durations")
+            duration_counts = {}
+            for label, low, high in DURATION_BUCKETS:
+                bucket = self.durations.union(
+                    lambda d: (low is None or d >= low) and (high is None or d <= high)
+                )
+                count = (duration_base & bucket).bit_count()
+                if count:
+                    duration_counts[label] = count
+
+            facets = {
+                "genres": {self._genre_names[key]: count for key, count in genre_counts.items()},
+                "years": self._counts(combined("years"), self.years),
+                "durations": duration_counts,
+                "scores": score_counts,
+                "age_ratings": self._counts(combined("age_ratings"), self.age_ratings),
+            }
+            return {"total_results": matched.bit_count(), "results": page, "facets": facets}
+
+    def _card(self, slot: int) -> dict:
+        record = self._records[slot]
+        return {
+            "movie_id": record["movie_id"],
+            "title": record["title"],
+            "release_date": record["release_date"],
+            "duration_minutes": record["duration_minutes"],
+            "age_rating": record["age_rating"],
+            "imdb_score": record["imdb_score"],
+            "imdb_vote_count": record["imdb_vote_count"],
+            "poster_url": record["poster_url"],
+            "genres": list(record["genres"]),
+        }
+
+
+def build_facet_index(db) -> FacetIndex:
+    genres_by_movie: dict[int, list[str]] = {}
+    rows = db.query(MovieGenre.movie_id, Genre.name).join(Genre, Genre.genre_id == MovieGenre.genre_id)
+    for movie_id, name in rows:
+        genres_by_movie.setdefault(movie_id, []).append(name)
+
+    index = FacetIndex()
+    index.load((movie, genres_by_movie.get(movie.movie_id, [])) for movie in db.query(Movie).yield_per(1000))
+    return index
+
+
+facet_indexes = EngineLocal(build_facet_index, ttl=FACET_INDEX_TTL_SECONDS)
@@ -0,0 +1,60 @@
+import json
+
+from fastapi.encoders import jsonable_encoder
+
+from cards import load_movie_cards
+from config import HOMEPAGE_FEED_TTL_SECONDS
+from database import EngineLocal
+from models import HomepageSettings, Movie
+
+RAILS = (
+    ("top_ten", "top_ten_title", "top_ten_ids"),
+    ("fan_favorites", "fan_favorites_title", "fan_favorites_ids"),
+    ("new_arrivals", "new_arrivals_title", "new_arrivals_ids"),
+)
+
+
+def build_homepage_feed(db) -> bytes:
+    """Resolve the hero and every rail into cards and return the encoded JSON snapshot."""
+    settings = db.query(HomepageSettings).order_by(HomepageSettings.settings_id.asc()).first()
+    rail_ids = {
+        key: list(getattr(settings, ids_field) or []) if settings else []
+        for key, _, ids_field in RAILS
+    }
+    hero_id = settings.hero_movie_id if settings else None
+
+    wanted = {movie_id for ids in rail_ids.values() for movie_id in ids}
+    if hero_id is not None:
+        wanted.add(hero_id)
+    cards = load_movie_cards(db, wanted)
+
+    hero = None
+    if hero_id is not None and hero_id in cards:
+        extra = (
+            db.query(Movie.description, Movie.cover_url, Movie.trailer_url)
+            .filter(Movie.movie_id == hero_id)
+            .first()
+        )
+        hero = {
+            **cards[hero_id],
+            "tagline": settings.hero_tagline,
+            "description": extra.description,
+            "cover_url": extra.cover_url,
+            "trailer_url": extra.trailer_url,
+        }
+
+    feed = {
+        "hero": hero,
+        "rails": [
+            {
+                "key": key,
+                "title": getattr(settings, title_field) if settings else None,
+                "movies": [cards[movie_id] for movie_id in rail_ids[key] if movie_id in cards],
+            }
+            for key, title_field, _ in RAILS
+        ],
+    }
+    return json.dumps(jsonable_encoder(feed), separators=(",", ":")).encode("utf-8")
+
+
+homepage_feeds = EngineLocal(build_homepage_feed, ttl=HOMEPAGE_FEED_TTL_SECONDS)
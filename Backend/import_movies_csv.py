@@ -5,8 +5,10 @@ from typing import Iterable, Optional
 
 from sqlalchemy import func
 
-from database import SessionLocal, apply_schema
+from database import SessionLocal, apply_schema, engine
 from models import Genre, Movie, MovieCast, MovieGenre, Person
+from movie_versions import bump_versions
+from search import ensure_search_index
 
 
 EXPECTED_COLUMNS = {
@@ -67,8 +69,16 @@ def parse_actors(value: str) -> list[tuple[str, Optional[str]]]:
     return actors
 
 
+def find_genre(db, name: str) -> Optional[Genre]:
+    return db.query(Genre).filter(func.lower(Genre.name) == name.lower()).first()
+
+
+def find_person(db, full_name: str) -> Optional[Person]:
+    return db.query(Person).filter(func.lower(Person.full_name) == full_name.lower()).first()
+
+
 def get_or_create_genre(db, name: str) -> Genre:
-    genre = db.query(Genre).filter(func.lower(Genre.name) == name.lower()).first()
+    genre = find_genre(db, name)
     if genre:
         return genre
     genre = Genre(name=name)
@@ -78,7 +88,7 @@ def get_or_create_genre(db, name: str) -> Genre:
 
 
 def get_or_create_person(db, full_name: str) -> Person:
-    person = db.query(Person).filter(func.lower(Person.full_name) == full_name.lower()).first()
+    person = find_person(db, full_name)
     if person:
         return person
     person = Person(full_name=full_name)
@@ -134,6 +144,10 @@ def import_csv(path: Path) -> None:
         if missing:
             raise RuntimeError(f"CSV missing columns: {', '.join(sorted(missing))}")
 
+        # Adds and backfills the folded search_key columns on databases created before they existed;
+        # rows written below get their keys from the model validators.
+        ensure_search_index(engine)
+
         created = 0
         updated = 0
         rows = list(reader)
@@ -164,6 +178,8 @@ def import_csv(path: Path) -> None:
 
                 if movies:
                     updated += len(movies)
+                    # The detail payload changes below; a new version gives it a new ETag.
+                    bump_versions(db, None, [movie.movie_id for movie in movies])
                 else:
                     movie = Movie(title=title, **payload)
                     db.add(movie)
@@ -0,0 +1,209 @@
+import threading
+from bisect import bisect_left, insort
+from datetime import datetime, timedelta
+
+from sqlalchemy import func
+
+from config import LEADERBOARD_TTL_SECONDS
+from database import EngineLocal
+from models import Favorite, Movie, MovieRatingStats, Rating
+
+# Local ratings are 0-5 stars; they are doubled to sit on IMDb's 0-10 scale.
+LOCAL_RATING_SCALE = 2.0
+MIN_PRIOR_VOTES = 100
+TRENDING_HALF_LIFE = timedelta(days=3)
+TRENDING_WINDOW = timedelta(days=30)
+TRENDING_WEIGHTS = {"rating": 1.0, "favorite": 2.0}
+MAX_LIMIT = 100
+
+
+class _RankedScores:
+    """Every movie's score kept in descending order, so the top N is a slice."""
+
+    def __init__(self):
+        self._order: list[tuple[float, int]] = []
+        self._scores: dict[int, float] = {}
+
+    def __len__(self):
+        return len(self._order)
+
+    def load(self, scores: dict[int, float]) -> None:
+        self._scores = dict(scores)
+        self._order = sorted((-score, movie_id) for movie_id, score in scores.items())
+
+    def get(self, movie_id: int) -> float | None:
+        return self._scores.get(movie_id)
+
+    def set(self, movie_id: int, score: float) -> None:
+        self.remove(movie_id)
+        self._scores[movie_id] = score
+        insort(self._order, (-score, movie_id))
+
+    def remove(self, movie_id: int) -> None:
+        score = self._scores.pop(movie_id, None)
+        if score is not None:
+            del self._order[bisect_left(self._order, (-score, movie_id))]
+
+    def top(self, limit: int) -> list[tuple[int, float]]:
+        return [(movie_id, -negated) for negated, movie_id in self._order[:limit]]
+
+
+class Leaderboards:
+    """Bayesian-weighted Top and time-decayed Trending rankings, updated in place by writes.
+
+    Top: ``(v * R + m * C) / (v + m)`` where ``R``/``v`` are the movie's combined IMDb and local
+    mean/votes and ``C``/``m`` the catalogue prior fixed at build time. Trending scores are stored
+    as ``weight * 2 ** ((t - epoch) / half_life)`` sums; every score decays by the same factor, so
+    the order never changes with time alone and an event is a single O(log n) update.
+    """
+
+    def __init__(self, prior_mean: float, prior_votes: float, epoch: datetime):
+        self._lock = threading.RLock()
+        self.prior_mean = prior_mean
+        self.prior_votes = prior_votes
+        self.epoch = epoch
+        self._movies: dict[int, dict] = {}
+        self._top = _RankedScores()
+        self._trending = _RankedScores()
+
+    def _weighted(self, record: dict) -> float | None:
+        votes = record["imdb_vote_count"] + record["rating_count"]
+        if not votes:
+            return None
+        total = (record["imdb_score"] or 0.0) * record["imdb_vote_count"]
+        total += record["rating_sum"] * LOCAL_RATING_SCALE
+        return (total + self.prior_mean * self.prior_votes) / (votes + self.prior_votes)
+
+    def _rescore(self, movie_id: int) -> None:
+        score = self._weighted(self._movies[movie_id])
+        if score is None:
+            self._top.remove(movie_id)
+        else:
+            self._top.set(movie_id, score)
+
+    def _store(self, movie: Movie) -> None:
+        record = self._movies.setdefault(movie.movie_id, {"rating_sum": 0.0, "rating_count": 0})
+        has_score = movie.imdb_score is not None
+        record.update(
+            title=movie.title,
+            year=movie.release_date.year if movie.release_date else None,
+            poster_url=movie.poster_url,
+            imdb_score=float(movie.imdb_score) if has_score else None,
+            imdb_vote_count=(movie.imdb_vote_count or 0) if has_score else 0,
+        )
+
+    def upsert_movie(self, movie: Movie) -> None:
+        with self._lock:
+            self._store(movie)
+            self._rescore(movie.movie_id)
+
+    def remove_movie(self, movie_id: int) -> None:
+        with self._lock:
+            self._movies.pop(movie_id, None)
+            self._top.remove(movie_id)
+            self._trending.remove(movie_id)
+
+    def record_rating(self, movie_id: int, rating_sum, rating_count: int, at: datetime | None = None) -> None:
+        """Apply the movie's new aggregate and count the write as a trending event."""
+        with self._lock:
+            record = self._movies.get(movie_id)
+            if record is None:
+                return
+            record["rating_sum"] = float(rating_sum)
+            record["rating_count"] = int(rating_count)
+            self._rescore(movie_id)
+            self._bump_trending(movie_id, "rating", at)
+
+    def record_favorite(self, movie_id: int, at: datetime | None = None) -> None:
+        with self._lock:
+            if movie_id in self._movies:
+                self._bump_trending(movie_id, "favorite", at)
+
+    def _growth(self, kind: str, at: datetime | None) -> float:
+        elapsed = ((at or datetime.utcnow()) - self.epoch) / TRENDING_HALF_LIFE
+        return TRENDING_WEIGHTS[kind] * 2.0 ** elapsed
+
+    def _bump_trending(self, movie_id: int, kind: str, at: datetime | None) -> None:
+        self._trending.set(movie_id, (self._trending.get(movie_id) or 0.0) + self._growth(kind, at))
+
+    def _cards(self, ranked, score_key: str, scale: float = 1.0) -> list[dict]:
+        cards = []
+        for rank, (movie_id, score) in enumerate(ranked, start=1):
+            record = self._movies[movie_id]
+            cards.append(
+                {
+                    "rank": rank,
+                    "movie_id": movie_id,
+                    "title": record["title"],
+                    "year": record["year"],
+                    "poster_url": record["poster_url"],
+                    "imdb_score": record["imdb_score"],
+                    "imdb_vote_count": record["imdb_vote_count"],
+                    "local_rating_count": record["rating_count"],
+                    score_key: round(score * scale, 4),
+                }
+            )
+        return cards
+
+    def top(self, limit: int) -> list[dict]:
+        with self._lock:
+            return self._cards(self._top.top(limit), "weighted_score")
+
+    def trending(self, limit: int, now: datetime | None = None) -> list[dict]:
+        with self._lock:
+            elapsed = ((now or datetime.utcnow()) - self.epoch) / TRENDING_HALF_LIFE
+            return self._cards(self._trending.top(limit), "trending_score", 2.0 ** -elapsed)
+
+
+def _prior(records: list[dict]) -> tuple[float, float]:
+    """Vote-weighted catalogue mean and the median vote count (at least ``MIN_PRIOR_VOTES``)."""
+    total = votes = 0.0
+    counts = []
+    for record in records:
+        count = record["imdb_vote_count"] + record["rating_count"]
+        if not count:
+            continue
+        total += (record["imdb_score"] or 0.0) * record["imdb_vote_count"]
+        total += record["rating_sum"] * LOCAL_RATING_SCALE
+        votes += count
+        counts.append(count)
+    if not counts:
+        return 0.0, float(MIN_PRIOR_VOTES)
+    counts.sort()
+    return total / votes, float(max(counts[len(counts) // 2], MIN_PRIOR_VOTES))
+
+
+def build_leaderboards(db) -> Leaderboards:
+    now = datetime.utcnow()
+    boards = Leaderboards(0.0, float(MIN_PRIOR_VOTES), now)
+    for movie in db.query(Movie).yield_per(1000):
+        boards._store(movie)
+    for movie_id, rating_sum, rating_count in db.query(
+        MovieRatingStats.movie_id, MovieRatingStats.rating_sum, MovieRatingStats.rating_count
+    ):
+        record = boards._movies.get(movie_id)
+        if record is not None:
+            record["rating_sum"] = float(rating_sum or 0)
+            record["rating_count"] = int(rating_count or 0)
+
+    # Scores are computed once and sorted in bulk; per-movie inserts are for incremental writes.
+    boards.prior_mean, boards.prior_votes = _prior(list(boards._movies.values()))
+    weighted = {movie_id: boards._weighted(record) for movie_id, record in boards._movies.items()}
+    boards._top.load({movie_id: score for movie_id, score in weighted.items() if score is not None})
+
+    cutoff = now - TRENDING_WINDOW
+    rated_at = func.coalesce(Rating.updated_at, Rating.created_at)
+    events = [
+        ("rating", db.query(Rating.movie_id, rated_at).filter(rated_at >= cutoff)),
+        ("favorite", db.query(Favorite.movie_id, Favorite.created_at).filter(Favorite.created_at >= cutoff)),
+    ]
+    trending: dict[int, float] = {}
+    for kind, rows in events:
+        for movie_id, at in rows:
+            if movie_id in boards._movies and at is not None:
+                trending[movie_id] = trending.get(movie_id, 0.0) + boards._growth(kind, at)
+    boards._trending.load(trending)
+    return boards
+
+
+leaderboards = EngineLocal(build_leaderboards, ttl=LEADERBOARD_TTL_SECONDS)
@@ -1,11 +1,61 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
-from database import engine
+from sqlalchemy.exc import SQLAlchemyError
+from config import DEBUG, SLOW_QUERY_MS
+from database import SessionLocal, add_missing_columns, apply_schema, async_engine, async_read_engine, engine, read_engine
+from metrics import MetricsMiddleware, instrument_engine
+from migrations import migrate
+from query_stats import QueryStatsMiddleware
 from models import Base
-from routers import chatbot, movies, ratings, auth, external, contact, watchlist, health, genres, people, homepage
+from profiling import ProfilerMiddleware
+from rating_stats import ensure_rating_stats
+from search import ensure_search_index
+from slow_queries import SlowQueryMiddleware, install as install_slow_query_log
+from suggest import suggest_indexes
+from routers import chatbot, movies, ratings, auth, external, contact, watchlist, health, genres, people, homepage, me, leaderboards, metrics
 
 Base.metadata.create_all(bind=engine)
+add_missing_columns(engine, Base.metadata)
+try:
+    migrate(engine)
+except SQLAlchemyError:
+    # Legacy layouts without the indexed columns; ``python migrations.py --status`` shows what is pending.
+    pass
+ensure_search_index(engine)
+ensure_rating_stats(engine)
+instrument_engine(engine, "primary")
+if read_engine is not None:
+    instrument_engine(read_engine, "replica")
+if SLOW_QUERY_MS > 0:
+    install_slow_query_log(
+        engine,
+        read_engine,
+        async_engine.sync_engine if async_engine is not None else None,
+        async_read_engine.sync_engine if async_read_engine is not None else None,
+    )
 
-app = FastAPI(title="Movie Review Backend")
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    try:
+        with SessionLocal() as db:
+            apply_schema(db)
+            suggest_indexes.get(db)
+    except SQLAlchemyError:
+        # Database not ready yet; the index is built on the first /movies/suggest call.
+        pass
+    yield
+
+
+app = FastAPI(title="Movie Review Backend", lifespan=lifespan)
+app.add_middleware(MetricsMiddleware)
+if SLOW_QUERY_MS > 0:
+    app.add_middleware(SlowQueryMiddleware)
+if DEBUG:
+    app.add_middleware(QueryStatsMiddleware)
+# Outermost, so a profile covers the other middleware too.
+app.add_middleware(ProfilerMiddleware)
 
 app.include_router(auth.router)
 app.include_router(movies.router)
@@ -18,3 +68,6 @@ app.include_router(health.router)
 app.include_router(genres.router)
 app.include_router(people.router)
 app.include_router(homepage.router)
+app.include_router(me.router)
+app.include_router(leaderboards.router)
+app.include_router(metrics.router)
@@ -0,0 +1,250 @@
+"""In-process request, pool and upstream metrics rendered in the Prometheus text format.
+
+Values are per worker process; scrape each worker (or run one) to see the whole picture.
+"""
+import threading
+import time
+from contextlib import contextmanager
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+UPSTREAM_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 15.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._lock = threading.Lock()
+        self._values: dict[tuple[str, ...], object] = {}
+
+    def header(self) -> list[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> list[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return self.header() + [f"{self.name}{_labels(self.labelnames, k)} {_number(v)}" for k, v in items]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = (), collect=None):
+        super().__init__(name, documentation, labelnames)
+        # ``collect()`` returns {label values: value} at scrape time, for values owned elsewhere.
+        self._collect = collect
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, *labels: str, amount: float = 1) -> None:
+        self.inc(*labels, amount=-amount)
+
+    def render(self) -> list[str]:
+        if self._collect is not None:
+            items = sorted(self._collect().items())
+        else:
+            with self._lock:
+                items = sorted(self._values.items())
+        return self.header() + [f"{self.name}{_labels(self.labelnames, k)} {_number(v)}" for k, v in items]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = (), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets) + (float("inf"),)
+
+    def observe(self, value: float, *labels: str) -> None:
+        with self._lock:
+            series = self._values.get(labels)
+            if series is None:
+                series = self._values[labels] = [[0] * len(self.buckets), 0.0, 0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][index] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> list[str]:
+        with self._lock:
+            items = sorted((k, (list(v[0]), v[1], v[2])) for k, v in self._values.items())
+        lines = self.header()
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket in zip(self.buckets, counts):
+                cumulative += bucket
+                le = f'le="{_number(bound)}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+REGISTRY: list[_Metric] = []
+
+
+def register(metric):
+    REGISTRY.append(metric)
+    return metric
+
+
+def render() -> str:
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+http_request_duration = register(
+    Histogram("http_request_duration_seconds", "Time to serve a request, by route template.", ("method", "route"))
+)
+http_responses = register(Counter("http_responses_total", "Responses sent, by route and status.", ("method", "route", "status")))
+http_in_flight = register(Gauge("http_requests_in_flight", "Requests currently being served."))
+upstream_duration = register(
+    Histogram(
+        "upstream_request_duration_seconds",
+        "Time spent in calls to third-party APIs.",
+        ("upstream", "outcome"),
+        buckets=UPSTREAM_BUCKETS,
+    )
+)
+pool_checkout_duration = register(
+    Histogram(
+        "db_pool_checkout_seconds",
+        "Time to get a connection from the pool, including waiting for one and opening it.",
+        ("pool",),
+    )
+)
+
+# name -> Engine, filled by ``instrument_engine``.
+_pools: dict[str, object] = {}
+
+
+def _pool_values(read) -> dict[tuple[str, ...], float]:
+    values = {}
+    for name, engine in _pools.items():
+        value = getattr(engine.pool, read, None)
+        if value is not None:
+            values[(name,)] = value()
+    return values
+
+
+register(Gauge("db_pool_size", "Configured pool size.", ("pool",), collect=lambda: _pool_values("size")))
+register(
+    Gauge(
+        "db_pool_checked_out", "Connections currently checked out.", ("pool",), collect=lambda: _pool_values("checkedout")
+    )
+)
+register(
+    Gauge(
+        "db_pool_overflow",
+        "Connections open beyond the pool size.",
+        ("pool",),
+        collect=lambda: {key: max(value, 0) for key, value in _pool_values("overflow").items()},
+    )
+)
+
+
+def instrument_engine(engine, name: str) -> None:
+    """Report ``engine``'s pool gauges and time its connection checkouts under ``name``."""
+    if name in _pools:
+        return
+    _pools[name] = engine
+    raw_connection = engine.raw_connection
+
+    # Every Connection checks out through ``raw_connection``; the pool itself is replaced on dispose().
+    def timed_raw_connection():
+        started = time.perf_counter()
+        try:
+            return raw_connection()
+        finally:
+            pool_checkout_duration.observe(time.perf_counter() - started, name)
+
+    engine.raw_connection = timed_raw_connection
+
+
+class UpstreamCall:
+    __slots__ = ("status",)
+
+    def __init__(self):
+        self.status = None
+
+
+@contextmanager
+def upstream_call(upstream: str):
+    """Time a third-party call; set ``.status`` on the yielded object to the response status."""
+    call = UpstreamCall()
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+        yield call
+        outcome = str(call.status) if call.status is not None else "ok"
+    finally:
+        upstream_duration.observe(time.perf_counter() - started, upstream, outcome)
+
+
+class MetricsMiddleware:
+    """Records latency, status and in-flight count for every HTTP request.
+
+    Requests are labelled with the matched route template (``/movies/{movie_id}``), so
+    the series stay bounded; anything that matched no route is reported as ``unmatched``.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        http_in_flight.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            http_in_flight.dec()
+            route = scope.get("route")
+            template = getattr(route, "path", None) or "unmatched"
+            method = scope["method"]
+            http_request_duration.observe(time.perf_counter() - started, method, template)
+            http_responses.inc(method, template, str(status))
@@ -0,0 +1,77 @@
+import argparse
+
+from sqlalchemy import inspect, select
+from sqlalchemy.exc import IntegrityError
+
+from database import engine
+from models import SchemaMigration
+
+# Applied in order on top of ``create_all``, which only builds tables (and their indexes) that
+# do not exist yet. Append new entries; never edit one that has shipped. Statements must be
+# idempotent so a database created from the current models simply records them as applied.
+MIGRATIONS = [
+    (
+        1,
+        "secondary indexes for foreign-key and case-insensitive lookups",
+        [
+            "CREATE INDEX IF NOT EXISTS ix_movie_genres_genre_id ON movie_genres (genre_id)",
+            "CREATE INDEX IF NOT EXISTS ix_movie_cast_person_id ON movie_cast (person_id)",
+            "CREATE INDEX IF NOT EXISTS ix_ratings_movie_id ON ratings (movie_id)",
+            "CREATE INDEX IF NOT EXISTS ix_favorites_movie_id ON favorites (movie_id)",
+            "CREATE INDEX IF NOT EXISTS ix_genres_name_lower ON genres (lower(name))",
+            "CREATE INDEX IF NOT EXISTS ix_persons_full_name_lower ON persons (lower(full_name))",
+            "CREATE INDEX IF NOT EXISTS ix_movies_title_lower ON movies (lower(title))",
+        ],
+    ),
+    (
+        2,
+        "title listing keyset index",
+        ["CREATE INDEX IF NOT EXISTS ix_movies_title_id ON movies (title, movie_id)"],
+    ),
+]
+
+
+def applied_versions(bind) -> set[int]:
+    if not inspect(bind).has_table(SchemaMigration.__tablename__):
+        return set()
+    with bind.connect() as conn:
+        return set(conn.execute(select(SchemaMigration.version)).scalars())
+
+
+def migrate(bind, target: int | None = None) -> list[int]:
+    """Apply pending migrations up to ``target`` (all by default), each in its own transaction."""
+    SchemaMigration.__table__.create(bind, checkfirst=True)
+    done = applied_versions(bind)
+    applied = []
+    for version, name, statements in MIGRATIONS:
+        if version in done or (target is not None and version > target):
+            continue
+        try:
+            with bind.begin() as conn:
+                for statement in statements:
+                    conn.exec_driver_sql(statement)
+                conn.execute(SchemaMigration.__table__.insert().values(version=version, name=name))
+        except IntegrityError:
+            # Another worker recorded it first; its statements are idempotent.
+            continue
+        applied.append(version)
+    return applied
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Apply versioned schema migrations.")
+    parser.add_argument("--status", action="store_true", help="List migrations and whether they are applied.")
+    parser.add_argument("--target", type=int, help="Stop after this version.")
+    args = parser.parse_args()
+
+    if args.status:
+        done = applied_versions(engine)
+        for version, name, _ in MIGRATIONS:
+            print(f"{version:>4}  {'applied' if version in done else 'pending':<8} {name}")
+        return
+    applied = migrate(engine, args.target)
+    print(f"Applied {len(applied)} migration(s){': ' + ', '.join(map(str, applied)) if applied else '.'}")
+
+
+if __name__ == "__main__":
+    main()
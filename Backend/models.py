@@ -1,8 +1,15 @@
 from enum import Enum as PyEnum
 
 from sqlalchemy import Column, Date, DateTime, Enum, ForeignKey, Integer, JSON, Numeric, String, Text, func
-from sqlalchemy import PrimaryKeyConstraint
+from sqlalchemy import Index, PrimaryKeyConstraint
+from sqlalchemy.orm import validates
 from database import Base
+from search import fold_text
+
+
+def search_key_column(length: int):
+    # Folded (lower-case, accent-free) copy of the display name, kept in sync by @validates.
+    return Column(String(length), index=True)
 
 
 class UserRole(str, PyEnum):
@@ -43,12 +50,34 @@ class Movie(Base):
     cover_url = Column(String(500))
     trailer_url = Column(String(500))
     created_at = Column(DateTime, server_default=func.now())
+    search_key = search_key_column(255)
+    # Bumped by every write that changes the public detail payload (movie, genres, cast).
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+
+    __table_args__ = (
+        Index("ix_movies_title_lower", func.lower(title)),
+        # The (title, movie_id) keyset of the title listing.
+        Index("ix_movies_title_id", title, movie_id),
+    )
+
+    @validates("title")
+    def _sync_search_key(self, _key, value):
+        self.search_key = fold_text(value) if value else None
+        return value
 
 
 class Genre(Base):
     __tablename__ = "genres"
     genre_id = Column(Integer, primary_key=True, autoincrement=True)
     name = Column(String(50), nullable=False)
+    search_key = search_key_column(50)
+
+    __table_args__ = (Index("ix_genres_name_lower", func.lower(name)),)
+
+    @validates("name")
+    def _sync_search_key(self, _key, value):
+        self.search_key = fold_text(value) if value else None
+        return value
 
 
 class Person(Base):
@@ -58,6 +87,14 @@ class Person(Base):
     birth_date = Column(Date)
     avatar_url = Column(String(500))
     bio = Column(Text)
+    search_key = search_key_column(100)
+
+    __table_args__ = (Index("ix_persons_full_name_lower", func.lower(full_name)),)
+
+    @validates("full_name")
+    def _sync_search_key(self, _key, value):
+        self.search_key = fold_text(value) if value else None
+        return value
 
 
 class MovieGenre(Base):
@@ -65,7 +102,10 @@ class MovieGenre(Base):
     movie_id = Column(Integer, ForeignKey("movies.movie_id"), nullable=False)
     genre_id = Column(Integer, ForeignKey("genres.genre_id"), nullable=False)
 
-    __table_args__ = (PrimaryKeyConstraint("movie_id", "genre_id"),)
+    __table_args__ = (
+        PrimaryKeyConstraint("movie_id", "genre_id"),
+        Index("ix_movie_genres_genre_id", "genre_id"),
+    )
 
 
 class MovieCast(Base):
@@ -75,7 +115,10 @@ class MovieCast(Base):
     role = Column(Enum(CastRole, name="cast_role"), nullable=False)
     character_name = Column(String(100))
 
-    __table_args__ = (PrimaryKeyConstraint("movie_id", "person_id", "role"),)
+    __table_args__ = (
+        PrimaryKeyConstraint("movie_id", "person_id", "role"),
+        Index("ix_movie_cast_person_id", "person_id"),
+    )
 
 
 class Favorite(Base):
@@ -84,7 +127,10 @@ class Favorite(Base):
     movie_id = Column(Integer, ForeignKey("movies.movie_id"), nullable=False)
     created_at = Column(DateTime, server_default=func.now())
 
-    __table_args__ = (PrimaryKeyConstraint("user_id", "movie_id"),)
+    __table_args__ = (
+        PrimaryKeyConstraint("user_id", "movie_id"),
+        Index("ix_favorites_movie_id", "movie_id"),
+    )
 
 
 class Rating(Base):
@@ -95,7 +141,26 @@ class Rating(Base):
     created_at = Column(DateTime, server_default=func.now())
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
 
-    __table_args__ = (PrimaryKeyConstraint("user_id", "movie_id"),)
+    __table_args__ = (
+        PrimaryKeyConstraint("user_id", "movie_id"),
+        Index("ix_ratings_movie_id", "movie_id"),
+    )
+
+
+class MovieRatingStats(Base):
+    # Running SUM/COUNT of ratings.rating per movie, maintained by rate_movie; see rating_stats.py.
+    __tablename__ = "movie_rating_stats"
+    movie_id = Column(Integer, ForeignKey("movies.movie_id"), primary_key=True)
+    rating_sum = Column(Numeric(12, 1), nullable=False, default=0, server_default="0")
+    rating_count = Column(Integer, nullable=False, default=0, server_default="0")
+
+
+class SchemaMigration(Base):
+    # One row per applied entry of ``migrations.MIGRATIONS``.
+    __tablename__ = "schema_migrations"
+    version = Column(Integer, primary_key=True, autoincrement=False)
+    name = Column(String(200), nullable=False)
+    applied_at = Column(DateTime, server_default=func.now())
 
 
 class HomepageSettings(Base):
@@ -0,0 +1,66 @@
+import threading
+import time
+
+from cache import invalidate_on_commit
+from models import Movie
+
+# How long a worker trusts its remembered ETag before re-reading the version from the database.
+# Writes made by this process invalidate immediately; this only bounds staleness across workers.
+ETAG_TTL_SECONDS = 30.0
+
+_lock = threading.Lock()
+_etags: dict[int, tuple[str, float]] = {}
+
+
+def movie_etag(movie_id: int, version: int) -> str:
+    return f'"movie-{movie_id}-v{version}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [value.strip() for value in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+def cached_etag(movie_id: int) -> str | None:
+    entry = _etags.get(movie_id)
+    if entry is None:
+        return None
+    etag, expires_at = entry
+    if expires_at < time.monotonic():
+        with _lock:
+            _etags.pop(movie_id, None)
+        return None
+    return etag
+
+
+def remember_etag(movie_id: int, etag: str) -> None:
+    with _lock:
+        _etags[movie_id] = (etag, time.monotonic() + ETAG_TTL_SECONDS)
+
+
+def forget_etags(movie_ids=None) -> None:
+    with _lock:
+        if movie_ids is None:
+            _etags.clear()
+        else:
+            for movie_id in movie_ids:
+                _etags.pop(movie_id, None)
+
+
+def bump_versions(db, criterion, movie_ids=None) -> None:
+    """Increment ``Movie.version`` for movies matching ``criterion`` and drop their ETags.
+
+    The catalog cache entries of those movies are invalidated when ``db`` commits. Pass
+    ``movie_ids`` when the affected movies are already known to skip looking them up.
+    """
+    if movie_ids is None:
+        movie_ids = [movie_id for (movie_id,) in db.query(Movie.movie_id).filter(criterion)]
+    if not movie_ids:
+        return
+    db.query(Movie).filter(Movie.movie_id.in_(movie_ids)).update(
+        {Movie.version: Movie.version + 1}, synchronize_session=False
+    )
+    forget_etags(movie_ids)
+    invalidate_on_commit(db, *(f"movie:{movie_id}" for movie_id in movie_ids))
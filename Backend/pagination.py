@@ -0,0 +1,34 @@
+import base64
+import json
+
+from fastapi import HTTPException
+from sqlalchemy import tuple_
+
+
+def encode_cursor(*values) -> str:
+    raw = json.dumps(list(values), separators=(",", ":"), default=str)
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _matches(values: list, shape: tuple) -> bool:
+    # bool is an int subclass; a cursor never carries one.
+    return len(values) == len(shape) and all(
+        isinstance(value, kind) and not isinstance(value, bool) for value, kind in zip(values, shape)
+    )
+
+
+def decode_cursor(cursor: str, *shapes: tuple) -> list:
+    """Decode ``cursor``; 400 unless its values match one of ``shapes`` (tuples of types)."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, UnicodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(values, list) or not any(_matches(values, shape) for shape in shapes):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
+
+
+def keyset_after(columns, values):
+    """Filter for rows strictly after ``values`` in ascending ``columns`` order."""
+    return tuple_(*columns) > tuple_(*values)
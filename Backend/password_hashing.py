@@ -0,0 +1,65 @@
+import asyncio
+import hashlib
+import hmac
+import secrets
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from config import PASSWORD_HASH_QUEUE, PASSWORD_HASH_WORKERS
+
+PBKDF2_ROUNDS = 120_000
+
+
+def hash_password(password: str) -> str:
+    salt = secrets.token_hex(16)
+    rounds = PBKDF2_ROUNDS
+    digest = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt.encode("utf-8"), rounds)
+    return f"pbkdf2_sha256${rounds}${salt}${digest.hex()}"
+
+
+def verify_password(password: str, stored: str) -> bool:
+    try:
+        algo, rounds_str, salt, hash_hex = stored.split("$", 3)
+        if algo != "pbkdf2_sha256":
+            return False
+        rounds = int(rounds_str)
+        digest = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt.encode("utf-8"), rounds)
+        return hmac.compare_digest(digest.hex(), hash_hex)
+    except Exception:
+        return False
+
+
+class HasherBusy(Exception):
+    """Raised instead of queueing when every worker and queue slot is taken."""
+
+
+class PasswordHasher:
+    """Bounded executor for password hashing; callers await the result without holding a thread.
+
+    OpenSSL's PBKDF2 releases the GIL, so a small dedicated thread pool hashes in parallel
+    without borrowing threads from Starlette's shared pool that serves the sync catalog endpoints.
+    """
+
+    def __init__(self, workers: int = PASSWORD_HASH_WORKERS, queue_limit: int = PASSWORD_HASH_QUEUE):
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+        self._slots = threading.BoundedSemaphore(workers + queue_limit)
+
+    async def _run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            raise HasherBusy()
+        try:
+            future = self._executor.submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _future: self._slots.release())
+        return await asyncio.wrap_future(future)
+
+    async def hash(self, password: str) -> str:
+        return await self._run(hash_password, password)
+
+    async def verify(self, password: str, stored: str) -> bool:
+        return await self._run(verify_password, password, stored)
+
+
+password_hasher = PasswordHasher()
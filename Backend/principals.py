@@ -0,0 +1,124 @@
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from jose import jwt
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session
+
+from config import JWT_ALGORITHM, JWT_EXPIRE_MINUTES, JWT_SECRET, PRINCIPAL_TTL_SECONDS
+from database import EngineLocal, on_primary
+from models import User, UserRole
+
+MAX_CACHED_PRINCIPALS = 10_000
+
+
+def issue_token(user: User) -> str:
+    now = datetime.utcnow()
+    role = user.role or UserRole.user
+    claims = {
+        "user_id": user.user_id,
+        "role": UserRole(role).value,
+        "iat": now,
+        "exp": now + timedelta(minutes=JWT_EXPIRE_MINUTES),
+    }
+    return jwt.encode(claims, JWT_SECRET, algorithm=JWT_ALGORITHM)
+
+
+def _read_role(db, user_id: int) -> UserRole | None:
+    return db.execute(select(User.role).where(User.user_id == user_id)).scalar()
+
+
+class PrincipalCache:
+    """Users' roles, trusted for ``PRINCIPAL_TTL_SECONDS`` after being read or signed.
+
+    A token's ``role`` claim seeds the cache only while the token is younger than the TTL, so a
+    role change (or a revocation) is honoured by every worker within that window.
+    """
+
+    def __init__(self, ttl: float = PRINCIPAL_TTL_SECONDS):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._roles: OrderedDict[int, tuple[UserRole | None, float]] = OrderedDict()
+        self._revoked: dict[int, float] = {}
+
+    def _remember(self, user_id: int, role: UserRole | None, expires_at: float) -> None:
+        self._roles[user_id] = (role, expires_at)
+        self._roles.move_to_end(user_id)
+        while len(self._roles) > MAX_CACHED_PRINCIPALS:
+            self._roles.popitem(last=False)
+
+    def _from_claims(self, user_id: int, claims: dict) -> UserRole | None:
+        issued_at = claims.get("iat")
+        if claims.get("role") not in UserRole.__members__ or not isinstance(issued_at, (int, float)):
+            return None
+        if issued_at <= self._revoked.get(user_id, 0.0):
+            return None
+        age = time.time() - issued_at
+        if not 0 <= age < self.ttl:
+            return None
+        role = UserRole(claims["role"])
+        self._remember(user_id, role, time.monotonic() + self.ttl - age)
+        return role
+
+    def role(self, db, user_id: int, claims: dict | None = None) -> UserRole | None:
+        """The user's role, or None if the user does not exist."""
+        with self._lock:
+            cached = self._roles.get(user_id)
+            if cached is not None and cached[1] > time.monotonic():
+                self._roles.move_to_end(user_id)
+                return cached[0]
+            role = self._from_claims(user_id, claims or {})
+            if role is not None:
+                return role
+        # A replica may not have the role change behind a revocation yet.
+        role = on_primary(db, _read_role, user_id)
+        with self._lock:
+            self._remember(user_id, role, time.monotonic() + self.ttl)
+        return role
+
+    def revoke(self, user_id: int) -> None:
+        with self._lock:
+            self._roles.pop(user_id, None)
+            now = time.time()
+            # Tokens signed before an older revocation are past the TTL and never trusted anyway.
+            self._revoked = {uid: at for uid, at in self._revoked.items() if now - at < self.ttl}
+            self._revoked[user_id] = now
+
+
+def revoke_principal(db, user_id: int) -> None:
+    """Re-read the user's role on their next request; call after changing or removing a user."""
+    cache = principal_caches.loaded(db)
+    if cache is not None:
+        cache.revoke(user_id)
+
+
+principal_caches = EngineLocal(lambda _db: PrincipalCache())
+
+
+_PENDING_REVOCATIONS = "principal_pending_revocations"
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_changed_principals(session, _flush_context):
+    # Users whose role was changed or who were deleted through the ORM, by any code path.
+    changed = {user.user_id for user in session.deleted if isinstance(user, User)}
+    changed.update(
+        user.user_id
+        for user in session.dirty
+        if isinstance(user, User) and inspect(user).attrs.role.history.has_changes()
+    )
+    if changed:
+        session.info.setdefault(_PENDING_REVOCATIONS, set()).update(changed)
+
+
+@event.listens_for(Session, "after_commit")
+def _revoke_changed_principals(session):
+    for user_id in session.info.pop(_PENDING_REVOCATIONS, ()):
+        revoke_principal(session, user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_changed_principals(session):
+    session.info.pop(_PENDING_REVOCATIONS, None)
@@ -0,0 +1,265 @@
+"""Sample one request's stacks on demand and keep them as collapsed stacks for flamegraphs.
+
+An admin sends ``X-Profile: 1`` (or ``?_profile=1``); the response carries ``X-Profile-Id`` and
+``GET /health/profiles/{id}`` returns ``frame;frame;frame count`` lines, the input of
+``flamegraph.pl`` and speedscope. Counts are in sampling intervals, so widths are wall time even
+when the GIL delays a sample. Requests without the flag only pay for the header check.
+"""
+import asyncio
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+from contextvars import Context, ContextVar
+from datetime import datetime, timezone
+from functools import lru_cache
+from urllib.parse import parse_qs
+
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import MutableHeaders
+
+from config import PROFILE_INTERVAL_MS, PROFILE_KEEP
+from database import SessionLocal, apply_schema
+from deps import get_token_claims
+from models import UserRole
+from principals import principal_caches
+
+PROFILE_HEADER = "x-profile"
+PROFILE_QUERY = "_profile"
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# The profile of the request being served. Thread-pool calls run in a copy of the request's
+# context, which is how the sampler tells this request's worker threads from everyone else's.
+_active_profile: ContextVar["Profile | None"] = ContextVar("active_profile", default=None)
+
+
+class Profile:
+    def __init__(self, method: str, path: str, interval: float):
+        self.id = uuid.uuid4().hex[:12]
+        self.method = method
+        self.path = path
+        self.interval = interval
+        self.started_at = datetime.now(timezone.utc).isoformat()
+        self.duration_ms = None
+        self.status = None
+        self.taken = 0
+        # stack -> sampling intervals spent in it
+        self.samples: Counter[str] = Counter()
+
+    def summary(self) -> dict:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "status": self.status,
+            "started_at": self.started_at,
+            "duration_ms": self.duration_ms,
+            "interval_ms": self.interval * 1000,
+            "samples": self.taken,
+        }
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+
+class ProfileStore:
+    """The last ``keep`` finished profiles of this worker, oldest evicted first."""
+
+    def __init__(self, keep: int = PROFILE_KEEP):
+        self.keep = keep
+        self._lock = threading.Lock()
+        self._profiles: OrderedDict[str, Profile] = OrderedDict()
+
+    def add(self, profile: Profile) -> None:
+        with self._lock:
+            self._profiles[profile.id] = profile
+            while len(self._profiles) > self.keep:
+                self._profiles.popitem(last=False)
+
+    def get(self, profile_id: str) -> Profile | None:
+        with self._lock:
+            return self._profiles.get(profile_id)
+
+    def summaries(self) -> list[dict]:
+        with self._lock:
+            profiles = list(self._profiles.values())
+        return [profile.summary() for profile in reversed(profiles)]
+
+
+profile_store = ProfileStore()
+
+
+@lru_cache(maxsize=4096)
+def _short_path(filename: str) -> str:
+    if filename.startswith(BASE_DIR + os.sep):
+        return os.path.relpath(filename, BASE_DIR)
+    marker = f"site-packages{os.sep}"
+    if marker in filename:
+        return filename.split(marker, 1)[1]
+    return os.path.basename(filename)
+
+
+def _label(code) -> str:
+    # ``co_qualname`` is 3.11+; older interpreters only know the bare function name.
+    name = getattr(code, "co_qualname", code.co_name)
+    return f"{name} ({_short_path(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _frames(frame) -> list:
+    """``frame`` and its callers, outermost first."""
+    frames = []
+    while frame is not None:
+        frames.append(frame)
+        frame = frame.f_back
+    frames.reverse()
+    return frames
+
+
+def _worker_stack(frames: list, profile: Profile) -> list[str] | None:
+    # anyio's worker loop runs each call as ``context.run(func)`` with a copy of the caller's context.
+    for index, frame in enumerate(frames):
+        code = frame.f_code
+        if code.co_name == "run" and "context" in code.co_varnames:
+            context = frame.f_locals.get("context")
+            if isinstance(context, Context) and context.get(_active_profile) is profile:
+                return [_label(f.f_code) for f in frames[index + 1:]]
+    return None
+
+
+def _await_chain(coro, root) -> tuple[list[str], str]:
+    """The suspended coroutines from ``root`` inward, and what the innermost one awaits."""
+    labels = []
+    started = False
+    awaiting = coro
+    while awaiting is not None:
+        frame = getattr(awaiting, "cr_frame", None) or getattr(awaiting, "gi_frame", None)
+        if frame is None:
+            break
+        started = started or frame is root
+        if started:
+            labels.append(_label(frame.f_code))
+        awaiting = getattr(awaiting, "cr_await", None) or getattr(awaiting, "gi_yieldfrom", None)
+    return (labels, f"<awaiting {type(awaiting).__name__}>") if started else ([], "<awaiting>")
+
+
+class Sampler(threading.Thread):
+    """Samples the request every ``profile.interval`` seconds until stopped.
+
+    While the request's coroutine runs, its frames are read off the event loop thread. While it
+    is suspended, its await chain is recorded, followed by the stack of any worker thread running
+    code on its behalf, or by what it is waiting for.
+    """
+
+    def __init__(self, profile: Profile, root, task):
+        super().__init__(name=f"profiler-{profile.id}", daemon=True)
+        self.profile = profile
+        self.root = root
+        self.task = task
+        self.loop_thread = threading.get_ident()
+        self._stopped = threading.Event()
+
+    def run(self) -> None:
+        last = time.perf_counter()
+        while not self._stopped.wait(self.profile.interval):
+            now = time.perf_counter()
+            # A CPU-bound request holds the GIL for up to the switch interval (5 ms) at a time.
+            self.sample(max(1, round((now - last) / self.profile.interval)))
+            last = now
+
+    def stop(self) -> None:
+        """Ask the thread to stop; ``join()`` waits out the sample it may be taking."""
+        self._stopped.set()
+
+    def sample(self, weight: int = 1) -> None:
+        self.profile.taken += 1
+        current = sys._current_frames()
+        loop_frames = _frames(current.pop(self.loop_thread, None))
+        current.pop(threading.get_ident(), None)
+        for index, frame in enumerate(loop_frames):
+            if frame is self.root:
+                self.profile.samples[";".join(_label(f.f_code) for f in loop_frames[index:])] += weight
+                return
+        chain, awaiting = _await_chain(self.task.get_coro(), self.root)
+        if not chain:
+            return
+        workers = [stack for frame in current.values() if (stack := _worker_stack(_frames(frame), self.profile))]
+        for stack in workers or [[awaiting]]:
+            self.profile.samples[";".join(chain + stack)] += weight
+
+
+def _requested(scope) -> bool:
+    for name, value in scope["headers"]:
+        if name == PROFILE_HEADER.encode() and value.strip() not in (b"", b"0"):
+            return True
+    query = scope.get("query_string", b"")
+    if PROFILE_QUERY.encode() in query:
+        values = parse_qs(query.decode("latin-1")).get(PROFILE_QUERY, [])
+        return any(value not in ("", "0") for value in values)
+    return False
+
+
+def _is_admin(authorization: str | None) -> bool:
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return False
+    try:
+        claims = get_token_claims(HTTPAuthorizationCredentials(scheme=scheme, credentials=token))
+    except HTTPException:
+        return False
+    with SessionLocal() as db:
+        apply_schema(db)
+        return principal_caches.get(db).role(db, claims["user_id"], claims) == UserRole.admin
+
+
+class ProfilerMiddleware:
+    """Profiles requests flagged with ``X-Profile`` / ``?_profile=1`` by an admin.
+
+    Anyone else's flag is ignored and the request is served normally, without ``X-Profile-Id``.
+    """
+
+    def __init__(self, app, interval_ms: float = PROFILE_INTERVAL_MS, store: ProfileStore = profile_store):
+        self.app = app
+        self.interval = interval_ms / 1000
+        self.store = store
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not _requested(scope):
+            await self.app(scope, receive, send)
+            return
+        authorization = dict(scope["headers"]).get(b"authorization", b"").decode("latin-1")
+        if not await run_in_threadpool(_is_admin, authorization):
+            await self.app(scope, receive, send)
+            return
+
+        profile = Profile(scope["method"], scope["path"], self.interval)
+        sampler = Sampler(profile, sys._getframe(), asyncio.current_task())
+        started = time.perf_counter()
+
+        async def finish():
+            if profile.duration_ms is None:
+                profile.duration_ms = round((time.perf_counter() - started) * 1000, 1)
+                sampler.stop()
+                # The last sample can take a while on a deep stack; don't hold up the event loop.
+                await run_in_threadpool(sampler.join)
+                self.store.add(profile)
+
+        async def send_with_profile(message):
+            if message["type"] == "http.response.start":
+                profile.status = message["status"]
+                MutableHeaders(scope=message)["X-Profile-Id"] = profile.id
+            elif message["type"] == "http.response.body" and not message.get("more_body", False):
+                # Stored before the last byte goes out, so the id is readable once the client has it.
+                await finish()
+            await send(message)
+
+        token = _active_profile.set(profile)
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_with_profile)
+        finally:
+            _active_profile.reset(token)
+            await finish()
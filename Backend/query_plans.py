@@ -0,0 +1,194 @@
+"""EXPLAIN the routers' indexed lookups and fail when one scans a large table.
+
+Run from ``Backend/`` against the configured database::
+
+    python query_plans.py --min-rows 10000
+
+A sequential scan (Postgres ``Seq Scan``, SQLite ``SCAN``) only counts as a regression when the
+scanned table holds at least ``--min-rows`` rows; planners rightly scan small tables.
+"""
+import argparse
+import json
+import re
+
+from fastapi import HTTPException
+from sqlalchemy import event, inspect, select, text
+from sqlalchemy.sql import Executable
+
+import import_movies_csv
+from cards import load_movie_cards
+from database import PINNED_TO_PRIMARY, SessionLocal, apply_schema, canonical_engine
+from models import Movie
+from pagination import encode_cursor
+from rating_stats import load_rating_summaries
+from routers import auth, chatbot, genres, movies, people, ratings, watchlist
+from search import ensure_search_index
+from user_overlay import _load_overlay_rows
+
+SAMPLE_ID = 1
+SAMPLE_IDS = [1, 2, 3]
+SAMPLE_EMAIL = "user@example.com"
+# A later page of the unfiltered title listing, which must be a range of ix_movies_title_id.
+TITLE_PAGE_CURSOR = encode_cursor("Inception", SAMPLE_ID)
+
+
+def _rating(db):
+    try:
+        ratings.get_average_rating(SAMPLE_ID, user_id=SAMPLE_ID, db=db)
+    except HTTPException:
+        # No such movie: the own-rating lookup is skipped, the aggregate lookups still ran.
+        pass
+
+
+# (label, run) for every lookup a router or import_movies_csv.py expects an index for. ``run(db)``
+# calls the code that issues the queries, which are recorded as they run; write paths instead
+# return the statements their router builds, which are explained without being executed.
+# The in-memory index builders scan by design and are not listed.
+HOT_QUERIES = [
+    ("auth: user by email", lambda db: auth._find_user(db, SAMPLE_EMAIL)),
+    ("auth: usernames by prefix", lambda db: auth.build_username(db, SAMPLE_EMAIL)),
+    ("genres: by name", lambda db: genres._find_genre(db, "Drama")),
+    ("genres: search", lambda db: genres._list_genres(db, "dra")),
+    ("genres: movies in genre", lambda db: [select(Movie.movie_id).where(genres._genre_movies(SAMPLE_ID))]),
+    ("people: by name", lambda db: import_movies_csv.find_person(db, "Christopher Nolan")),
+    ("people: search", lambda db: people._list_people(db, "nolan")),
+    ("people: movies of person", lambda db: [select(Movie.movie_id).where(people._person_movies(SAMPLE_ID))]),
+    ("movies: by title", lambda db: import_movies_csv.find_movies_by_title(db, "Inception")),
+    ("movies: search", lambda db: movies._search_movies(db, "dark knight", 1, 20, None, True)),
+    ("movies: admin list", lambda db: movies.list_movies("dark", 1, 20, None, True, db=db, _admin=None)),
+    ("movies: title page", lambda db: movies.list_movies(None, 1, 20, TITLE_PAGE_CURSOR, False, db=db, _admin=None)),
+    ("movies: detail", lambda db: movies._load_movie_detail(db, SAMPLE_ID)),
+    ("movies: genres", lambda db: movies.list_movie_genres(SAMPLE_ID, db=db, _admin=None)),
+    ("movies: cast", lambda db: movies.list_movie_cast(SAMPLE_ID, db=db, _admin=None)),
+    ("movies: batch cards", lambda db: load_movie_cards(db, SAMPLE_IDS)),
+    ("movies: delete dependents", lambda db: movies._movie_dependents(SAMPLE_ID)),
+    ("chatbot: search", lambda db: chatbot.search_movies(db, "dark knight")),
+    ("ratings: summary", lambda db: load_rating_summaries(db, SAMPLE_IDS, SAMPLE_ID)),
+    ("ratings: movie aggregate and own rating", _rating),
+    ("watchlist: page", lambda db: watchlist.get_watchlist(1, 20, user_id=SAMPLE_ID, db=db)),
+    ("me: overlay", lambda db: _load_overlay_rows(db, SAMPLE_ID, SAMPLE_IDS)),
+]
+EXPLAINABLE = ("select", "with", "update", "delete")
+
+
+def _statements(db, run) -> list[tuple[str, object]]:
+    """``(sql, parameters)`` of every query ``run(db)`` issues, or of the statements it returns."""
+    conn = db.connection()
+    recorded = []
+
+    def record(_conn, _cursor, statement, parameters, _context, executemany):
+        if not executemany and statement.lstrip().lower().startswith(EXPLAINABLE):
+            recorded.append((statement, parameters))
+
+    event.listen(conn, "before_cursor_execute", record)
+    try:
+        returned = run(db)
+    finally:
+        event.remove(conn, "before_cursor_execute", record)
+    if isinstance(returned, list) and returned and all(isinstance(item, Executable) for item in returned):
+        dialect = conn.dialect
+        return [
+            (str(statement.compile(dialect=dialect, compile_kwargs={"literal_binds": True})), None)
+            for statement in returned
+        ]
+    return recorded
+
+
+def _explain(db, prefix: str, sql: str, parameters):
+    conn = db.connection()
+    if parameters is None:
+        return conn.exec_driver_sql(prefix + sql)
+    return conn.exec_driver_sql(prefix + sql, parameters)
+
+
+def _sqlite_scans(db, sql: str, parameters) -> list[str]:
+    scans = []
+    for row in _explain(db, "EXPLAIN QUERY PLAN ", sql, parameters):
+        # "SCAN movies", "SCAN movies USING COVERING INDEX ..."; "SEARCH ..." is an index lookup,
+        # and a full-text MATCH shows up as a scan of the FTS virtual table's own index.
+        match = re.match(r"SCAN (\w+)", row[-1])
+        if match and "VIRTUAL TABLE" not in row[-1]:
+            scans.append(match.group(1))
+    return scans
+
+
+def _postgres_scans(db, sql: str, parameters) -> list[str]:
+    raw = _explain(db, "EXPLAIN (FORMAT JSON) ", sql, parameters).scalar()
+    plans = json.loads(raw) if isinstance(raw, str) else raw
+    scans = []
+    pending = [plans[0]["Plan"]]
+    while pending:
+        node = pending.pop()
+        if node.get("Node Type") == "Seq Scan":
+            scans.append(node["Relation Name"])
+        pending.extend(node.get("Plans", []))
+    return scans
+
+
+def check_query_plans(db, min_rows: int) -> list[dict]:
+    """One entry per hot query: the tables it scans and which of those are over ``min_rows``.
+
+    The queries run in a transaction that is rolled back, with the catalog cache bypassed so
+    every lookup reaches the database.
+    """
+    dialect = db.get_bind().dialect
+    explain = _postgres_scans if dialect.name == "postgresql" else _sqlite_scans
+    # Created up front: on SQLite the DDL cannot run once the session holds the write lock.
+    ensure_search_index(canonical_engine(db))
+    tables = set(inspect(db.get_bind()).get_table_names())
+    sizes: dict[str, int] = {}
+    report = []
+    pinned = db.info.get(PINNED_TO_PRIMARY)
+    db.info[PINNED_TO_PRIMARY] = True
+    try:
+        for label, run in HOT_QUERIES:
+            scans = []
+            for sql, parameters in _statements(db, run):
+                scans.extend(table for table in explain(db, sql, parameters) if table in tables and table not in scans)
+            for table in scans:
+                if table not in sizes:
+                    sizes[table] = db.execute(text(f"SELECT count(*) FROM {table}")).scalar()
+            report.append(
+                {
+                    "query": label,
+                    "scans": scans,
+                    "violations": [table for table in scans if sizes[table] >= min_rows],
+                }
+            )
+    finally:
+        db.rollback()
+        if pinned is None:
+            db.info.pop(PINNED_TO_PRIMARY, None)
+        else:
+            db.info[PINNED_TO_PRIMARY] = pinned
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Fail when a hot router query falls back to a sequential scan.")
+    parser.add_argument(
+        "--min-rows", type=int, default=10_000, help="Only scans of tables at least this large fail (default 10000)."
+    )
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        apply_schema(db)
+        report = check_query_plans(db, args.min_rows)
+    finally:
+        db.close()
+    failed = [entry for entry in report if entry["violations"]]
+    for entry in report:
+        if entry["violations"]:
+            status = f"SEQ SCAN {', '.join(entry['violations'])}"
+        elif entry["scans"]:
+            status = f"ok (small: {', '.join(entry['scans'])})"
+        else:
+            status = "ok"
+        print(f"{entry['query']:<32} {status}")
+    print(f"{len(failed)} of {len(report)} queries scan tables with >= {args.min_rows} rows.")
+    raise SystemExit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+
+
+class QueryStats:
+    __slots__ = ("count", "seconds")
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+
+# Set per request by QueryStatsMiddleware; thread-pool endpoints inherit it with the context.
+_request_stats: ContextVar[QueryStats | None] = ContextVar("request_query_stats", default=None)
+
+
+def _before_cursor_execute(conn, _cursor, _statement, _parameters, _context, _executemany):
+    if _request_stats.get() is not None:
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, _cursor, _statement, _parameters, _context, _executemany):
+    stats = _request_stats.get()
+    started = conn.info.get("query_started")
+    if stats is None or not started:
+        return
+    stats.count += 1
+    stats.seconds += time.perf_counter() - started.pop()
+
+
+def install() -> None:
+    """Time statements on every engine (sync, async and replica); a no-op outside requests."""
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class QueryStatsMiddleware:
+    """Adds ``X-SQL-Count`` and ``X-SQL-Time-Ms`` (statements run before the response started)."""
+
+    def __init__(self, app):
+        self.app = app
+        install()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        stats = QueryStats()
+        token = _request_stats.set(stats)
+
+        async def send_with_stats(message):
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers["X-SQL-Count"] = str(stats.count)
+                headers["X-SQL-Time-Ms"] = f"{stats.seconds * 1000:.1f}"
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_stats)
+        finally:
+            _request_stats.reset(token)
+
+
+@contextmanager
+def assert_max_queries(engine, limit: int):
+    """Fail if more than ``limit`` statements run on ``engine`` inside the block.
+
+    Yields the list of executed statements. The failure message lists them and flags any
+    statement repeated verbatim, which is how an N+1 loop usually shows up.
+    """
+    statements: list[str] = []
+
+    def record(_conn, _cursor, statement, _parameters, _context, _executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    if len(statements) > limit:
+        repeated = [f"  {count}x {sql}" for sql, count in Counter(statements).items() if count > 1]
+        listing = "\n".join(f"  {sql}" for sql in statements)
+        message = f"{len(statements)} queries, budget {limit}:\n{listing}"
+        if repeated:
+            message += "\nrepeated:\n" + "\n".join(repeated)
+        raise AssertionError(message)
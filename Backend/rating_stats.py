@@ -0,0 +1,250 @@
+import argparse
+from decimal import Decimal
+
+from sqlalchemy import case, exists, func, inspect, literal, select, update
+from sqlalchemy.exc import SQLAlchemyError
+
+from database import SessionLocal, upsert_insert
+from models import Movie, MovieRatingStats, Rating
+
+RATING_STEP = Decimal("0.1")
+# Histogram keys are whole stars; a rating counts toward the nearest one (3.5 -> 4).
+HISTOGRAM_STARS = range(6)
+
+
+def normalize_rating(value) -> Decimal:
+    """Round to the precision of ``ratings.rating`` so the running sum matches what is stored."""
+    return Decimal(str(value)).quantize(RATING_STEP)
+
+
+def apply_rating_delta(db, movie_id: int, sum_delta, count_delta: int) -> None:
+    """Adjust the movie's running aggregate inside the caller's transaction."""
+    updated = (
+        db.query(MovieRatingStats)
+        .filter(MovieRatingStats.movie_id == movie_id)
+        .update(
+            {
+                MovieRatingStats.rating_sum: MovieRatingStats.rating_sum + sum_delta,
+                MovieRatingStats.rating_count: MovieRatingStats.rating_count + count_delta,
+            },
+            synchronize_session=False,
+        )
+    )
+    if not updated:
+        db.add(MovieRatingStats(movie_id=movie_id, rating_sum=sum_delta, rating_count=count_delta))
+        db.flush()
+
+
+def average(rating_sum, rating_count) -> float:
+    return float(rating_sum) / rating_count if rating_count else 0.0
+
+
+def upsert_rating(db, user_id: int, movie_id: int, value: Decimal) -> tuple[Decimal, int] | None:
+    """Write the user's rating and return the movie's new ``(rating_sum, rating_count)``.
+
+    Returns None when the movie does not exist. Nothing is committed. Every writer first locks
+    the movie's aggregate row, so the old rating read by the delta update cannot change under it.
+    """
+    insert = upsert_insert(db)
+    if insert is None:
+        return _upsert_rating_orm(db, user_id, movie_id, value)
+
+    stats = MovieRatingStats.__table__
+    ratings = Rating.__table__
+    lock = (
+        insert(stats)
+        .from_select(
+            ["movie_id", "rating_sum", "rating_count"],
+            select(Movie.movie_id, literal(0), literal(0)).where(Movie.movie_id == movie_id),
+        )
+        .on_conflict_do_update(index_elements=[stats.c.movie_id], set_={"rating_count": stats.c.rating_count})
+        .returning(stats.c.movie_id)
+    )
+    if db.execute(lock).first() is None:
+        return None
+
+    mine = (ratings.c.user_id == user_id) & (ratings.c.movie_id == movie_id)
+    previous = select(ratings.c.rating).where(mine).scalar_subquery()
+    totals = db.execute(
+        update(stats)
+        .where(stats.c.movie_id == movie_id)
+        .values(
+            rating_sum=stats.c.rating_sum + value - func.coalesce(previous, 0),
+            rating_count=stats.c.rating_count + case((exists().where(mine), 0), else_=1),
+        )
+        .returning(stats.c.rating_sum, stats.c.rating_count)
+    ).one()
+
+    upsert = insert(ratings).values(user_id=user_id, movie_id=movie_id, rating=value)
+    db.execute(
+        upsert.on_conflict_do_update(
+            index_elements=[ratings.c.user_id, ratings.c.movie_id],
+            set_={"rating": upsert.excluded.rating, "updated_at": func.now()},
+        )
+    )
+    return totals[0], totals[1]
+
+
+def _upsert_rating_orm(db, user_id: int, movie_id: int, value: Decimal) -> tuple[Decimal, int] | None:
+    if db.query(Movie.movie_id).filter(Movie.movie_id == movie_id).first() is None:
+        return None
+    existing = db.query(Rating).filter(Rating.user_id == user_id, Rating.movie_id == movie_id).first()
+    if existing:
+        # Overwrite: only the difference moves the running sum, the count is unchanged.
+        apply_rating_delta(db, movie_id, value - normalize_rating(existing.rating), 0)
+        existing.rating = value
+    else:
+        db.add(Rating(user_id=user_id, movie_id=movie_id, rating=value))
+        apply_rating_delta(db, movie_id, value, 1)
+    db.flush()
+    stats = db.get(MovieRatingStats, movie_id, populate_existing=True)
+    return stats.rating_sum, stats.rating_count
+
+
+def load_rating_summaries(db, movie_ids, user_id: int | None = None) -> dict[int, dict]:
+    """Average, count and star histogram per movie from one grouped query over ``ratings``.
+
+    With ``user_id`` each summary also carries that user's rating (None when unrated).
+    """
+    movie_ids = list(movie_ids)
+    summaries = {}
+    for movie_id in movie_ids:
+        summaries[movie_id] = {
+            "movie_id": movie_id,
+            "average": 0.0,
+            "count": 0,
+            "histogram": {str(star): 0 for star in HISTOGRAM_STARS},
+        }
+        if user_id is not None:
+            summaries[movie_id]["user_rating"] = None
+    if not movie_ids:
+        return summaries
+
+    nearest_star = case(
+        *((Rating.rating < Decimal(star) + Decimal("0.5"), star) for star in HISTOGRAM_STARS[:-1]),
+        else_=HISTOGRAM_STARS[-1],
+    )
+    columns = [Rating.movie_id, Rating.rating, nearest_star.label("star")]
+    if user_id is not None:
+        columns.append(case((Rating.user_id == user_id, Rating.rating)).label("mine"))
+    rated = select(*columns).where(Rating.movie_id.in_(movie_ids)).subquery()
+    grouped = [
+        rated.c.movie_id,
+        rated.c.star,
+        func.count().label("votes"),
+        func.sum(rated.c.rating).label("total"),
+    ]
+    if user_id is not None:
+        grouped.append(func.max(rated.c.mine).label("mine"))
+
+    totals: dict[int, Decimal] = {}
+    for row in db.execute(select(*grouped).group_by(rated.c.movie_id, rated.c.star)):
+        summary = summaries[row.movie_id]
+        summary["histogram"][str(row.star)] = row.votes
+        summary["count"] += row.votes
+        totals[row.movie_id] = totals.get(row.movie_id, 0) + Decimal(str(row.total))
+        if user_id is not None and row.mine is not None:
+            summary["user_rating"] = float(row.mine)
+    for movie_id, total in totals.items():
+        summaries[movie_id]["average"] = average(total, summaries[movie_id]["count"])
+    return summaries
+
+
+def rebuild_rating_stats(db, movie_ids=None) -> int:
+    """Recompute aggregates from ``ratings`` in bulk; returns the number of movies with ratings."""
+    delete = db.query(MovieRatingStats)
+    source = select(
+        Rating.movie_id, func.coalesce(func.sum(Rating.rating), 0), func.count()
+    ).group_by(Rating.movie_id)
+    if movie_ids is not None:
+        delete = delete.filter(MovieRatingStats.movie_id.in_(movie_ids))
+        source = source.where(Rating.movie_id.in_(movie_ids))
+    delete.delete(synchronize_session=False)
+    result = db.execute(
+        MovieRatingStats.__table__.insert().from_select(
+            ["movie_id", "rating_sum", "rating_count"], source
+        )
+    )
+    return result.rowcount
+
+
+def find_drift(db, movie_ids=None) -> list[dict]:
+    """Movies whose stored aggregate differs from a fresh GROUP BY over ``ratings``."""
+    actual = (
+        select(
+            Rating.movie_id.label("movie_id"),
+            func.sum(Rating.rating).label("rating_sum"),
+            func.count().label("rating_count"),
+        )
+        .group_by(Rating.movie_id)
+        .subquery()
+    )
+    stored = {row.movie_id: row for row in db.query(MovieRatingStats)}
+    drift = []
+    for row in db.execute(select(actual)):
+        if movie_ids is not None and row.movie_id not in movie_ids:
+            continue
+        current = stored.pop(row.movie_id, None)
+        stored_sum = normalize_rating(current.rating_sum) if current else Decimal(0)
+        stored_count = current.rating_count if current else 0
+        if stored_count != row.rating_count or stored_sum != normalize_rating(row.rating_sum):
+            drift.append(
+                {
+                    "movie_id": row.movie_id,
+                    "stored": (stored_sum, stored_count),
+                    "actual": (normalize_rating(row.rating_sum), row.rating_count),
+                }
+            )
+    for movie_id, current in stored.items():
+        if current.rating_count and (movie_ids is None or movie_id in movie_ids):
+            drift.append(
+                {
+                    "movie_id": movie_id,
+                    "stored": (normalize_rating(current.rating_sum), current.rating_count),
+                    "actual": (Decimal(0), 0),
+                }
+            )
+    return drift
+
+
+def ensure_rating_stats(bind) -> None:
+    """Backfill aggregates once when the side table is introduced on a database that has ratings."""
+    try:
+        if not inspect(bind).has_table(Rating.__tablename__):
+            return
+        with bind.begin() as conn:
+            if conn.execute(select(MovieRatingStats.movie_id).limit(1)).first() is not None:
+                return
+            if conn.execute(select(Rating.movie_id).limit(1)).first() is None:
+                return
+        with SessionLocal(bind=bind) as db:
+            rebuild_rating_stats(db)
+            db.commit()
+    except SQLAlchemyError:
+        # Legacy layouts without the rating columns; the repair CLI can be run once migrated.
+        pass
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Recompute per-movie rating aggregates from the ratings table.")
+    parser.add_argument("--movie-id", type=int, action="append", dest="movie_ids", help="Limit to these movies.")
+    parser.add_argument("--check", action="store_true", help="Only report movies whose aggregate has drifted.")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if args.check:
+            drift = find_drift(db, args.movie_ids)
+            for item in drift:
+                print(f"movie {item['movie_id']}: stored {item['stored']} actual {item['actual']}")
+            print(f"{len(drift)} movie(s) drifted.")
+            raise SystemExit(1 if drift else 0)
+        rebuilt = rebuild_rating_stats(db, args.movie_ids)
+        db.commit()
+        print(f"Rebuilt rating aggregates for {rebuilt} movie(s).")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,34 +1,31 @@
-import hashlib
-import hmac
-import secrets
+import random
+
 from fastapi import APIRouter, Depends, HTTPException
 from pydantic import EmailStr, TypeAdapter
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from jose import jwt
-from config import JWT_SECRET, JWT_ALGORITHM
+from starlette.concurrency import run_in_threadpool
 from deps import get_db
 from models import User
+from password_hashing import HasherBusy, password_hasher
+from principals import issue_token
 from schemas import AuthLogin, AuthRegister
 
 router = APIRouter(prefix="/auth", tags=["Auth"])
 
-def hash_password(password: str) -> str:
-    salt = secrets.token_hex(16)
-    rounds = 120_000
-    digest = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt.encode("utf-8"), rounds)
-    return f"pbkdf2_sha256${rounds}${salt}${digest.hex()}"
+# Concurrent sign-ups with the same local part can pick the same name; the loser re-reads and retries.
+USERNAME_ATTEMPTS = 5
 
 
-def verify_password(password: str, stored: str) -> bool:
+async def _hashing(call):
     try:
-        algo, rounds_str, salt, hash_hex = stored.split("$", 3)
-        if algo != "pbkdf2_sha256":
-            return False
-        rounds = int(rounds_str)
-        digest = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt.encode("utf-8"), rounds)
-        return hmac.compare_digest(digest.hex(), hash_hex)
-    except Exception:
-        return False
+        return await call
+    except HasherBusy:
+        raise HTTPException(
+            status_code=503,
+            detail="Too many sign-in attempts, try again shortly",
+            headers={"Retry-After": "1"},
+        )
 
 
 def normalize_email(email: str) -> str:
@@ -42,54 +39,88 @@ def normalize_email(email: str) -> str:
     return cleaned
 
 
-def build_username(db: Session, email: str) -> str:
+def _username_suffix(base: str, username: str) -> int | None:
+    """1 for ``base`` itself, N for ``base`` + N (N >= 2, as generated), otherwise None."""
+    rest = username[len(base):]
+    if not rest:
+        return 1
+    if rest.isascii() and rest.isdigit() and not rest.startswith("0") and int(rest) >= 2:
+        return int(rest)
+    return None
+
+
+def build_username(db: Session, email: str, exclude=(), spread: int = 1) -> str:
+    """Lowest free ``base``/``baseN`` name, or a random one of the ``spread`` lowest free names."""
     base = email.split("@")[0] if "@" in email else email
     base = base.replace(" ", "").lower() or "user"
-    candidate = base
+    # One range scan of the unique username index; LIKE keeps it exact under any collation.
+    pattern = base.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+    names = [
+        username
+        for (username,) in db.query(User.username).filter(
+            User.username >= base,
+            User.username < base[:-1] + chr(ord(base[-1]) + 1),
+            User.username.like(pattern, escape="\\"),
+        )
+    ]
+    taken = {_username_suffix(base, name) for name in [*names, *exclude] if name.startswith(base)}
+    free = []
     counter = 1
-    while db.query(User).filter(User.username == candidate).first():
+    while len(free) < spread:
+        if counter not in taken:
+            free.append(counter)
         counter += 1
-        candidate = f"{base}{counter}"
-    return candidate
-
-
+    counter = random.choice(free)
+    return base if counter == 1 else f"{base}{counter}"
+
+
+def _find_user(db: Session, email: str):
+    return db.query(User).filter(User.email == email).first()
+
+
+def _create_user(db: Session, email: str, password_hash: str, full_name: str | None) -> User:
+    tried = []
+    for attempt in range(USERNAME_ATTEMPTS):
+        user = User(
+            email=email,
+            # Racing sign-ups all see the same lowest free name; losers spread out to avoid re-colliding.
+            username=build_username(db, email, tried, spread=4 ** attempt),
+            password_hash=password_hash,
+            full_name=full_name
+        )
+        db.add(user)
+        try:
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+            if _find_user(db, email):
+                raise HTTPException(status_code=400, detail="Email already registered")
+            tried.append(user.username)
+            continue
+        db.refresh(user)
+        return user
+    raise HTTPException(status_code=409, detail="Could not allocate a username, try again")
+
+
+# Async so that waiting on the hashing pool does not hold one of Starlette's worker threads;
+# the blocking database calls are still handed to the thread pool.
 @router.post("/register")
-def register(data: AuthRegister, db: Session = Depends(get_db)):
+async def register(data: AuthRegister, db: Session = Depends(get_db)):
     email = normalize_email(data.email)
-    existing = db.query(User).filter(User.email == email).first()
+    existing = await run_in_threadpool(_find_user, db, email)
     if existing:
         raise HTTPException(status_code=400, detail="Email already registered")
 
-    username = build_username(db, email)
-    user = User(
-        email=email,
-        username=username,
-        password_hash=hash_password(data.password),
-        full_name=data.full_name
-    )
-    db.add(user)
-    db.commit()
-    db.refresh(user)
-
-    token = jwt.encode(
-        {"user_id": user.user_id},
-        JWT_SECRET,
-        algorithm=JWT_ALGORITHM
-    )
-    return {"access_token": token}
+    password_hash = await _hashing(password_hasher.hash(data.password))
+    user = await run_in_threadpool(_create_user, db, email, password_hash, data.full_name)
+    return {"access_token": issue_token(user)}
 
 
 @router.post("/login")
-def login(data: AuthLogin, db: Session = Depends(get_db)):
+async def login(data: AuthLogin, db: Session = Depends(get_db)):
     email = normalize_email(data.email)
-    user = db.query(User).filter(User.email == email).first()
-    if not user or not verify_password(data.password, user.password_hash):
+    user = await run_in_threadpool(_find_user, db, email)
+    if not user or not await _hashing(password_hasher.verify(data.password, user.password_hash)):
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
-    token = jwt.encode(
-        {"user_id": user.user_id},
-        JWT_SECRET,
-        algorithm=JWT_ALGORITHM
-    )
-
-    return {"access_token": token}
+    return {"access_token": issue_token(user)}
@@ -10,7 +10,9 @@ from sqlalchemy import extract, or_
 from sqlalchemy.orm import Session
 
 from database import SessionLocal
+from metrics import upstream_call
 from models import Movie
+from search import escape_like, matching_movie_ids, search_key_filter
 
 router = APIRouter(prefix="/chatbot", tags=["Chatbot"])
 
@@ -136,12 +138,18 @@ def search_movies(db: Session, question: str):
             query = query.filter(Movie.imdb_score < val)
 
     if tokens:
-        token_filters = []
-        for token in tokens:
-            token_filters.append(Movie.title.ilike(f"%{token}%"))
-            token_filters.append(Movie.description.ilike(f"%{token}%"))
-            token_filters.append(Movie.storyline.ilike(f"%{token}%"))
-        query = query.filter(or_(*token_filters))
+        # The full-text index covers title, description and storyline; scan them only without it.
+        movie_ids = matching_movie_ids(db, " ".join(tokens), any_token=True)
+        if movie_ids is not None:
+            query = query.filter(Movie.movie_id.in_(movie_ids))
+        else:
+            token_filters = []
+            for token in tokens:
+                pattern = f"%{escape_like(token)}%"
+                token_filters.append(search_key_filter(db, Movie.search_key, token))
+                token_filters.append(Movie.description.ilike(pattern, escape="\\"))
+                token_filters.append(Movie.storyline.ilike(pattern, escape="\\"))
+            query = query.filter(or_(*token_filters))
 
     return query.limit(25).all()
 
@@ -208,12 +216,14 @@ def generate_llm_answer(question: str, movies):
         "generationConfig": {"temperature": 0.4},
     }
     headers = {"Content-Type": "application/json"}
-    res = requests.post(
-        f"https://generativelanguage.googleapis.com/v1beta/models/{model}:generateContent?key={api_key}",
-        json=payload,
-        headers=headers,
-        timeout=12,
-    )
+    with upstream_call("gemini") as call:
+        res = requests.post(
+            f"https://generativelanguage.googleapis.com/v1beta/models/{model}:generateContent?key={api_key}",
+            json=payload,
+            headers=headers,
+            timeout=12,
+        )
+        call.status = res.status_code
     if not res.ok:
         raise RuntimeError(f"Gemini request failed ({res.status_code})")
     data = res.json()
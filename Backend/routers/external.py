@@ -2,6 +2,7 @@ from fastapi import APIRouter, HTTPException, Request
 import requests
 
 from config import TRAKT_CLIENT_ID, OMDB_API_KEY
+from metrics import upstream_call
 
 router = APIRouter(prefix="/external", tags=["External"])
 
@@ -10,9 +11,11 @@ OMDB_BASE = "https://www.omdbapi.com/"
 DEFAULT_TIMEOUT = 10
 
 
-def fetch_json(url: str, params: dict | None = None, headers: dict | None = None):
+def fetch_json(upstream: str, url: str, params: dict | None = None, headers: dict | None = None):
     try:
-        res = requests.get(url, params=params, headers=headers, timeout=DEFAULT_TIMEOUT)
+        with upstream_call(upstream) as call:
+            res = requests.get(url, params=params, headers=headers, timeout=DEFAULT_TIMEOUT)
+            call.status = res.status_code
     except requests.RequestException:
         raise HTTPException(status_code=502, detail="Upstream request failed")
 
@@ -36,7 +39,7 @@ def trakt_proxy(path: str, request: Request):
         "trakt-api-version": "2",
         "trakt-api-key": TRAKT_CLIENT_ID,
     }
-    return fetch_json(f"{TRAKT_BASE}/{path}", params=params, headers=headers)
+    return fetch_json("trakt", f"{TRAKT_BASE}/{path}", params=params, headers=headers)
 
 
 @router.get("/omdb")
@@ -51,4 +54,4 @@ def omdb_proxy(request: Request):
     if "i" not in params and "t" not in params:
         raise HTTPException(status_code=400, detail="Missing OMDb identifier")
 
-    return fetch_json(OMDB_BASE, params=params)
+    return fetch_json("omdb", OMDB_BASE, params=params)
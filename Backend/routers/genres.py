@@ -1,21 +1,41 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import func
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session
 
-from deps import get_current_admin, get_db
-from models import Genre, MovieGenre
+from cache import catalog_cache
+from deps import get_current_admin, get_db, get_db_runner
+from facets import facet_indexes
+from homepage_feed import homepage_feeds
+from models import Genre, Movie, MovieGenre
+from movie_versions import bump_versions
 from schemas import GenreCreate, GenreUpdate
+from search import fold_text, search_key_filter
 
 router = APIRouter(prefix="/genres", tags=["Genres"])
 
 
+def _find_genre(db: Session, name: str):
+    return db.query(Genre).filter(func.lower(Genre.name) == name.lower()).first()
+
+
+def _genre_movies(genre_id: int):
+    return Movie.movie_id.in_(select(MovieGenre.movie_id).where(MovieGenre.genre_id == genre_id))
+
+
+def _list_genres(db: Session, query: str | None):
+    def load():
+        base_query = db.query(Genre)
+        if query:
+            base_query = base_query.filter(search_key_filter(db, Genre.search_key, query))
+        results = base_query.order_by(Genre.name.asc()).all()
+        return [{"genre_id": g.genre_id, "name": g.name} for g in results]
+
+    return catalog_cache.get_or_load(db, "genres", fold_text(query or ""), load)
+
+
 @router.get("/")
-def list_genres(query: str | None = None, db: Session = Depends(get_db)):
-    base_query = db.query(Genre)
-    if query:
-        base_query = base_query.filter(Genre.name.ilike(f"%{query}%"))
-    results = base_query.order_by(Genre.name.asc()).all()
-    return [{"genre_id": g.genre_id, "name": g.name} for g in results]
+async def list_genres(query: str | None = None, run_db=Depends(get_db_runner)):
+    return await run_db(_list_genres, query)
 
 
 @router.post("/", status_code=201)
@@ -24,13 +44,14 @@ def create_genre(
     db: Session = Depends(get_db),
     _admin=Depends(get_current_admin)
 ):
-    existing = db.query(Genre).filter(func.lower(Genre.name) == data.name.lower()).first()
+    existing = _find_genre(db, data.name)
     if existing:
         return {"genre_id": existing.genre_id, "name": existing.name}
     genre = Genre(name=data.name.strip())
     db.add(genre)
     db.commit()
     db.refresh(genre)
+    catalog_cache.invalidate(db, "genres")
     return {"genre_id": genre.genre_id, "name": genre.name}
 
 
@@ -45,8 +66,12 @@ def update_genre(
     if not genre:
         raise HTTPException(status_code=404, detail="Genre not found")
     genre.name = data.name.strip()
+    bump_versions(db, _genre_movies(genre_id))
     db.commit()
     db.refresh(genre)
+    catalog_cache.invalidate(db, "genres")
+    facet_indexes.discard(db)
+    homepage_feeds.discard(db)
     return {"genre_id": genre.genre_id, "name": genre.name}
 
 
@@ -59,7 +84,11 @@ def delete_genre(
     genre = db.query(Genre).filter(Genre.genre_id == genre_id).first()
     if not genre:
         raise HTTPException(status_code=404, detail="Genre not found")
+    bump_versions(db, _genre_movies(genre_id))
     db.query(MovieGenre).filter(MovieGenre.genre_id == genre_id).delete()
     db.delete(genre)
     db.commit()
+    catalog_cache.invalidate(db, "genres")
+    facet_indexes.discard(db)
+    homepage_feeds.discard(db)
     return {"ok": True}
@@ -1,11 +1,15 @@
 from urllib.parse import urlparse
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import PlainTextResponse
 from sqlalchemy import text
 from sqlalchemy.orm import Session
 
+from cache import catalog_cache
 from database import DATABASE_SCHEMA, DATABASE_URL
-from deps import get_db
+from deps import get_current_admin, get_db
+from profiling import profile_store
+from slow_queries import slow_query_log
 
 router = APIRouter(prefix="/health", tags=["Health"])
 
@@ -39,3 +43,37 @@ def db_health(db: Session = Depends(get_db)):
             "search_path": search_path,
         }
     }
+
+
+@router.get("/cache")
+def cache_health():
+    return {"cache": catalog_cache.snapshot()}
+
+
+@router.get("/slow-queries")
+def slow_queries(limit: int = 50, _admin=Depends(get_current_admin)):
+    return {
+        "threshold_ms": slow_query_log.threshold_ms,
+        "explain_analyze": slow_query_log.analyze,
+        "total": slow_query_log.total,
+        "entries": slow_query_log.entries(min(max(1, limit), 200)),
+    }
+
+
+@router.delete("/slow-queries")
+def clear_slow_queries(_admin=Depends(get_current_admin)):
+    slow_query_log.clear()
+    return {"ok": True}
+
+
+@router.get("/profiles")
+def profiles(_admin=Depends(get_current_admin)):
+    return {"profiles": profile_store.summaries()}
+
+
+@router.get("/profiles/{profile_id}", response_class=PlainTextResponse)
+def profile_stacks(profile_id: str, _admin=Depends(get_current_admin)):
+    profile = profile_store.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return PlainTextResponse(profile.collapsed())
@@ -1,7 +1,9 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Response
 from sqlalchemy.orm import Session
 
-from deps import get_current_admin, get_db
+from cache import catalog_cache
+from deps import get_current_admin, get_db, get_db_runner
+from homepage_feed import homepage_feeds
 from models import HomepageSettings
 from schemas import HomepageSettingsUpdate
 
@@ -32,10 +34,22 @@ def _serialize_settings(settings: HomepageSettings | None):
     }
 
 
+def _homepage_settings(db: Session):
+    def load():
+        settings = db.query(HomepageSettings).order_by(HomepageSettings.settings_id.asc()).first()
+        return _serialize_settings(settings)
+
+    return catalog_cache.get_or_load(db, "homepage", "settings", load)
+
+
 @router.get("/")
-def get_homepage_settings(db: Session = Depends(get_db)):
-    settings = db.query(HomepageSettings).order_by(HomepageSettings.settings_id.asc()).first()
-    return _serialize_settings(settings)
+async def get_homepage_settings(run_db=Depends(get_db_runner)):
+    return await run_db(_homepage_settings)
+
+
+@router.get("/feed")
+async def get_homepage_feed(run_db=Depends(get_db_runner)):
+    return Response(content=await run_db(homepage_feeds.get), media_type="application/json")
 
 
 @router.put("/")
@@ -55,4 +69,7 @@ def update_homepage_settings(
 
     db.commit()
     db.refresh(settings)
+    catalog_cache.invalidate(db, "homepage")
+    homepage_feeds.discard(db)
+    homepage_feeds.get(db)
     return _serialize_settings(settings)
@@ -0,0 +1,18 @@
+from fastapi import APIRouter, Depends
+
+from deps import get_db_runner
+from leaderboards import MAX_LIMIT, leaderboards
+
+router = APIRouter(prefix="/leaderboards", tags=["Leaderboards"])
+
+
+@router.get("/top")
+async def top_movies(limit: int = 20, run_db=Depends(get_db_runner)):
+    safe_limit = min(max(1, limit), MAX_LIMIT)
+    return {"results": (await run_db(leaderboards.get)).top(safe_limit)}
+
+
+@router.get("/trending")
+async def trending_movies(limit: int = 20, run_db=Depends(get_db_runner)):
+    safe_limit = min(max(1, limit), MAX_LIMIT)
+    return {"results": (await run_db(leaderboards.get)).trending(safe_limit)}
@@ -0,0 +1,23 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from cards import MAX_BATCH_IDS, parse_id_list
+from deps import get_current_user, get_db
+from user_overlay import overlay_caches
+
+router = APIRouter(prefix="/me", tags=["Me"])
+
+
+@router.get("/overlay")
+def get_overlay(
+    ids: str,
+    user_id=Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    try:
+        movie_ids = parse_id_list(ids)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids must be a comma-separated list of integers")
+    if len(movie_ids) > MAX_BATCH_IDS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_IDS} ids per request")
+    return {"results": overlay_caches.get(db).lookup(db, user_id, movie_ids)}
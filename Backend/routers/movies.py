@@ -1,10 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import func
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from sqlalchemy import String, cast as sql_cast, delete, func, literal, null, select, union_all
 from sqlalchemy.orm import Session
 
-from deps import get_db, get_current_admin
-from models import Favorite, Genre, Movie, MovieCast, MovieGenre, Person, Rating
+from cache import catalog_cache
+from cards import MAX_BATCH_IDS, load_movie_cards, parse_id_list
+from deps import get_db, get_db_runner, get_current_admin
+from facets import SORT_FIELDS, facet_indexes
+from homepage_feed import homepage_feeds
+from leaderboards import leaderboards
+from models import CastRole, Favorite, Genre, Movie, MovieCast, MovieGenre, MovieRatingStats, Person, Rating
+from movie_versions import bump_versions, cached_etag, etag_matches, forget_etags, movie_etag, remember_etag
+from pagination import decode_cursor, encode_cursor, keyset_after
 from schemas import CastCreate, CastDelete, MovieCreate, MovieUpdate
+from search import matching_movie_ids, rank_movie_ids, search_key_filter
+from suggest import suggest_indexes
 
 router = APIRouter(prefix="/movies", tags=["Movies"])
 
@@ -26,11 +35,101 @@ def _normalize_genres(genres: list[str] | None):
     return normalized
 
 
+def _after_movie_write(db: Session, movie: Movie, genre_names: list[str] | None = None):
+    forget_etags([movie.movie_id])
+    # Writing genres may have created new Genre rows as well.
+    tags = [f"movie:{movie.movie_id}"] + (["genres"] if genre_names is not None else [])
+    catalog_cache.invalidate(db, *tags)
+    homepage_feeds.discard(db)
+    index = suggest_indexes.loaded(db)
+    if index is not None:
+        index.upsert_movie(movie)
+    index = facet_indexes.loaded(db)
+    if index is not None:
+        index.upsert_movie(movie, genre_names)
+    boards = leaderboards.loaded(db)
+    if boards is not None:
+        boards.upsert_movie(movie)
+
+
+def _after_movie_delete(db: Session, movie_id: int):
+    forget_etags([movie_id])
+    catalog_cache.invalidate(db, f"movie:{movie_id}")
+    homepage_feeds.discard(db)
+    index = suggest_indexes.loaded(db)
+    if index is not None:
+        index.remove_movie(movie_id)
+    index = facet_indexes.loaded(db)
+    if index is not None:
+        index.remove_movie(movie_id)
+    boards = leaderboards.loaded(db)
+    if boards is not None:
+        boards.remove_movie(movie_id)
+
+
+def _resolve_genres(db: Session, names: list[str]) -> list[Genre]:
+    """Existing genres matched case-insensitively in one query; missing ones are created."""
+    if not names:
+        return []
+    existing = {}
+    for genre in (
+        db.query(Genre)
+        .filter(func.lower(Genre.name).in_([name.lower() for name in names]))
+        .order_by(Genre.genre_id.asc())
+    ):
+        existing.setdefault(genre.name.lower(), genre)
+    created = [Genre(name=name) for name in names if name.lower() not in existing]
+    if created:
+        db.add_all(created)
+        db.flush()
+        existing.update((genre.name.lower(), genre) for genre in created)
+    return [existing[name.lower()] for name in names]
+
+
+# (title, movie_id) of the last row seen, for title-ordered listings.
+TITLE_CURSOR = (str, int)
+# Relevance scores move whenever the corpus changes, so ranked search pages by position instead.
+RANK_CURSOR = (int,)
+
+
+def _movie_dependents(movie_id: int) -> list:
+    """DELETEs of every row referencing the movie, in the order ``delete_movie`` runs them."""
+    return [
+        delete(MovieCast).where(MovieCast.movie_id == movie_id),
+        delete(MovieGenre).where(MovieGenre.movie_id == movie_id),
+        delete(Favorite).where(Favorite.movie_id == movie_id),
+        # Aggregate row first: rating writers lock it before touching ratings.
+        delete(MovieRatingStats).where(MovieRatingStats.movie_id == movie_id),
+        delete(Rating).where(Rating.movie_id == movie_id),
+    ]
+
+
+def _title_page(base_query, cursor: str | None, offset: int, limit: int):
+    if cursor:
+        title, movie_id = decode_cursor(cursor, TITLE_CURSOR)
+        base_query = base_query.filter(keyset_after((Movie.title, Movie.movie_id), (title, movie_id)))
+        offset = 0
+    rows = (
+        base_query
+        .order_by(Movie.title.asc(), Movie.movie_id.asc())
+        .offset(offset)
+        .limit(limit + 1)
+        .all()
+    )
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].title, rows[-1].movie_id)
+    return rows, next_cursor
+
+
 @router.get("")
 def list_movies(
     query: str | None = None,
     page: int = 1,
     limit: int = 20,
+    cursor: str | None = None,
+    include_total: bool = True,
     db: Session = Depends(get_db),
     _admin=Depends(get_current_admin)
 ):
@@ -40,21 +139,20 @@ def list_movies(
 
     base_query = db.query(Movie)
     if query:
-        base_query = base_query.filter(Movie.title.ilike(f"%{query}%"))
-
-    total = base_query.count()
-    results = (
-        base_query
-        .order_by(Movie.title.asc())
-        .offset(offset)
-        .limit(safe_limit)
-        .all()
-    )
+        movie_ids = matching_movie_ids(db, query, titles_only=True)
+        if movie_ids is not None:
+            base_query = base_query.filter(Movie.movie_id.in_(movie_ids))
+        else:
+            base_query = base_query.filter(search_key_filter(db, Movie.search_key, query))
+
+    total = base_query.count() if include_total else None
+    results, next_cursor = _title_page(base_query, cursor, offset, safe_limit)
     return {
         "query": query or "",
-        "page": safe_page,
+        "page": None if cursor else safe_page,
         "limit": safe_limit,
         "total_results": total,
+        "next_cursor": next_cursor,
         "results": [
             {
                 "movie_id": m.movie_id,
@@ -67,26 +165,45 @@ def list_movies(
     }
 
 
-@router.get("/search")
-def search_movies(query: str, page: int = 1, limit: int = 20, db: Session = Depends(get_db)):
+def _search_movies(db: Session, query: str, page: int, limit: int, cursor: str | None, include_total: bool):
     safe_page = max(1, page)
     safe_limit = min(max(1, limit), 50)
     offset = (safe_page - 1) * safe_limit
 
-    base_query = db.query(Movie).filter(Movie.title.ilike(f"%{query}%"))
-    total_results = base_query.count()
-    results = (
-        base_query
-        .order_by(Movie.title.asc())
-        .offset(offset)
-        .limit(safe_limit)
-        .all()
-    )
+    title_cursor = None
+    if cursor:
+        values = decode_cursor(cursor, RANK_CURSOR, TITLE_CURSOR)
+        if len(values) == len(RANK_CURSOR):
+            offset = max(0, values[0])
+        else:
+            # Issued by the substring fallback below; keep walking in title order.
+            title_cursor = cursor
+    ranked = None
+    if title_cursor is None:
+        ranked = rank_movie_ids(db, query, safe_limit + 1, offset, with_total=include_total)
+
+    if ranked is not None:
+        hits, total_results = ranked
+        next_cursor = None
+        if len(hits) > safe_limit:
+            hits = hits[:safe_limit]
+            next_cursor = encode_cursor(offset + safe_limit)
+        movies = {}
+        if hits:
+            hit_ids = [movie_id for movie_id, _ in hits]
+            movies = {m.movie_id: m for m in db.query(Movie).filter(Movie.movie_id.in_(hit_ids)).all()}
+        results = [(movies[movie_id], score) for movie_id, score in hits if movie_id in movies]
+    else:
+        base_query = db.query(Movie).filter(search_key_filter(db, Movie.search_key, query))
+        total_results = base_query.count() if include_total else None
+        rows, next_cursor = _title_page(base_query, title_cursor, offset, safe_limit)
+        results = [(m, None) for m in rows]
     return {
         "query": query,
-        "page": safe_page,
+        "page": None if cursor else safe_page,
         "limit": safe_limit,
         "total_results": total_results,
+        "next_cursor": next_cursor,
         "results": [
             {
                 "movie_id": m.movie_id,
@@ -94,24 +211,151 @@ def search_movies(query: str, page: int = 1, limit: int = 20, db: Session = Depe
                 "release_date": m.release_date,
                 "imdb_score": m.imdb_score,
                 "poster_url": m.poster_url,
+                "score": score,
             }
-            for m in results
+            for m, score in results
         ],
     }
 
 
-@router.get("/{movie_id}")
-def movie_detail(movie_id: int, db: Session = Depends(get_db)):
-    movie = db.query(Movie).filter(Movie.movie_id == movie_id).first()
-    if not movie:
-        raise HTTPException(status_code=404, detail="Movie not found")
-    genres = (
-        db.query(Genre)
-        .join(MovieGenre, MovieGenre.genre_id == Genre.genre_id)
-        .filter(MovieGenre.movie_id == movie_id)
-        .order_by(Genre.name.asc())
+@router.get("/search")
+async def search_movies(
+    query: str,
+    page: int = 1,
+    limit: int = 20,
+    cursor: str | None = None,
+    include_total: bool = True,
+    run_db=Depends(get_db_runner),
+):
+    return await run_db(_search_movies, query, page, limit, cursor, include_total)
+
+
+@router.get("/suggest")
+async def suggest_movies(q: str, limit: int = 8, run_db=Depends(get_db_runner)):
+    safe_limit = min(max(1, limit), 20)
+    return {"query": q, "results": (await run_db(suggest_indexes.get)).lookup(q, safe_limit)}
+
+
+@router.get("/batch")
+async def batch_movies(ids: list[str] = Query(...), run_db=Depends(get_db_runner)):
+    try:
+        movie_ids = parse_id_list(ids)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids must be a comma-separated list of integers")
+    if len(movie_ids) > MAX_BATCH_IDS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_IDS} ids per request")
+
+    cards = await run_db(load_movie_cards, movie_ids)
+    return {
+        "results": [cards[movie_id] for movie_id in movie_ids if movie_id in cards],
+        "missing_ids": [movie_id for movie_id in movie_ids if movie_id not in cards],
+    }
+
+
+@router.get("/discover")
+async def discover_movies(
+    genres: list[str] | None = Query(None),
+    year_from: int | None = None,
+    year_to: int | None = None,
+    duration_min: int | None = None,
+    duration_max: int | None = None,
+    min_score: float | None = None,
+    age_ratings: list[str] | None = Query(None),
+    sort: str = "score",
+    order: str | None = None,
+    page: int = 1,
+    limit: int = 20,
+    run_db=Depends(get_db_runner),
+):
+    if sort not in SORT_FIELDS:
+        raise HTTPException(status_code=400, detail=f"sort must be one of: {', '.join(SORT_FIELDS)}")
+    if order not in (None, "asc", "desc"):
+        raise HTTPException(status_code=400, detail="order must be asc or desc")
+    safe_page = max(1, page)
+    safe_limit = min(max(1, limit), 50)
+    descending = order == "desc" if order else sort != "title"
+
+    result = (await run_db(facet_indexes.get)).discover(
+        genres=genres,
+        year_from=year_from,
+        year_to=year_to,
+        duration_min=duration_min,
+        duration_max=duration_max,
+        min_score=min_score,
+        age_ratings=age_ratings,
+        sort=sort,
+        descending=descending,
+        offset=(safe_page - 1) * safe_limit,
+        limit=safe_limit,
+    )
+    return {"page": safe_page, "limit": safe_limit, "sort": sort, **result}
+
+
+CAST_GROUPS = {
+    CastRole.Director.value: "directors",
+    CastRole.Writer.value: "writers",
+    CastRole.Actor.value: "actors",
+}
+
+
+def _load_movie_detail(db: Session, movie_id: int):
+    # Genres and cast are stacked into one UNION ALL so a single LEFT JOIN fetches everything
+    # without multiplying genre rows by cast rows.
+    genre_rows = (
+        select(
+            MovieGenre.movie_id.label("movie_id"),
+            literal("genre").label("kind"),
+            Genre.genre_id.label("ref_id"),
+            Genre.name.label("name"),
+            null().label("role"),
+            null().label("character_name"),
+            null().label("avatar_url"),
+        )
+        .join(Genre, Genre.genre_id == MovieGenre.genre_id)
+        .where(MovieGenre.movie_id == movie_id)
+    )
+    cast_rows = (
+        select(
+            MovieCast.movie_id,
+            literal("cast"),
+            Person.person_id,
+            Person.full_name,
+            sql_cast(MovieCast.role, String),
+            MovieCast.character_name,
+            Person.avatar_url,
+        )
+        .join(Person, Person.person_id == MovieCast.person_id)
+        .where(MovieCast.movie_id == movie_id)
+    )
+    related = union_all(genre_rows, cast_rows).subquery()
+    rows = (
+        db.query(Movie, related)
+        .outerjoin(related, related.c.movie_id == Movie.movie_id)
+        .filter(Movie.movie_id == movie_id)
         .all()
     )
+    if not rows:
+        return None
+
+    movie = rows[0][0]
+    genres = []
+    cast = {group: [] for group in CAST_GROUPS.values()}
+    for row in rows:
+        if row.kind == "genre":
+            genres.append(row.name)
+        elif row.kind == "cast":
+            role = row.role.split(".")[-1]
+            cast[CAST_GROUPS[role]].append(
+                {
+                    "person_id": row.ref_id,
+                    "full_name": row.name,
+                    "character_name": row.character_name,
+                    "avatar_url": row.avatar_url,
+                }
+            )
+    for members in cast.values():
+        members.sort(key=lambda member: member["full_name"].lower())
+
     return {
         "movie_id": movie.movie_id,
         "title": movie.title,
@@ -126,8 +370,40 @@ def movie_detail(movie_id: int, db: Session = Depends(get_db)):
         "poster_url": movie.poster_url,
         "cover_url": movie.cover_url,
         "trailer_url": movie.trailer_url,
-        "genres": [g.name for g in genres],
-    }
+        "genres": sorted(genres, key=str.lower),
+        "cast": cast,
+    }, movie_etag(movie.movie_id, movie.version or 1)
+
+
+def _cached_movie_detail(db: Session, movie_id: int):
+    def load():
+        loaded = _load_movie_detail(db, movie_id)
+        return {"payload": loaded[0], "etag": loaded[1]} if loaded else None
+
+    return catalog_cache.get_or_load(db, f"movie:{movie_id}", "detail", load)
+
+
+@router.get("/{movie_id}")
+async def movie_detail(
+    movie_id: int,
+    response: Response,
+    if_none_match: str | None = Header(None),
+    run_db=Depends(get_db_runner),
+):
+    etag = cached_etag(movie_id)
+    if etag and etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+
+    cached = await run_db(_cached_movie_detail, movie_id)
+    if cached is None:
+        raise HTTPException(status_code=404, detail="Movie not found")
+    payload, etag = cached["payload"], cached["etag"]
+    remember_etag(movie_id, etag)
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "no-cache"
+    return payload
 
 
 @router.post("/", status_code=201)
@@ -153,16 +429,13 @@ def create_movie(
     db.add(movie)
     db.flush()
 
-    for name in _normalize_genres(data.genres):
-        genre = db.query(Genre).filter(func.lower(Genre.name) == name.lower()).first()
-        if not genre:
-            genre = Genre(name=name)
-            db.add(genre)
-            db.flush()
-        db.add(MovieGenre(movie_id=movie.movie_id, genre_id=genre.genre_id))
+    genres = _resolve_genres(db, _normalize_genres(data.genres))
+    db.add_all(MovieGenre(movie_id=movie.movie_id, genre_id=genre.genre_id) for genre in genres)
+    genre_names = [genre.name for genre in genres]
 
     db.commit()
     db.refresh(movie)
+    _after_movie_write(db, movie, genre_names)
     return {"movie_id": movie.movie_id, "title": movie.title}
 
 
@@ -203,18 +476,18 @@ def update_movie(
     if "trailer_url" in payload:
         movie.trailer_url = payload["trailer_url"].strip() if payload["trailer_url"] else None
 
+    movie.version = Movie.version + 1
+
+    genre_names = None
     if "genres" in payload:
         db.query(MovieGenre).filter(MovieGenre.movie_id == movie_id).delete()
-        for name in _normalize_genres(payload["genres"]):
-            genre = db.query(Genre).filter(func.lower(Genre.name) == name.lower()).first()
-            if not genre:
-                genre = Genre(name=name)
-                db.add(genre)
-                db.flush()
-            db.add(MovieGenre(movie_id=movie.movie_id, genre_id=genre.genre_id))
+        genres = _resolve_genres(db, _normalize_genres(payload["genres"]))
+        db.add_all(MovieGenre(movie_id=movie.movie_id, genre_id=genre.genre_id) for genre in genres)
+        genre_names = [genre.name for genre in genres]
 
     db.commit()
     db.refresh(movie)
+    _after_movie_write(db, movie, genre_names)
     return {"movie_id": movie.movie_id, "title": movie.title}
 
 
@@ -228,12 +501,11 @@ def delete_movie(
     if not movie:
         raise HTTPException(status_code=404, detail="Movie not found")
 
-    db.query(MovieCast).filter(MovieCast.movie_id == movie_id).delete()
-    db.query(MovieGenre).filter(MovieGenre.movie_id == movie_id).delete()
-    db.query(Favorite).filter(Favorite.movie_id == movie_id).delete()
-    db.query(Rating).filter(Rating.movie_id == movie_id).delete()
+    for statement in _movie_dependents(movie_id):
+        db.execute(statement)
     db.delete(movie)
     db.commit()
+    _after_movie_delete(db, movie_id)
     return {"ok": True}
 
 
@@ -311,6 +583,7 @@ def add_movie_cast(
         character_name=data.character_name.strip() if data.character_name else None
     )
     db.add(entry)
+    bump_versions(db, Movie.movie_id == movie_id, [movie_id])
     db.commit()
     return {"ok": True}
 
@@ -333,5 +606,6 @@ def remove_movie_cast(
     )
     if not deleted:
         raise HTTPException(status_code=404, detail="Cast entry not found")
+    bump_versions(db, Movie.movie_id == movie_id, [movie_id])
     db.commit()
     return {"ok": True}
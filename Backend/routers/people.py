@@ -1,29 +1,45 @@
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
-from deps import get_current_admin, get_db
-from models import MovieCast, Person
+from cache import catalog_cache
+from deps import get_current_admin, get_db, get_db_runner
+from models import Movie, MovieCast, Person
+from movie_versions import bump_versions
 from schemas import PersonCreate, PersonUpdate
+from search import fold_text, search_key_filter
+from suggest import suggest_indexes
 
 router = APIRouter(prefix="/people", tags=["People"])
 
 
+def _person_movies(person_id: int):
+    return Movie.movie_id.in_(select(MovieCast.movie_id).where(MovieCast.person_id == person_id))
+
+
+def _list_people(db: Session, query: str | None):
+    def load():
+        base_query = db.query(Person)
+        if query:
+            base_query = base_query.filter(search_key_filter(db, Person.search_key, query))
+        results = base_query.order_by(Person.full_name.asc()).all()
+        return [
+            {
+                "person_id": p.person_id,
+                "full_name": p.full_name,
+                "birth_date": p.birth_date,
+                "avatar_url": p.avatar_url,
+                "bio": p.bio,
+            }
+            for p in results
+        ]
+
+    return catalog_cache.get_or_load(db, "people", fold_text(query or ""), load)
+
+
 @router.get("/")
-def list_people(query: str | None = None, db: Session = Depends(get_db)):
-    base_query = db.query(Person)
-    if query:
-        base_query = base_query.filter(Person.full_name.ilike(f"%{query}%"))
-    results = base_query.order_by(Person.full_name.asc()).all()
-    return [
-        {
-            "person_id": p.person_id,
-            "full_name": p.full_name,
-            "birth_date": p.birth_date,
-            "avatar_url": p.avatar_url,
-            "bio": p.bio,
-        }
-        for p in results
-    ]
+async def list_people(query: str | None = None, run_db=Depends(get_db_runner)):
+    return await run_db(_list_people, query)
 
 
 @router.post("/", status_code=201)
@@ -41,6 +57,10 @@ def create_person(
     db.add(person)
     db.commit()
     db.refresh(person)
+    catalog_cache.invalidate(db, "people")
+    index = suggest_indexes.loaded(db)
+    if index is not None:
+        index.upsert_person(person)
     return {"person_id": person.person_id, "full_name": person.full_name}
 
 
@@ -65,8 +85,13 @@ def update_person(
     if "bio" in payload:
         person.bio = payload["bio"].strip() if payload["bio"] else None
 
+    bump_versions(db, _person_movies(person_id))
     db.commit()
     db.refresh(person)
+    catalog_cache.invalidate(db, "people")
+    index = suggest_indexes.loaded(db)
+    if index is not None:
+        index.upsert_person(person)
     return {"person_id": person.person_id, "full_name": person.full_name}
 
 
@@ -79,7 +104,12 @@ def delete_person(
     person = db.query(Person).filter(Person.person_id == person_id).first()
     if not person:
         raise HTTPException(status_code=404, detail="Person not found")
+    bump_versions(db, _person_movies(person_id))
     db.query(MovieCast).filter(MovieCast.person_id == person_id).delete()
     db.delete(person)
     db.commit()
+    catalog_cache.invalidate(db, "people")
+    index = suggest_indexes.loaded(db)
+    if index is not None:
+        index.remove_person(person_id)
     return {"ok": True}
@@ -1,10 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import func
 from sqlalchemy.orm import Session
 
-from deps import get_current_user, get_db
-from models import Movie, Rating
-from schemas import RatingCreate
+from cards import MAX_BATCH_IDS
+from deps import get_current_user, get_db, get_db_runner, get_optional_user, read_only
+from leaderboards import leaderboards
+from models import Movie, MovieRatingStats, Rating
+from rating_stats import average, load_rating_summaries, normalize_rating, upsert_rating
+from schemas import RatingCreate, RatingSummaryRequest
+from user_overlay import forget_overlay
 
 router = APIRouter(prefix="/ratings", tags=["Ratings"])
 
@@ -15,55 +18,53 @@ def rate_movie(
     user_id=Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    movie = db.query(Movie).filter(Movie.movie_id == payload.movie_id).first()
-    if not movie:
+    value = normalize_rating(payload.rating)
+    totals = upsert_rating(db, user_id, payload.movie_id, value)
+    if totals is None:
+        db.rollback()
         raise HTTPException(status_code=404, detail="Movie not found")
-
-    existing = (
-        db.query(Rating)
-        .filter(Rating.user_id == user_id, Rating.movie_id == payload.movie_id)
-        .first()
-    )
-    if existing:
-        existing.rating = payload.rating
-    else:
-        db.add(Rating(user_id=user_id, movie_id=payload.movie_id, rating=payload.rating))
     db.commit()
+    forget_overlay(db, user_id, [payload.movie_id])
 
-    avg, count = (
-        db.query(func.avg(Rating.rating), func.count(Rating.user_id))
-        .filter(Rating.movie_id == payload.movie_id)
-        .first()
-    )
-    user_rating = (
-        db.query(Rating.rating)
-        .filter(Rating.user_id == user_id, Rating.movie_id == payload.movie_id)
-        .scalar()
-    )
-
+    rating_sum, rating_count = totals
+    boards = leaderboards.loaded(db)
+    if boards is not None:
+        boards.record_rating(payload.movie_id, rating_sum, rating_count)
     return {
         "movie_id": payload.movie_id,
-        "average": float(avg) if avg is not None else 0.0,
-        "count": int(count or 0),
-        "user_rating": float(user_rating) if user_rating is not None else None,
+        "average": average(rating_sum, rating_count),
+        "count": int(rating_count),
+        "user_rating": float(value),
     }
 
 
+@router.post("/summary")
+@read_only
+async def rating_summaries(
+    payload: RatingSummaryRequest,
+    user_id=Depends(get_optional_user),
+    run_db=Depends(get_db_runner),
+):
+    movie_ids = list(dict.fromkeys(payload.movie_ids))
+    if len(movie_ids) > MAX_BATCH_IDS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_IDS} ids per request")
+    summaries = await run_db(load_rating_summaries, movie_ids, user_id)
+    return {"results": [summaries[movie_id] for movie_id in movie_ids]}
+
+
 @router.get("/{movie_id}")
 def get_average_rating(
     movie_id: int,
     user_id=Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    movie = db.query(Movie).filter(Movie.movie_id == movie_id).first()
-    if not movie:
-        raise HTTPException(status_code=404, detail="Movie not found")
+    stats = db.get(MovieRatingStats, movie_id)
+    if stats is None:
+        movie = db.query(Movie.movie_id).filter(Movie.movie_id == movie_id).first()
+        if not movie:
+            raise HTTPException(status_code=404, detail="Movie not found")
 
-    avg, count = (
-        db.query(func.avg(Rating.rating), func.count(Rating.user_id))
-        .filter(Rating.movie_id == movie_id)
-        .first()
-    )
+    rating_sum, rating_count = (stats.rating_sum, stats.rating_count) if stats else (0, 0)
     user_rating = (
         db.query(Rating.rating)
         .filter(Rating.user_id == user_id, Rating.movie_id == movie_id)
@@ -72,7 +73,7 @@ def get_average_rating(
 
     return {
         "movie_id": movie_id,
-        "average": float(avg) if avg is not None else 0.0,
-        "count": int(count or 0),
+        "average": average(rating_sum, rating_count),
+        "count": int(rating_count),
         "user_rating": float(user_rating) if user_rating is not None else None,
     }
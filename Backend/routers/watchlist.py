@@ -1,10 +1,32 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import literal, select
 from sqlalchemy.orm import Session
-from models import Favorite
-from schemas import WatchlistCreate
+
+from cards import CARD_COLUMNS, MAX_BATCH_IDS, fold_card_rows, join_card_genres
+from database import upsert_insert
+from leaderboards import leaderboards
+from models import Favorite, Movie
+from schemas import WatchlistBulk, WatchlistCreate
 from deps import get_db, get_current_user
+from user_overlay import forget_overlay
 
 router = APIRouter(prefix="/watchlist", tags=["Watchlist"])
+
+
+def _after_favorites_added(db: Session, user_id: int, requested_ids: list[int], added_ids: list[int]):
+    forget_overlay(db, user_id, requested_ids)
+    boards = leaderboards.loaded(db)
+    if boards is not None:
+        for movie_id in added_ids:
+            boards.record_favorite(movie_id)
+
+
+def _bulk_ids(data: WatchlistBulk) -> list[int]:
+    movie_ids = list(dict.fromkeys(data.movie_ids))
+    if len(movie_ids) > MAX_BATCH_IDS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_IDS} ids per request")
+    return movie_ids
+
 
 @router.post("/add")
 def add_to_watchlist(
@@ -19,11 +41,111 @@ def add_to_watchlist(
     item = Favorite(user_id=user_id, movie_id=data.movie_id)
     db.add(item)
     db.commit()
+    _after_favorites_added(db, user_id, [data.movie_id], [data.movie_id])
     return {"message": "Added to favorites"}
+
+
+@router.post("/bulk")
+def bulk_add_to_watchlist(
+    data: WatchlistBulk,
+    user_id=Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    movie_ids = _bulk_ids(data)
+    if not movie_ids:
+        return {"added": 0, "skipped": 0}
+
+    # One INSERT ... SELECT: unknown movie ids never match, existing favorites hit the primary key.
+    existing_movies = select(literal(user_id), Movie.movie_id).where(Movie.movie_id.in_(movie_ids))
+    insert = upsert_insert(db)
+    if insert is not None:
+        statement = insert(Favorite.__table__).from_select(["user_id", "movie_id"], existing_movies)
+        statement = statement.on_conflict_do_nothing(index_elements=["user_id", "movie_id"])
+        added_ids = list(db.execute(statement.returning(Favorite.movie_id)).scalars())
+    else:
+        # No RETURNING: pick the new ids first; IGNORE absorbs a concurrent add of the same one.
+        already = select(Favorite.movie_id).where(Favorite.user_id == user_id)
+        new_movies = select(Movie.movie_id).where(Movie.movie_id.in_(movie_ids), Movie.movie_id.not_in(already))
+        added_ids = list(db.scalars(new_movies))
+        if added_ids:
+            statement = (
+                Favorite.__table__.insert()
+                .prefix_with("IGNORE", dialect="mysql")
+                .values([{"user_id": user_id, "movie_id": movie_id} for movie_id in added_ids])
+            )
+            db.execute(statement)
+    db.commit()
+    _after_favorites_added(db, user_id, movie_ids, added_ids)
+    return {"added": len(added_ids), "skipped": len(movie_ids) - len(added_ids)}
+
+
+@router.delete("/bulk")
+def bulk_remove_from_watchlist(
+    data: WatchlistBulk,
+    user_id=Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    movie_ids = _bulk_ids(data)
+    if not movie_ids:
+        return {"removed": 0}
+    removed = (
+        db.query(Favorite)
+        .filter(Favorite.user_id == user_id, Favorite.movie_id.in_(movie_ids))
+        .delete(synchronize_session=False)
+    )
+    db.commit()
+    forget_overlay(db, user_id, movie_ids)
+    return {"removed": removed}
+
+
+@router.delete("/{movie_id}")
+def remove_from_watchlist(
+    movie_id: int,
+    user_id=Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    removed = db.query(Favorite).filter_by(user_id=user_id, movie_id=movie_id).delete()
+    if not removed:
+        raise HTTPException(status_code=404, detail="Movie not in favorites")
+    db.commit()
+    forget_overlay(db, user_id, [movie_id])
+    return {"ok": True}
+
 
 @router.get("/")
 def get_watchlist(
+    page: int = 1,
+    limit: int = 20,
     user_id=Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    return db.query(Favorite).filter_by(user_id=user_id).all()
+    safe_page = max(1, page)
+    safe_limit = min(max(1, limit), 100)
+
+    # Page the user's favorites first, then hydrate only that page (genres multiply rows).
+    favorites = (
+        select(Favorite.movie_id, Favorite.created_at)
+        .where(Favorite.user_id == user_id)
+        .order_by(Favorite.created_at.desc(), Favorite.movie_id.desc())
+        .offset((safe_page - 1) * safe_limit)
+        .limit(safe_limit + 1)
+        .subquery()
+    )
+    rows = (
+        join_card_genres(
+            db.query(*CARD_COLUMNS, favorites.c.created_at).join(
+                favorites, favorites.c.movie_id == Movie.movie_id
+            )
+        )
+        .order_by(favorites.c.created_at.desc(), favorites.c.movie_id.desc())
+        .all()
+    )
+    cards = fold_card_rows(rows)
+    added_at = {row.movie_id: row.created_at for row in rows}
+    results = [{**card, "added_at": added_at[movie_id]} for movie_id, card in cards.items()]
+    return {
+        "page": safe_page,
+        "limit": safe_limit,
+        "has_more": len(results) > safe_limit,
+        "results": results[:safe_limit],
+    }
@@ -8,6 +8,10 @@ class WatchlistCreate(BaseModel):
     movie_title: str | None = None
 
 
+class WatchlistBulk(BaseModel):
+    movie_ids: list[int]
+
+
 class AuthRegister(BaseModel):
     email: constr(min_length=1, max_length=100)
     password: constr(min_length=6, max_length=128)
@@ -24,6 +28,10 @@ class RatingCreate(BaseModel):
     rating: confloat(ge=0, le=5)
 
 
+class RatingSummaryRequest(BaseModel):
+    movie_ids: list[int]
+
+
 class MovieCreate(BaseModel):
     title: constr(min_length=1, max_length=255)
     original_title: str | None = None
@@ -0,0 +1,384 @@
+import logging
+import re
+import unicodedata
+import weakref
+
+from sqlalchemy import Integer, column, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import SQLAlchemyError
+
+from database import canonical_engine, off_event_loop
+
+# Field weights used for ranking: title hits count most, storyline least.
+TITLE_WEIGHT = 10.0
+SEARCH_KEY_WEIGHT = 10.0
+ORIGINAL_TITLE_WEIGHT = 6.0
+DESCRIPTION_WEIGHT = 2.0
+STORYLINE_WEIGHT = 1.0
+
+SQLITE_FTS_TABLE = "movies_fts"
+SEARCHABLE_COLUMNS = ("title", "search_key", "original_title", "description", "storyline")
+# (table, primary key, source column) for every persisted folded search key.
+SEARCH_KEY_SOURCES = (
+    ("movies", "movie_id", "title"),
+    ("persons", "person_id", "full_name"),
+    ("genres", "genre_id", "name"),
+)
+# Name lookups (``search_key_filter``) match word starts through a full-text index per table:
+# ``{table}_fts`` on SQLite, a ``search_vector`` column on Postgres.
+NAME_FTS_SOURCES = tuple(source for source in SEARCH_KEY_SOURCES if source[0] != "movies")
+
+logger = logging.getLogger(__name__)
+
+# Keyed by the engine itself: ids are reused once an engine is garbage collected.
+_ready_engines: weakref.WeakSet = weakref.WeakSet()
+_unsupported_engines: weakref.WeakSet = weakref.WeakSet()
+
+
+def tokenize_query(query: str) -> list[str]:
+    return re.findall(r"\w+", unicodedata.normalize("NFC", query.lower()))
+
+
+def fold_text(value: str) -> str:
+    """Lower-case, strip diacritics (including Vietnamese "đ") and collapse punctuation."""
+    value = value.lower().replace("đ", "d")
+    decomposed = unicodedata.normalize("NFKD", value)
+    stripped = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return " ".join(re.findall(r"\w+", stripped))
+
+
+def escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def backfill_search_keys(conn) -> int:
+    """Fill ``search_key`` for rows written before the column existed; returns rows updated."""
+    updated = 0
+    for table, pk, source in SEARCH_KEY_SOURCES:
+        rows = conn.execute(
+            text(f"SELECT {pk}, {source} FROM {table} WHERE search_key IS NULL AND {source} IS NOT NULL")
+        ).all()
+        if rows:
+            conn.execute(
+                text(f"UPDATE {table} SET search_key = :search_key WHERE {pk} = :pk"),
+                [{"search_key": fold_text(value), "pk": row_id} for row_id, value in rows],
+            )
+            updated += len(rows)
+    return updated
+
+
+def _ensure_search_keys(conn, dialect: str) -> None:
+    """Add, index and backfill the search_key columns."""
+    lengths = {"movies": 255, "persons": 100, "genres": 50}
+    for table, _pk, _source in SEARCH_KEY_SOURCES:
+        if dialect == "sqlite":
+            columns = {row[1] for row in conn.execute(text(f"PRAGMA table_info({table})"))}
+            if "search_key" not in columns:
+                conn.execute(text(f"ALTER TABLE {table} ADD COLUMN search_key VARCHAR({lengths[table]})"))
+        else:
+            conn.execute(
+                text(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS search_key VARCHAR({lengths[table]})")
+            )
+        conn.execute(text(f"CREATE INDEX IF NOT EXISTS ix_{table}_search_key ON {table} (search_key)"))
+    backfill_search_keys(conn)
+
+    if dialect == "postgresql":
+        # Trigram indexes let "%hanh dong%" substring filters use an index; pg_trgm may be unavailable.
+        try:
+            with conn.begin_nested():
+                conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+                for table, _pk, _source in SEARCH_KEY_SOURCES:
+                    conn.execute(
+                        text(
+                            f"CREATE INDEX IF NOT EXISTS ix_{table}_search_key_trgm "
+                            f"ON {table} USING GIN (search_key gin_trgm_ops)"
+                        )
+                    )
+        except SQLAlchemyError:
+            logger.warning("pg_trgm unavailable; substring search_key filters are not indexed", exc_info=True)
+
+
+def _sqlite_statements(created: bool) -> list[str]:
+    columns = ", ".join(SEARCHABLE_COLUMNS)
+    new_values = ", ".join(f"new.{c}" for c in SEARCHABLE_COLUMNS)
+    old_values = ", ".join(f"old.{c}" for c in SEARCHABLE_COLUMNS)
+    statements = [
+        f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS {SQLITE_FTS_TABLE} USING fts5(
+            {columns},
+            content='movies',
+            content_rowid='movie_id',
+            tokenize='unicode61 remove_diacritics 2'
+        )
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {SQLITE_FTS_TABLE}_ai AFTER INSERT ON movies BEGIN
+            INSERT INTO {SQLITE_FTS_TABLE}(rowid, {columns}) VALUES (new.movie_id, {new_values});
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {SQLITE_FTS_TABLE}_ad AFTER DELETE ON movies BEGIN
+            INSERT INTO {SQLITE_FTS_TABLE}({SQLITE_FTS_TABLE}, rowid, {columns})
+            VALUES ('delete', old.movie_id, {old_values});
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {SQLITE_FTS_TABLE}_au AFTER UPDATE ON movies BEGIN
+            INSERT INTO {SQLITE_FTS_TABLE}({SQLITE_FTS_TABLE}, rowid, {columns})
+            VALUES ('delete', old.movie_id, {old_values});
+            INSERT INTO {SQLITE_FTS_TABLE}(rowid, {columns}) VALUES (new.movie_id, {new_values});
+        END
+        """,
+    ]
+    if created:
+        statements.append(f"INSERT INTO {SQLITE_FTS_TABLE}({SQLITE_FTS_TABLE}) VALUES ('rebuild')")
+    return statements
+
+
+def _sqlite_name_statements(table: str, pk: str, source: str, created: bool) -> list[str]:
+    fts = f"{table}_fts"
+    statements = [
+        f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5(
+            {source}, search_key,
+            content='{table}',
+            content_rowid='{pk}',
+            tokenize='unicode61 remove_diacritics 2'
+        )
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN
+            INSERT INTO {fts}(rowid, {source}, search_key) VALUES (new.{pk}, new.{source}, new.search_key);
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN
+            INSERT INTO {fts}({fts}, rowid, {source}, search_key)
+            VALUES ('delete', old.{pk}, old.{source}, old.search_key);
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE ON {table} BEGIN
+            INSERT INTO {fts}({fts}, rowid, {source}, search_key)
+            VALUES ('delete', old.{pk}, old.{source}, old.search_key);
+            INSERT INTO {fts}(rowid, {source}, search_key) VALUES (new.{pk}, new.{source}, new.search_key);
+        END
+        """,
+    ]
+    if created:
+        statements.append(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+    return statements
+
+
+def _postgres_statements() -> list[str]:
+    names = []
+    for table, _pk, source in NAME_FTS_SOURCES:
+        names += [
+            f"""
+            ALTER TABLE {table} ADD COLUMN IF NOT EXISTS search_vector tsvector
+            GENERATED ALWAYS AS (
+                to_tsvector('simple', coalesce({source}, '') || ' ' || coalesce(search_key, ''))
+            ) STORED
+            """,
+            f"CREATE INDEX IF NOT EXISTS ix_{table}_search_vector ON {table} USING GIN (search_vector)",
+        ]
+    return names + [
+        """
+        ALTER TABLE movies ADD COLUMN IF NOT EXISTS search_vector tsvector
+        GENERATED ALWAYS AS (
+            setweight(to_tsvector('simple', coalesce(title, '')), 'A') ||
+            setweight(to_tsvector('simple', coalesce(search_key, '')), 'A') ||
+            setweight(to_tsvector('simple', coalesce(original_title, '')), 'B') ||
+            setweight(to_tsvector('simple', coalesce(description, '')), 'C') ||
+            setweight(to_tsvector('simple', coalesce(storyline, '')), 'D')
+        ) STORED
+        """,
+        "CREATE INDEX IF NOT EXISTS ix_movies_search_vector ON movies USING GIN (search_vector)",
+    ]
+
+
+def ensure_search_index(bind: Engine) -> bool:
+    """Create the full-text index for ``bind`` once; returns False when unsupported."""
+    engine = getattr(bind, "engine", bind)
+    if engine in _ready_engines:
+        return True
+    if engine in _unsupported_engines:
+        return False
+    # The DDL runs on the blocking engine, so an async request hands it to the thread pool.
+    return off_event_loop(_build_search_index, engine)
+
+
+def _build_search_index(engine: Engine) -> bool:
+    dialect = engine.dialect.name
+    if dialect not in ("sqlite", "postgresql"):
+        _unsupported_engines.add(engine)
+        return False
+    try:
+        with engine.begin() as conn:
+            _ensure_search_keys(conn, dialect)
+            if dialect == "sqlite":
+                existing = conn.execute(
+                    text("SELECT sql FROM sqlite_master WHERE name = :name"),
+                    {"name": SQLITE_FTS_TABLE},
+                ).scalar()
+                if existing and "search_key" not in existing:
+                    # Index predates the folded search key column; rebuild it with the new layout.
+                    for suffix in ("ai", "ad", "au"):
+                        conn.execute(text(f"DROP TRIGGER IF EXISTS {SQLITE_FTS_TABLE}_{suffix}"))
+                    conn.execute(text(f"DROP TABLE {SQLITE_FTS_TABLE}"))
+                    existing = None
+                statements = _sqlite_statements(created=existing is None)
+                for table, pk, source in NAME_FTS_SOURCES:
+                    missing = not conn.execute(
+                        text("SELECT 1 FROM sqlite_master WHERE name = :name"), {"name": f"{table}_fts"}
+                    ).first()
+                    statements += _sqlite_name_statements(table, pk, source, created=missing)
+            else:
+                statements = _postgres_statements()
+            for statement in statements:
+                conn.execute(text(statement))
+    except SQLAlchemyError as exc:
+        if dialect == "sqlite" and "no such module" in str(exc):
+            # SQLite built without FTS5: fall back to substring search for good.
+            _unsupported_engines.add(engine)
+        else:
+            # Anything else (locked database, lost connection) is retried on the next call.
+            logger.warning("Full-text index setup failed; retrying on the next search", exc_info=True)
+        return False
+
+    _ready_engines.add(engine)
+    return True
+
+
+def search_key_filter(db, column, query: str):
+    """A filter on a folded ``search_key`` column.
+
+    For people and genres every word of the query must start a word of the name, served by the
+    table's full-text index. Without that index (and for movies, whose callers try
+    ``matching_movie_ids`` first) the key must contain the query; pg_trgm indexes that on Postgres.
+    """
+    folded = fold_text(query)
+    if not folded:
+        return column.isnot(None)
+    table = column.class_.__table__
+    tokens = _search_tokens(query)
+    indexed = table.name in {source[0] for source in NAME_FTS_SOURCES}
+    if tokens and indexed and ensure_search_index(canonical_engine(db)):
+        (pk,) = table.primary_key.columns
+        return pk.in_(_matching_ids(db.get_bind().dialect.name, table.name, pk.name, tokens))
+    return column.like(f"%{escape_like(folded)}%", escape="\\")
+
+
+def _search_tokens(query: str) -> list[tuple[str, str]]:
+    tokens = [(token, fold_text(token).replace(" ", "")) for token in tokenize_query(query)]
+    return [(token, folded) for token, folded in tokens if folded]
+
+
+def _match_expression(dialect: str, tokens, any_token: bool = False, titles_only: bool = False) -> str:
+    """The MATCH / to_tsquery argument requiring every token (or any, with ``any_token``) as a prefix."""
+    if dialect == "sqlite":
+        # unicode61 already strips most diacritics; folding the query also maps "đ" to "d",
+        # which then matches the search_key column.
+        terms = [f'"{folded}"*' for _token, folded in tokens]
+        match = (" OR " if any_token else " ").join(terms)
+        return f"{{title search_key}} : ({match})" if titles_only else match
+    # Title and search_key carry weight A in search_vector.
+    weight = "A" if titles_only else ""
+    terms = [
+        f"({token}:*{weight} | {folded}:*{weight})" if folded != token else f"{token}:*{weight}"
+        for token, folded in tokens
+    ]
+    return (" | " if any_token else " & ").join(terms)
+
+
+def matching_movie_ids(db, query: str, any_token: bool = False, titles_only: bool = False):
+    """``SELECT movie_id`` of the full-text matches for ``query``, or None if unavailable.
+
+    Every word must match as a prefix unless ``any_token``; ``titles_only`` leaves out the
+    original title, description and storyline.
+    """
+    tokens = _search_tokens(query)
+    if not tokens or not ensure_search_index(canonical_engine(db)):
+        return None
+    return _matching_ids(db.get_bind().dialect.name, "movies", "movie_id", tokens, any_token, titles_only)
+
+
+def _matching_ids(dialect: str, table: str, pk: str, tokens, any_token: bool = False, titles_only: bool = False):
+    if dialect == "sqlite":
+        sql = f"SELECT rowid AS {pk} FROM {table}_fts WHERE {table}_fts MATCH :fts_match"
+    else:
+        sql = f"SELECT {pk} FROM {table} WHERE search_vector @@ to_tsquery('simple', :fts_match)"
+    match = _match_expression(dialect, tokens, any_token, titles_only)
+    return text(sql).bindparams(fts_match=match).columns(column(pk, Integer))
+
+
+def rank_movie_ids(db, query: str, limit: int, offset: int = 0, with_total: bool = True):
+    """Return ``(hits, total)`` ordered by relevance, or None if full-text search is unavailable.
+
+    ``hits`` is a list of ``(movie_id, score)`` where a higher score is more relevant; ties are
+    broken by ``movie_id``. ``total`` is None when ``with_total`` is False.
+    """
+    tokens = _search_tokens(query)
+    if not tokens:
+        return None
+    bind = db.get_bind()
+    if not ensure_search_index(canonical_engine(db)):
+        return None
+
+    match = _match_expression(bind.dialect.name, tokens)
+    if bind.dialect.name == "sqlite":
+        params = {
+            "w_title": TITLE_WEIGHT,
+            "w_search_key": SEARCH_KEY_WEIGHT,
+            "w_original": ORIGINAL_TITLE_WEIGHT,
+            "w_description": DESCRIPTION_WEIGHT,
+            "w_storyline": STORYLINE_WEIGHT,
+        }
+        ranked_sql = f"""
+            SELECT rowid AS movie_id,
+                   -bm25(
+                       {SQLITE_FTS_TABLE}, :w_title, :w_search_key, :w_original, :w_description, :w_storyline
+                   ) AS score
+            FROM {SQLITE_FTS_TABLE}
+            WHERE {SQLITE_FTS_TABLE} MATCH :match
+        """
+        count_sql = f"SELECT COUNT(*) FROM {SQLITE_FTS_TABLE} WHERE {SQLITE_FTS_TABLE} MATCH :match"
+    else:
+        params = {
+            "weights": "{%s,%s,%s,%s}" % (
+                STORYLINE_WEIGHT / TITLE_WEIGHT,
+                DESCRIPTION_WEIGHT / TITLE_WEIGHT,
+                ORIGINAL_TITLE_WEIGHT / TITLE_WEIGHT,
+                1.0,
+            ),
+        }
+        ranked_sql = """
+            SELECT movie_id, ts_rank_cd(CAST(:weights AS float4[]), search_vector, q, 1) AS score
+            FROM movies, to_tsquery('simple', :match) AS q
+            WHERE search_vector @@ q
+        """
+        count_sql = "SELECT COUNT(*) FROM movies WHERE search_vector @@ to_tsquery('simple', :match)"
+
+    params.update({"match": match, "limit": limit, "offset": offset})
+    window = ", COUNT(*) OVER () AS total" if with_total else ""
+    rows = db.execute(
+        text(
+            f"""
+            SELECT movie_id, score{window}
+            FROM ({ranked_sql}) AS ranked
+            ORDER BY score DESC, movie_id ASC
+            LIMIT :limit OFFSET :offset
+            """
+        ),
+        params,
+    ).all()
+
+    if not with_total:
+        total = None
+    elif rows:
+        total = int(rows[0].total)
+    elif not offset:
+        total = 0
+    else:
+        total = int(db.execute(text(count_sql), {"match": match}).scalar() or 0)
+    return [(row.movie_id, float(row.score)) for row in rows], total
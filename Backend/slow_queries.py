@@ -0,0 +1,160 @@
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from datetime import datetime, timezone
+
+from sqlalchemy import event
+
+from config import SLOW_QUERY_EXPLAIN_ANALYZE, SLOW_QUERY_LOG_SIZE, SLOW_QUERY_MS
+
+MAX_PARAM_LENGTH = 200
+EXPLAIN_SAVEPOINT = "slow_query_explain"
+
+# The ASGI scope of the request being served; set by SlowQueryMiddleware. Routing fills in
+# ``scope["route"]`` before the endpoint runs, so statements see the matched template.
+_request_scope: ContextVar[dict | None] = ContextVar("slow_query_request_scope", default=None)
+
+
+class SlowQueryLog:
+    """The last ``size`` statements that took at least ``threshold_ms``, newest first."""
+
+    def __init__(
+        self,
+        threshold_ms: float = SLOW_QUERY_MS,
+        size: int = SLOW_QUERY_LOG_SIZE,
+        analyze: bool = SLOW_QUERY_EXPLAIN_ANALYZE,
+    ):
+        self.threshold_ms = threshold_ms
+        self.analyze = analyze
+        self._lock = threading.Lock()
+        self._entries: deque[dict] = deque(maxlen=size)
+        self.total = 0
+
+    def record(self, entry: dict) -> None:
+        with self._lock:
+            self._entries.appendleft(entry)
+            self.total += 1
+
+    def entries(self, limit: int | None = None) -> list[dict]:
+        with self._lock:
+            entries = list(self._entries)
+        return entries[:limit] if limit is not None else entries
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+slow_query_log = SlowQueryLog()
+
+
+def _jsonable(value):
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(item) for item in value]
+    if isinstance(value, dict):
+        return {str(key): _jsonable(item) for key, item in value.items()}
+    text = value if isinstance(value, str) else repr(value)
+    return text if len(text) <= MAX_PARAM_LENGTH else text[:MAX_PARAM_LENGTH] + "..."
+
+
+def _explain(conn, statement: str, parameters, executemany: bool, analyze: bool) -> str | None:
+    """The plan of ``statement`` with its bound ``parameters``, or None if it cannot be explained.
+
+    Runs on a fresh DBAPI cursor of the same connection (so the caller's result set and the
+    engine's events are untouched). ANALYZE re-executes the statement, so it is only used for
+    SELECTs; Postgres runs the EXPLAIN inside a savepoint so a failure cannot abort the request's
+    transaction.
+    """
+    if executemany:
+        return None
+    dialect = conn.dialect.name
+    if dialect == "postgresql":
+        is_select = statement.lstrip().lower().startswith(("select", "with"))
+        prefix = "EXPLAIN (ANALYZE, BUFFERS) " if analyze and is_select else "EXPLAIN "
+    elif dialect == "sqlite":
+        prefix = "EXPLAIN QUERY PLAN "
+    else:
+        return None
+    cursor = conn.connection.dbapi_connection.cursor()
+    try:
+        if dialect == "postgresql":
+            cursor.execute(f"SAVEPOINT {EXPLAIN_SAVEPOINT}")
+        try:
+            cursor.execute(prefix + statement, parameters)
+            rows = cursor.fetchall()
+        except Exception as exc:
+            if dialect == "postgresql":
+                cursor.execute(f"ROLLBACK TO SAVEPOINT {EXPLAIN_SAVEPOINT}")
+            return f"EXPLAIN failed: {exc}"
+        finally:
+            if dialect == "postgresql":
+                cursor.execute(f"RELEASE SAVEPOINT {EXPLAIN_SAVEPOINT}")
+    finally:
+        cursor.close()
+    # Postgres returns one text line per row; SQLite (id, parent, notused, detail).
+    return "\n".join(str(row[-1]) for row in rows)
+
+
+def _before_cursor_execute(conn, _cursor, _statement, _parameters, _context, _executemany):
+    conn.info.setdefault("slow_query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, _cursor, statement, parameters, _context, executemany):
+    started = conn.info.get("slow_query_started")
+    if not started:
+        return
+    elapsed_ms = (time.perf_counter() - started.pop()) * 1000
+    log = slow_query_log
+    if log.threshold_ms <= 0 or elapsed_ms < log.threshold_ms:
+        return
+    scope = _request_scope.get()
+    route = scope.get("route") if scope else None
+    log.record(
+        {
+            "at": datetime.now(timezone.utc).isoformat(),
+            "duration_ms": round(elapsed_ms, 1),
+            "statement": statement,
+            "parameters": _jsonable(parameters),
+            "method": scope["method"] if scope else None,
+            "route": getattr(route, "path", None),
+            "path": scope["path"] if scope else None,
+            "plan": _explain(conn, statement, parameters, executemany, log.analyze),
+        }
+    )
+
+
+def _handle_error(context):
+    # The failed statement never reaches after_cursor_execute.
+    started = context.connection.info.get("slow_query_started") if context.connection is not None else None
+    if started:
+        started.pop()
+
+
+def install(*engines) -> None:
+    """Time every statement on ``engines`` (None entries are skipped) against the slow-query threshold."""
+    for bind in engines:
+        if bind is None or event.contains(bind, "before_cursor_execute", _before_cursor_execute):
+            continue
+        event.listen(bind, "before_cursor_execute", _before_cursor_execute)
+        event.listen(bind, "after_cursor_execute", _after_cursor_execute)
+        event.listen(bind, "handle_error", _handle_error)
+
+
+class SlowQueryMiddleware:
+    """Tags slow statements with the request (method, route template, path) that ran them."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        token = _request_scope.set(scope)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _request_scope.reset(token)
@@ -0,0 +1,181 @@
+import heapq
+import threading
+
+from config import SUGGEST_INDEX_TTL_SECONDS
+from database import EngineLocal
+from models import Movie, Person
+from search import fold_text
+
+MIN_FUZZY_SIMILARITY = 0.3
+# Most entries the typo fallback scores per lookup.
+MAX_FUZZY_CANDIDATES = 2000
+
+
+def trigrams(value: str) -> set[str]:
+    padded = f"  {value} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class _TrieNode:
+    __slots__ = ("children", "keys")
+
+    def __init__(self):
+        self.children: dict[str, _TrieNode] = {}
+        self.keys: set = set()
+
+
+class SuggestIndex:
+    """In-memory prefix trie plus trigram index over movie titles and person names."""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._root = _TrieNode()
+        self._trigrams: dict[str, set] = {}
+        self._entries: dict[tuple[str, int], dict] = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _add(self, key, label: str, weight: float, payload: dict):
+        folded = fold_text(label)
+        if not folded:
+            return
+        grams = trigrams(folded)
+        self._entries[key] = {
+            "folded": folded,
+            "grams": grams,
+            "weight": weight,
+            "payload": payload,
+        }
+        for word in set(folded.split()):
+            node = self._root
+            for ch in word:
+                node = node.children.setdefault(ch, _TrieNode())
+                node.keys.add(key)
+        for gram in grams:
+            self._trigrams.setdefault(gram, set()).add(key)
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if not entry:
+            return
+        for word in set(entry["folded"].split()):
+            path = []
+            node = self._root
+            for ch in word:
+                child = node.children.get(ch)
+                if child is None:
+                    break
+                path.append((node, ch, child))
+                child.keys.discard(key)
+                node = child
+            for parent, ch, child in reversed(path):
+                if child.keys or child.children:
+                    break
+                del parent.children[ch]
+        for gram in entry["grams"]:
+            keys = self._trigrams.get(gram)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._trigrams[gram]
+
+    def upsert_movie(self, movie: Movie):
+        key = ("movie", movie.movie_id)
+        payload = {
+            "type": "movie",
+            "id": movie.movie_id,
+            "label": movie.title,
+            "year": movie.release_date.year if movie.release_date else None,
+            "poster_url": movie.poster_url,
+        }
+        with self._lock:
+            self._remove(key)
+            self._add(key, movie.title, float(movie.imdb_vote_count or 0), payload)
+
+    def remove_movie(self, movie_id: int):
+        with self._lock:
+            self._remove(("movie", movie_id))
+
+    def upsert_person(self, person: Person):
+        key = ("person", person.person_id)
+        payload = {
+            "type": "person",
+            "id": person.person_id,
+            "label": person.full_name,
+            "avatar_url": person.avatar_url,
+        }
+        with self._lock:
+            self._remove(key)
+            self._add(key, person.full_name, 0.0, payload)
+
+    def remove_person(self, person_id: int):
+        with self._lock:
+            self._remove(("person", person_id))
+
+    def _prefix_keys(self, word: str) -> set:
+        node = self._root
+        for ch in word:
+            node = node.children.get(ch)
+            if node is None:
+                return set()
+        return node.keys
+
+    def _rank_key(self, key, folded: str):
+        entry = self._entries[key]
+        return (not entry["folded"].startswith(folded), -entry["weight"], len(entry["folded"]))
+
+    def _fuzzy(self, folded: str, exclude: set, limit: int) -> list:
+        grams = trigrams(folded)
+        shared: dict = {}
+        # Rarest grams first; once the candidate pool is full, common grams only add to the
+        # overlap of candidates already found instead of walking their whole posting list.
+        for gram in sorted(grams, key=lambda g: len(self._trigrams.get(g, ()))):
+            postings = self._trigrams.get(gram, ())
+            if len(shared) >= MAX_FUZZY_CANDIDATES and len(postings) > len(shared):
+                for key in shared:
+                    if key in postings:
+                        shared[key] += 1
+                continue
+            for key in postings:
+                if key in shared:
+                    shared[key] += 1
+                elif len(shared) < MAX_FUZZY_CANDIDATES:
+                    shared[key] = 1
+        fuzzy = []
+        for key, count in shared.items():
+            if key in exclude:
+                continue
+            entry_grams = self._entries[key]["grams"]
+            similarity = count / (len(grams) + len(entry_grams) - count)
+            if similarity >= MIN_FUZZY_SIMILARITY:
+                fuzzy.append((similarity, self._entries[key]["weight"], key))
+        return [key for _, _, key in heapq.nlargest(limit, fuzzy, key=lambda item: (item[0], item[1]))]
+
+    def lookup(self, query: str, limit: int = 8) -> list[dict]:
+        folded = fold_text(query)
+        if not folded:
+            return []
+        with self._lock:
+            # Walk the smallest prefix set and probe the others; the node sets are never copied.
+            keysets = sorted((self._prefix_keys(word) for word in set(folded.split())), key=len)
+            smallest, others = keysets[0], keysets[1:]
+            matches = (key for key in smallest if all(key in keys for keys in others))
+            ranked = heapq.nsmallest(limit, matches, key=lambda k: self._rank_key(k, folded))
+
+            if len(ranked) < limit:
+                ranked.extend(self._fuzzy(folded, set(ranked), limit - len(ranked)))
+
+            return [dict(self._entries[key]["payload"]) for key in ranked]
+
+
+def build_suggest_index(db) -> SuggestIndex:
+    index = SuggestIndex()
+    for movie in db.query(Movie).yield_per(1000):
+        index.upsert_movie(movie)
+    for person in db.query(Person).yield_per(1000):
+        index.upsert_person(person)
+    return index
+
+
+suggest_indexes = EngineLocal(build_suggest_index, ttl=SUGGEST_INDEX_TTL_SECONDS)
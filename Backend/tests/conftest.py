@@ -0,0 +1,87 @@
+from datetime import datetime
+
+import pytest
+from fastapi.testclient import TestClient
+from jose import jwt
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from config import JWT_ALGORITHM, JWT_SECRET
+from database import Base
+from deps import get_db
+from main import app
+from models import Movie, User, UserRole
+
+
+def auth(user_id):
+    return {"Authorization": f"Bearer {jwt.encode({'user_id': user_id}, JWT_SECRET, algorithm=JWT_ALGORITHM)}"}
+
+
+def token_for(db_session, role):
+    user = User(username=role.value, email=f"{role.value}@example.com", password_hash="x", role=role)
+    db_session.add(user)
+    db_session.commit()
+    return auth(user.user_id)
+
+
+def count_statements(engine):
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    return statements
+
+
+def make_movies(db, count):
+    movies = [Movie(title=f"Movie {i}") for i in range(count)]
+    db.add_all(movies)
+    db.commit()
+    return [movie.movie_id for movie in movies]
+
+
+@pytest.fixture()
+def engine(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'test.db'}", connect_args={"check_same_thread": False}
+    )
+    Base.metadata.create_all(bind=engine)
+    return engine
+
+
+@pytest.fixture()
+def SessionLocal(engine):
+    return sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+@pytest.fixture()
+def db_session(SessionLocal):
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+@pytest.fixture()
+def client(db_session):
+    def override_get_db():
+        try:
+            yield db_session
+        finally:
+            pass
+
+    app.dependency_overrides[get_db] = override_get_db
+    with TestClient(app) as test_client:
+        yield test_client
+    app.dependency_overrides.clear()
+
+
+@pytest.fixture()
+def admin_headers(db_session):
+    return token_for(db_session, UserRole.admin)
+
+
+@pytest.fixture()
+def user_id(db_session):
+    user = User(username="viewer", email="viewer@example.com", password_hash="x", created_at=datetime.utcnow())
+    db_session.add(user)
+    db_session.commit()
+    return user.user_id
@@ -0,0 +1,69 @@
+import asyncio
+import threading
+
+import pytest
+from sqlalchemy import create_engine
+
+pytest.importorskip("greenlet")
+pytest.importorskip("aiosqlite")
+
+from sqlalchemy.ext.asyncio import AsyncSession  # noqa: E402
+
+from database import Base, EngineLocal, alias_engine, canonical_engine, create_async_database_engine  # noqa: E402
+from models import Genre  # noqa: E402
+from routers.genres import _list_genres  # noqa: E402
+from search import ensure_search_index  # noqa: E402
+
+
+def test_async_session_runs_sync_queries_and_shares_engine_state(tmp_path):
+    url = f"sqlite:///{tmp_path / 'async.db'}"
+    engine = create_engine(url)
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(Genre.__table__.insert(), [{"name": "Drama"}, {"name": "Comedy"}])
+
+    async_engine = create_async_database_engine(url)
+    assert async_engine.url.drivername == "sqlite+aiosqlite"
+    alias_engine(async_engine.sync_engine, engine)
+    built = []
+    state = EngineLocal(lambda db: built.append(canonical_engine(db)) or object())
+
+    async def read():
+        async with AsyncSession(async_engine) as db:
+            genres = await db.run_sync(_list_genres, None)
+            first = await db.run_sync(state.get)
+            second = await db.run_sync(state.get)
+            return genres, first is second
+
+    genres, shared = asyncio.run(read())
+    asyncio.run(async_engine.dispose())
+    assert [genre["name"] for genre in genres] == ["Comedy", "Drama"]
+    assert shared and built == [engine]
+
+
+def test_async_builds_and_index_setup_run_in_the_thread_pool(tmp_path):
+    url = f"sqlite:///{tmp_path / 'async.db'}"
+    engine = create_engine(url)
+    Base.metadata.create_all(bind=engine)
+    async_engine = create_async_database_engine(url)
+    alias_engine(async_engine.sync_engine, engine)
+    threads = []
+
+    def build(db):
+        threads.append(threading.get_ident())
+        assert canonical_engine(db) is engine
+        return object()
+
+    state = EngineLocal(build)
+
+    async def read():
+        async with AsyncSession(async_engine) as db:
+            first = await db.run_sync(state.get)
+            second = await db.run_sync(state.get)
+            ready = await db.run_sync(lambda sync_db: ensure_search_index(canonical_engine(sync_db)))
+            return threading.get_ident(), first is second, ready
+
+    loop_thread, shared, ready = asyncio.run(read())
+    asyncio.run(async_engine.dispose())
+    assert shared and ready
+    assert len(threads) == 1 and threads[0] != loop_thread
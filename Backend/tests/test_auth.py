@@ -0,0 +1,156 @@
+from datetime import datetime, timedelta
+
+import pytest
+from jose import jwt
+from sqlalchemy import event, text
+from sqlalchemy.exc import OperationalError
+
+from config import JWT_ALGORITHM, JWT_SECRET
+from database import apply_schema
+from models import User, UserRole
+from password_hashing import PasswordHasher, hash_password, verify_password
+from principals import revoke_principal
+from routers import auth
+
+
+def test_register_then_login_round_trip(client, db_session):
+    resp = client.post("/auth/register", json={"email": "new@example.com", "password": "secret123"})
+    assert resp.status_code == 200
+    assert resp.json()["access_token"]
+    user = db_session.query(User).filter(User.email == "new@example.com").one()
+    assert verify_password("secret123", user.password_hash)
+
+    assert client.post("/auth/login", json={"email": "new@example.com", "password": "secret123"}).status_code == 200
+    assert client.post("/auth/login", json={"email": "new@example.com", "password": "wrong-pass"}).status_code == 401
+
+
+def test_login_fails_fast_when_hashing_pool_is_full(client, db_session, monkeypatch):
+    client.post("/auth/register", json={"email": "busy@example.com", "password": "secret123"})
+    hasher = PasswordHasher(workers=1, queue_limit=0)
+    monkeypatch.setattr(auth, "password_hasher", hasher)
+    assert hasher._slots.acquire(blocking=False)
+    try:
+        resp = client.post("/auth/login", json={"email": "busy@example.com", "password": "secret123"})
+    finally:
+        hasher._slots.release()
+    assert resp.status_code == 503
+    assert resp.headers["Retry-After"] == "1"
+    assert client.post("/auth/login", json={"email": "busy@example.com", "password": "secret123"}).status_code == 200
+
+
+
+def bearer(token):
+    return {"Authorization": f"Bearer {token}"}
+
+
+def user_reads(db_session):
+    statements = []
+    event.listen(db_session.get_bind(), "before_cursor_execute", lambda *args: statements.append(args[2]))
+    return lambda: [s for s in statements if "FROM users" in s]
+
+
+def test_admin_token_authorizes_without_reading_users(client, db_session):
+    db_session.add(
+        User(username="boss", email="boss@example.com", password_hash=hash_password("secret123"), role=UserRole.admin)
+    )
+    db_session.commit()
+    token = client.post("/auth/login", json={"email": "boss@example.com", "password": "secret123"}).json()["access_token"]
+    claims = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
+    assert claims["role"] == "admin"
+    assert claims["exp"] > claims["iat"]
+
+    reads = user_reads(db_session)
+    for name in ("Drama", "Comedy", "Horror"):
+        assert client.post("/genres/", json={"name": name}, headers=bearer(token)).status_code == 201
+    assert reads() == []
+
+
+def test_role_change_applies_after_revocation(client, db_session):
+    user = User(username="mod", email="mod@example.com", password_hash="x", role=UserRole.admin)
+    db_session.add(user)
+    db_session.commit()
+    user_id = user.user_id
+    # Tokens issued before role claims existed still work; their role is read once and cached.
+    legacy = jwt.encode({"user_id": user_id}, JWT_SECRET, algorithm=JWT_ALGORITHM)
+
+    reads = user_reads(db_session)
+    assert client.post("/genres/", json={"name": "Drama"}, headers=bearer(legacy)).status_code == 201
+    assert client.post("/genres/", json={"name": "Comedy"}, headers=bearer(legacy)).status_code == 201
+    assert len(reads()) == 1
+
+    db_session.query(User).filter(User.user_id == user_id).update({User.role: UserRole.user})
+    db_session.commit()
+    revoke_principal(db_session, user_id)
+    assert client.post("/genres/", json={"name": "Horror"}, headers=bearer(legacy)).status_code == 403
+
+
+def test_role_changes_and_deletions_revoke_on_commit(client, db_session):
+    mod = User(username="mod", email="mod@example.com", password_hash="x", role=UserRole.admin)
+    gone = User(username="gone", email="gone@example.com", password_hash="x", role=UserRole.admin)
+    db_session.add_all([mod, gone])
+    db_session.commit()
+    tokens = {
+        user.user_id: jwt.encode({"user_id": user.user_id}, JWT_SECRET, algorithm=JWT_ALGORITHM) for user in (mod, gone)
+    }
+    for token in tokens.values():
+        assert client.post("/genres/", json={"name": "Drama"}, headers=bearer(token)).status_code == 201
+
+    mod.full_name = "Moderator"
+    db_session.commit()
+    assert client.post("/genres/", json={"name": "Drama"}, headers=bearer(tokens[mod.user_id])).status_code == 201
+
+    mod.role = UserRole.user
+    db_session.delete(gone)
+    db_session.commit()
+    for token in tokens.values():
+        assert client.post("/genres/", json={"name": "Comedy"}, headers=bearer(token)).status_code == 403
+
+
+def test_schema_is_set_when_the_session_first_queries(db_session):
+    statements = []
+    event.listen(db_session.get_bind(), "before_cursor_execute", lambda *args: statements.append(args[2]))
+    db_session.info["schema"] = "catalog"
+    apply_schema(db_session)
+    assert statements == []
+
+    # SQLite has no search_path; the SET failing proves it runs first, inside the transaction.
+    with pytest.raises(OperationalError):
+        db_session.execute(text("SELECT 1"))
+    assert statements == ["SET search_path TO catalog, public"]
+
+
+def test_expired_token_is_rejected(client, db_session):
+    expired = jwt.encode(
+        {"user_id": 1, "role": "admin", "exp": datetime.utcnow() - timedelta(minutes=1)},
+        JWT_SECRET,
+        algorithm=JWT_ALGORITHM,
+    )
+    assert client.get("/watchlist/", headers=bearer(expired)).status_code == 401
+
+
+def test_build_username_picks_lowest_free_suffix_in_one_query(db_session):
+    taken = ["nguyen", "nguyen2", "nguyen3", "nguyen5", "nguyen1", "nguyen04", "nguyenvan", "nguyxn"]
+    db_session.add_all(User(username=name, email=f"{name}@old.example.com", password_hash="x") for name in taken)
+    db_session.commit()
+
+    reads = user_reads(db_session)
+    assert auth.build_username(db_session, "nguyen@example.com") == "nguyen4"
+    assert len(reads()) == 1
+    assert auth.build_username(db_session, "nguyen_van@example.com") == "nguyen_van"
+
+
+def test_register_retries_when_username_is_taken_concurrently(client, db_session, monkeypatch):
+    db_session.add(User(username="lan", email="lan@old.example.com", password_hash="x"))
+    db_session.commit()
+    real_build = auth.build_username
+    calls = []
+
+    def stale_build(db, email, exclude=(), spread=1):
+        # The first attempt behaves as if "lan" was still free when it was read.
+        calls.append(list(exclude))
+        return "lan" if len(calls) == 1 else real_build(db, email, exclude)
+
+    monkeypatch.setattr(auth, "build_username", stale_build)
+    assert client.post("/auth/register", json={"email": "lan@example.com", "password": "secret123"}).status_code == 200
+    assert calls == [[], ["lan"]]
+    assert db_session.query(User.username).filter(User.email == "lan@example.com").scalar() == "lan2"
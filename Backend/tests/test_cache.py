@@ -0,0 +1,195 @@
+import asyncio
+import shutil
+import socketserver
+import ssl
+import subprocess
+import threading
+import time
+
+import pytest
+from sqlalchemy.util.concurrency import greenlet_spawn
+
+from cache import CatalogCache, MemoryBackend, RedisBackend, catalog_cache
+from conftest import count_statements
+from models import Genre, Movie
+
+
+class _RespStandIn(socketserver.StreamRequestHandler):
+    """Just enough of the Redis protocol (GET/SET PX/INCR) to exercise RedisBackend."""
+
+    def _reply(self, value):
+        if value is None:
+            self.wfile.write(b"$-1\r\n")
+        elif isinstance(value, int):
+            self.wfile.write(b":%d\r\n" % value)
+        elif value == b"OK":
+            self.wfile.write(b"+OK\r\n")
+        else:
+            self.wfile.write(b"$%d\r\n%s\r\n" % (len(value), value))
+
+    def handle(self):
+        store = self.server.store
+        while True:
+            header = self.rfile.readline()
+            if not header:
+                return
+            args = []
+            for _ in range(int(header[1:])):
+                length = int(self.rfile.readline()[1:])
+                args.append(self.rfile.read(length + 2)[:-2])
+            command = args[0].upper()
+            if command == b"GET":
+                value, expires_at = store.get(args[1], (None, None))
+                if expires_at is not None and expires_at < time.monotonic():
+                    value = None
+                self._reply(value)
+            elif command == b"SET":
+                expires_at = time.monotonic() + int(args[4]) / 1000 if len(args) > 4 else None
+                store[args[1]] = (args[2], expires_at)
+                self._reply(b"OK")
+            elif command == b"INCR":
+                value = int(store.get(args[1], (b"0", None))[0]) + 1
+                store[args[1]] = (str(value).encode(), None)
+                self._reply(value)
+
+
+def _serve(ssl_context=None):
+    server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), _RespStandIn)
+    server.daemon_threads = True
+    server.store = {}
+    if ssl_context is not None:
+        server.socket = ssl_context.wrap_socket(server.socket, server_side=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+@pytest.fixture()
+def redis_url():
+    server = _serve()
+    yield f"redis://127.0.0.1:{server.server_address[1]}/0"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture()
+def certificate(tmp_path):
+    if shutil.which("openssl") is None:
+        pytest.skip("openssl is not installed")
+    cert, key = tmp_path / "cert.pem", tmp_path / "key.pem"
+    subprocess.run(
+        [
+            "openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+            "-keyout", str(key), "-out", str(cert),
+            "-subj", "/CN=localhost", "-addext", "subjectAltName=DNS:localhost",
+        ],
+        check=True,
+        capture_output=True,
+    )
+    return cert, key
+
+
+def test_memory_backend_evicts_least_recently_used_and_expires():
+    backend = MemoryBackend(max_entries=2)
+    backend.set("a", b"1", ttl=60)
+    backend.set("b", b"2", ttl=60)
+    assert backend.get("a") == b"1"
+    backend.set("c", b"3", ttl=60)
+    assert backend.get("b") is None
+    assert backend.get("a") == b"1"
+
+    backend.set("d", b"4", ttl=-1)
+    assert backend.get("d") is None
+
+
+def test_genre_list_is_read_through_and_invalidated_by_admin_writes(client, db_session, engine, admin_headers):
+    db_session.add(Genre(name="Drama"))
+    db_session.commit()
+    assert [g["name"] for g in client.get("/genres/").json()] == ["Drama"]
+
+    statements = count_statements(engine)
+    assert [g["name"] for g in client.get("/genres/").json()] == ["Drama"]
+    assert statements == []
+
+    client.post("/genres/", json={"name": "Action"}, headers=admin_headers)
+    assert [g["name"] for g in client.get("/genres/").json()] == ["Action", "Drama"]
+
+
+def test_movie_detail_is_cached_until_the_movie_changes(client, db_session, engine, admin_headers):
+    movie = Movie(title="Heat")
+    db_session.add(movie)
+    db_session.commit()
+    movie_id = movie.movie_id
+    client.get(f"/movies/{movie_id}")
+
+    before = catalog_cache.snapshot()["hits"]
+    statements = count_statements(engine)
+    assert client.get(f"/movies/{movie_id}").json()["title"] == "Heat"
+    assert statements == []
+    assert catalog_cache.snapshot()["hits"] == before + 1
+
+    client.put(f"/movies/{movie_id}", json={"title": "Heat (1995)"}, headers=admin_headers)
+    assert client.get(f"/movies/{movie_id}").json()["title"] == "Heat (1995)"
+
+
+def test_redis_backend_shares_entries_and_invalidations(redis_url, db_session):
+    writer = CatalogCache(RedisBackend(redis_url))
+    reader = CatalogCache(RedisBackend(redis_url))
+    calls = []
+
+    def load():
+        calls.append(1)
+        return {"value": len(calls)}
+
+    assert writer.get_or_load(db_session, "movie:1", "detail", load) == {"value": 1}
+    assert reader.get_or_load(db_session, "movie:1", "detail", load) == {"value": 1}
+    assert reader.snapshot()["hits"] == 1
+
+    writer.invalidate(db_session, "movie:1")
+    assert reader.get_or_load(db_session, "movie:1", "detail", load) == {"value": 2}
+    assert len(calls) == 2
+
+
+def test_rediss_url_speaks_tls(certificate):
+    cert, key = certificate
+    server_context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    server_context.load_cert_chain(cert, key)
+    server = _serve(server_context)
+    try:
+        url = f"rediss://localhost:{server.server_address[1]}/0"
+        backend = RedisBackend(url, ssl_context=ssl.create_default_context(cafile=str(cert)))
+        backend.set("key", b"value", ttl=60)
+        assert backend.get("key") == b"value"
+
+        # The default context verifies against the system store, which does not know this CA.
+        with pytest.raises(ssl.SSLError):
+            RedisBackend(url).get("key")
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_redis_round_trips_leave_the_event_loop(redis_url):
+    backend = RedisBackend(redis_url)
+    threads = []
+    blocking_command = backend._blocking_command
+
+    def record(*args):
+        threads.append(threading.get_ident())
+        return blocking_command(*args)
+
+    backend._blocking_command = record
+
+    async def read():
+        # ``AsyncSession.run_sync`` runs the sync query code the same way.
+        await greenlet_spawn(backend.set, "key", b"value", 60)
+        return threading.get_ident(), await greenlet_spawn(backend.get, "key")
+
+    loop_thread, value = asyncio.run(read())
+    assert value == b"value"
+    assert threads and loop_thread not in threads
+
+
+def test_unreachable_redis_falls_back_to_loader(db_session):
+    cache = CatalogCache(RedisBackend("redis://127.0.0.1:1/0"))
+    assert cache.get_or_load(db_session, "genres", "", lambda: ["Drama"]) == ["Drama"]
+    assert cache.snapshot()["errors"] == 1
@@ -0,0 +1,141 @@
+import time
+from datetime import date
+from types import SimpleNamespace
+
+import pytest
+
+import database
+from config import FACET_INDEX_TTL_SECONDS
+from facets import FacetIndex, _bitmap, _iter_bits
+from models import Genre, Movie, MovieGenre
+
+
+@pytest.fixture()
+def catalog(db_session):
+    action = Genre(name="Action")
+    drama = Genre(name="Drama")
+    db_session.add_all([action, drama])
+    db_session.flush()
+    rows = [
+        ("Heat", 1995, 170, 8.3, "R", [action, drama]),
+        ("Speed", 1994, 116, 7.3, "R", [action]),
+        ("Up", 2009, 96, 8.3, "PG", [drama]),
+        ("Tenet", 2020, 150, 7.3, "PG-13", [action]),
+    ]
+    for title, year, minutes, score, age, genres in rows:
+        movie = Movie(
+            title=title,
+            release_date=date(year, 1, 1),
+            duration_minutes=minutes,
+            imdb_score=score,
+            age_rating=age,
+        )
+        db_session.add(movie)
+        db_session.flush()
+        for genre in genres:
+            db_session.add(MovieGenre(movie_id=movie.movie_id, genre_id=genre.genre_id))
+    db_session.commit()
+
+
+def titles(body):
+    return [m["title"] for m in body["results"]]
+
+
+def test_discover_filters_and_sorts(client, catalog):
+    body = client.get(
+        "/movies/discover",
+        params={"genres": ["action"], "year_from": 1990, "year_to": 2000, "sort": "title"},
+    ).json()
+    assert titles(body) == ["Heat", "Speed"]
+    assert body["total_results"] == 2
+
+    body = client.get("/movies/discover", params={"min_score": 8, "sort": "year"}).json()
+    assert titles(body) == ["Up", "Heat"]
+
+    body = client.get(
+        "/movies/discover", params={"duration_min": 100, "age_ratings": ["R", "PG-13"]}
+    ).json()
+    assert sorted(titles(body)) == ["Heat", "Speed", "Tenet"]
+
+
+def test_discover_requires_every_selected_genre(client, catalog):
+    body = client.get("/movies/discover", params={"genres": ["Action", "Drama"]}).json()
+    assert titles(body) == ["Heat"]
+    assert body["results"][0]["genres"] == ["Action", "Drama"]
+
+
+def test_discover_facet_counts_ignore_their_own_filter(client, catalog):
+    body = client.get(
+        "/movies/discover", params={"genres": ["Action"], "age_ratings": ["R"]}
+    ).json()
+    assert body["total_results"] == 2
+    assert body["facets"]["genres"] == {"Action": 2, "Drama": 1}
+    assert body["facets"]["age_ratings"] == {"PG-13": 1, "R": 2}
+    assert body["facets"]["years"] == {"1994": 1, "1995": 1}
+    assert body["facets"]["durations"] == {"90-119": 1, "150+": 1}
+
+
+def test_bitmaps_round_trip_slots():
+    slots = [0, 7, 8, 63, 64, 1000]
+    assert _bitmap(slots) == sum(1 << slot for slot in slots)
+    assert list(_iter_bits(_bitmap(slots))) == slots
+    assert list(_iter_bits(0)) == []
+
+
+def test_bulk_load_matches_incremental_upserts():
+    movies = []
+    for i in range(1, 301):
+        movie = Movie(
+            movie_id=i,
+            title=f"Movie {i}",
+            release_date=date(1990 + i % 30, 1, 1),
+            duration_minutes=80 + i % 90,
+            imdb_score=5 + (i % 50) / 10,
+        )
+        movies.append((movie, ["Drama"] if i % 3 else ["Action"]))
+    loaded = FacetIndex()
+    loaded.load(movies)
+    upserted = FacetIndex()
+    for movie, genre_names in movies:
+        upserted.upsert_movie(movie, genre_names)
+
+    for params in ({}, {"genres": ["action"], "sort": "title", "offset": 40}, {"year_from": 2000, "min_score": 7}):
+        assert loaded.discover(**params) == upserted.discover(**params)
+    page = loaded.discover(sort="votes", descending=False, offset=290, limit=20)
+    assert len(page["results"]) == 10 and page["total_results"] == 300
+
+
+def test_discover_rejects_unknown_sort(client, catalog):
+    assert client.get("/movies/discover", params={"sort": "random"}).status_code == 400
+
+
+def test_discover_tracks_admin_writes(client, catalog, admin_headers):
+    assert client.get("/movies/discover", params={"genres": ["Horror"]}).json()["total_results"] == 0
+    resp = client.post(
+        "/movies/", json={"title": "Alien", "imdb_score": 8.5, "genres": ["Horror"]}, headers=admin_headers
+    )
+    movie_id = resp.json()["movie_id"]
+    assert titles(client.get("/movies/discover", params={"genres": ["horror"]}).json()) == ["Alien"]
+
+    client.put(f"/movies/{movie_id}", json={"imdb_score": 6.0}, headers=admin_headers)
+    body = client.get("/movies/discover", params={"genres": ["horror"], "min_score": 8}).json()
+    assert body["total_results"] == 0
+
+    client.delete(f"/movies/{movie_id}", headers=admin_headers)
+    assert client.get("/movies/discover", params={"genres": ["horror"]}).json()["total_results"] == 0
+
+
+def test_discover_index_is_rebuilt_after_its_ttl(client, db_session, catalog, monkeypatch):
+    assert client.get("/movies/discover", params={"genres": ["Drama"]}).json()["total_results"] == 2
+    # Written by the CSV importer or another worker, which never touch this worker's bitmaps.
+    movie = Movie(title="Rocky", imdb_score=8.1)
+    db_session.add(movie)
+    db_session.flush()
+    drama = db_session.query(Genre).filter_by(name="Drama").one()
+    db_session.add(MovieGenre(movie_id=movie.movie_id, genre_id=drama.genre_id))
+    db_session.commit()
+    assert client.get("/movies/discover", params={"genres": ["Drama"]}).json()["total_results"] == 2
+
+    later = time.monotonic() + FACET_INDEX_TTL_SECONDS + 1
+    monkeypatch.setattr(database, "time", SimpleNamespace(monotonic=lambda: later))
+    assert client.get("/movies/discover", params={"genres": ["Drama"]}).json()["total_results"] == 3
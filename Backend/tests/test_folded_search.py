@@ -0,0 +1,118 @@
+import pytest
+from sqlalchemy import create_engine, text
+
+import search
+from database import Base
+from models import Genre, Movie, Person
+from routers.chatbot import search_movies
+from search import ensure_search_index, fold_text, search_key_filter
+
+
+def test_fold_text_strips_vietnamese_diacritics():
+    assert fold_text("Phim Hành Động!") == "phim hanh dong"
+    assert fold_text("ĐIỂM") == "diem"
+
+
+def test_search_key_follows_name_changes(db_session):
+    movie = Movie(title="Bố Già")
+    db_session.add(movie)
+    db_session.commit()
+    assert movie.search_key == "bo gia"
+
+    movie.title = "Mắt Biếc"
+    db_session.commit()
+    assert movie.search_key == "mat biec"
+
+
+@pytest.mark.parametrize("query", ["phim hanh dong", "phim hành động", "PHIM HÀNH ĐỘNG"])
+def test_lists_match_folded_and_accented_queries(client, db_session, query):
+    db_session.add_all(
+        [
+            Movie(title="Phim Hành Động Mỹ"),
+            Genre(name="Phim Hành Động"),
+            Person(full_name="Phim Hành Động"),
+            Movie(title="Other"),
+        ]
+    )
+    db_session.commit()
+
+    search = client.get("/movies/search", params={"query": query}).json()
+    assert [m["title"] for m in search["results"]] == ["Phim Hành Động Mỹ"]
+    assert [g["name"] for g in client.get("/genres/", params={"query": query}).json()] == ["Phim Hành Động"]
+    assert [p["full_name"] for p in client.get("/people/", params={"query": query}).json()] == ["Phim Hành Động"]
+
+
+def test_ensure_search_index_backfills_existing_rows(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO persons (full_name) VALUES ('Trấn Thành')"))
+
+    assert ensure_search_index(engine)
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT search_key FROM persons")).scalar() == "tran thanh"
+
+
+def test_people_and_genres_match_the_start_of_any_word(client, db_session):
+    db_session.add_all(
+        [
+            Person(full_name="Christopher Nolan"),
+            Person(full_name="Nolanda Smith"),
+            Person(full_name="Manolan Ray"),
+            Genre(name="Science Fiction"),
+            Genre(name="Fictional Drama"),
+            Genre(name="Nonfiction"),
+        ]
+    )
+    db_session.commit()
+
+    people = client.get("/people/", params={"query": "nolan"}).json()
+    assert [p["full_name"] for p in people] == ["Christopher Nolan", "Nolanda Smith"]
+    people = client.get("/people/", params={"query": "chris nol"}).json()
+    assert [p["full_name"] for p in people] == ["Christopher Nolan"]
+    genres = client.get("/genres/", params={"query": "fiction"}).json()
+    assert [g["name"] for g in genres] == ["Fictional Drama", "Science Fiction"]
+
+
+def test_name_search_uses_the_full_text_index(db_session):
+    db_session.add(Person(full_name="Christopher Nolan"))
+    db_session.commit()
+
+    condition = search_key_filter(db_session, Person.search_key, "nolan")
+    statement = db_session.query(Person).filter(condition).statement.compile(compile_kwargs={"literal_binds": True})
+    plan = [row[-1] for row in db_session.execute(text(f"EXPLAIN QUERY PLAN {statement}"))]
+    assert any("persons_fts VIRTUAL TABLE" in step for step in plan)
+    assert "SCAN persons" not in plan
+
+
+def test_without_full_text_names_fall_back_to_escaped_substrings(db_session, engine, monkeypatch):
+    db_session.add_all([Person(full_name="Al_Pacino"), Person(full_name="Alx Pacino"), Person(full_name="Sal Al_")])
+    db_session.commit()
+    monkeypatch.setattr(search, "_unsupported_engines", {engine})
+    monkeypatch.setattr(search, "_ready_engines", set())
+
+    condition = search_key_filter(db_session, Person.search_key, "al_")
+    assert sorted(p.full_name for p in db_session.query(Person).filter(condition)) == ["Al_Pacino", "Sal Al_"]
+    condition = search_key_filter(db_session, Person.search_key, "pacino")
+    assert db_session.query(Person).filter(condition).count() == 2
+
+
+def test_title_list_and_chatbot_use_the_full_text_index(client, db_session, admin_headers):
+    db_session.add_all(
+        [
+            Movie(title="The Dark Knight", description="Gotham"),
+            Movie(title="Gotham Nights"),
+            Movie(title="Heat", storyline="A heist in Los Angeles"),
+        ]
+    )
+    db_session.commit()
+
+    listed = client.get("/movies", params={"query": "gotham"}, headers=admin_headers).json()
+    assert [m["title"] for m in listed["results"]] == ["Gotham Nights"]
+    listed = client.get("/movies", params={"query": "knight"}, headers=admin_headers).json()
+    assert [m["title"] for m in listed["results"]] == ["The Dark Knight"]
+    assert sorted(m.title for m in search_movies(db_session, "gotham heist")) == [
+        "Gotham Nights",
+        "Heat",
+        "The Dark Knight",
+    ]
@@ -0,0 +1,70 @@
+import time
+from types import SimpleNamespace
+
+import database
+from config import HOMEPAGE_FEED_TTL_SECONDS
+from conftest import count_statements
+from models import HomepageSettings, Movie
+
+
+def test_feed_is_empty_without_settings(client):
+    body = client.get("/homepage/feed").json()
+    assert body["hero"] is None
+    assert [rail["movies"] for rail in body["rails"]] == [[], [], []]
+
+
+def test_feed_hydrates_hero_and_rails_and_is_served_from_memory(client, engine, db_session, admin_headers):
+    movies = [Movie(title=title, cover_url=f"{title}.jpg") for title in ("Heat", "Alien", "Up")]
+    db_session.add_all(movies)
+    db_session.commit()
+    heat, alien, up = (m.movie_id for m in movies)
+
+    client.put(
+        "/homepage/",
+        json={
+            "hero_movie_id": alien,
+            "hero_tagline": "In space...",
+            "top_ten_title": "Top 10",
+            "top_ten_ids": [up, 999, heat],
+            "new_arrivals_ids": [alien],
+        },
+        headers=admin_headers,
+    )
+
+    statements = count_statements(engine)
+    body = client.get("/homepage/feed").json()
+    assert statements == []
+
+    assert body["hero"]["title"] == "Alien"
+    assert body["hero"]["tagline"] == "In space..."
+    assert body["hero"]["cover_url"] == "Alien.jpg"
+    top_ten = body["rails"][0]
+    assert top_ten["title"] == "Top 10"
+    assert [m["title"] for m in top_ten["movies"]] == ["Up", "Heat"]
+    assert [m["title"] for m in body["rails"][2]["movies"]] == ["Alien"]
+
+
+def test_feed_is_rebuilt_after_movie_writes(client, db_session, admin_headers):
+    movie = Movie(title="Heat")
+    db_session.add(movie)
+    db_session.commit()
+    movie_id = movie.movie_id
+    client.put("/homepage/", json={"top_ten_ids": [movie_id]}, headers=admin_headers)
+
+    client.put(f"/movies/{movie_id}", json={"title": "Heat (1995)"}, headers=admin_headers)
+    assert client.get("/homepage/feed").json()["rails"][0]["movies"][0]["title"] == "Heat (1995)"
+
+    client.delete(f"/movies/{movie_id}", headers=admin_headers)
+    assert client.get("/homepage/feed").json()["rails"][0]["movies"] == []
+
+
+def test_feed_expires_so_other_workers_writes_show_up(client, db_session, monkeypatch):
+    assert client.get("/homepage/feed").json()["rails"][0]["title"] is None
+    # Written through another worker, which only discards its own snapshot.
+    db_session.add(HomepageSettings(top_ten_title="Top 10"))
+    db_session.commit()
+    assert client.get("/homepage/feed").json()["rails"][0]["title"] is None
+
+    later = time.monotonic() + HOMEPAGE_FEED_TTL_SECONDS + 1
+    monkeypatch.setattr(database, "time", SimpleNamespace(monotonic=lambda: later))
+    assert client.get("/homepage/feed").json()["rails"][0]["title"] == "Top 10"
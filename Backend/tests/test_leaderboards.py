@@ -0,0 +1,89 @@
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+import database
+from config import LEADERBOARD_TTL_SECONDS
+from conftest import auth
+from leaderboards import TRENDING_HALF_LIFE, Leaderboards
+from models import Favorite, Movie
+
+
+def make_movie(db, title, imdb_score=None, imdb_vote_count=None):
+    movie = Movie(title=title, imdb_score=imdb_score, imdb_vote_count=imdb_vote_count)
+    db.add(movie)
+    db.commit()
+    return movie.movie_id
+
+
+def titles(resp):
+    return [card["title"] for card in resp.json()["results"]]
+
+
+def test_top_weights_scores_by_vote_count(client, db_session):
+    make_movie(db_session, "Niche", 9.5, 3)
+    make_movie(db_session, "Classic", 8.6, 200_000)
+    make_movie(db_session, "Average", 6.0, 50_000)
+    make_movie(db_session, "Unscored")
+
+    resp = client.get("/leaderboards/top")
+    assert titles(resp) == ["Classic", "Niche", "Average"]
+    assert resp.json()["results"][0]["rank"] == 1
+
+
+def test_ratings_and_favorites_update_boards_incrementally(client, db_session, user_id):
+    first = make_movie(db_session, "First", 7.0, 100)
+    second = make_movie(db_session, "Second", 7.0, 100)
+    assert titles(client.get("/leaderboards/trending")) == []
+    client.get("/leaderboards/top")
+
+    client.post("/ratings/", json={"movie_id": second, "rating": 5}, headers=auth(user_id))
+    assert titles(client.get("/leaderboards/top")) == ["Second", "First"]
+    assert titles(client.get("/leaderboards/trending")) == ["Second"]
+
+    client.post("/watchlist/bulk", json={"movie_ids": [first]}, headers=auth(user_id))
+    trending = client.get("/leaderboards/trending").json()["results"]
+    assert [card["movie_id"] for card in trending] == [first, second]
+    assert trending[0]["trending_score"] == pytest.approx(2.0, rel=1e-3)
+
+
+def test_trending_build_decays_older_events(client, db_session, user_id):
+    old = make_movie(db_session, "Old Buzz")
+    fresh = make_movie(db_session, "Fresh Buzz")
+    ancient = make_movie(db_session, "Ancient Buzz")
+    now = datetime.utcnow()
+    db_session.add(Favorite(user_id=user_id, movie_id=old, created_at=now - timedelta(days=6)))
+    db_session.add(Favorite(user_id=user_id, movie_id=fresh, created_at=now - timedelta(hours=1)))
+    db_session.add(Favorite(user_id=user_id, movie_id=ancient, created_at=now - timedelta(days=60)))
+    db_session.commit()
+
+    trending = client.get("/leaderboards/trending").json()["results"]
+    assert [card["title"] for card in trending] == ["Fresh Buzz", "Old Buzz"]
+    assert trending[1]["trending_score"] == pytest.approx(0.5, rel=1e-3)
+
+
+def test_boards_are_rebuilt_after_their_ttl(client, db_session, monkeypatch):
+    make_movie(db_session, "Classic", 8.6, 200_000)
+    assert titles(client.get("/leaderboards/top")) == ["Classic"]
+    # Imported, or rated through another worker: this worker's boards never saw it.
+    make_movie(db_session, "Masterpiece", 9.3, 2_000_000)
+    assert titles(client.get("/leaderboards/top")) == ["Classic"]
+
+    later = time.monotonic() + LEADERBOARD_TTL_SECONDS + 1
+    monkeypatch.setattr(database, "time", SimpleNamespace(monotonic=lambda: later))
+    assert titles(client.get("/leaderboards/top")) == ["Masterpiece", "Classic"]
+
+
+def test_trending_order_is_stable_as_time_passes():
+    epoch = datetime(2024, 1, 1)
+    boards = Leaderboards(0.0, 100.0, epoch)
+    for movie_id in (1, 2):
+        boards.upsert_movie(Movie(movie_id=movie_id, title=f"Movie {movie_id}"))
+    boards.record_favorite(1, at=epoch)
+    boards.record_favorite(2, at=epoch + TRENDING_HALF_LIFE)
+
+    later = boards.trending(2, now=epoch + 2 * TRENDING_HALF_LIFE)
+    assert [card["movie_id"] for card in later] == [2, 1]
+    assert [card["trending_score"] for card in later] == [pytest.approx(1.0), pytest.approx(0.5)]
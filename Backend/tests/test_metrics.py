@@ -0,0 +1,97 @@
+import re
+
+from sqlalchemy import text
+
+import metrics
+from config import OMDB_API_KEY
+from models import Genre
+from routers import external
+
+
+def sample(body: str, name: str, **labels) -> float | None:
+    for line in body.splitlines():
+        match = re.match(r"(\w+)(?:\{(.*)\})? (\S+)$", line)
+        if not match or match.group(1) != name:
+            continue
+        found = dict(re.findall(r'(\w+)="((?:[^"\\]|\\.)*)"', match.group(2) or ""))
+        if all(found.get(key) == value for key, value in labels.items()):
+            return float(match.group(3))
+    return None
+
+
+def test_requests_are_counted_by_route_template(client, db_session):
+    db_session.add(Genre(name="Drama"))
+    db_session.commit()
+    before = client.get("/metrics").text
+    count_before = sample(before, "http_request_duration_seconds_count", method="GET", route="/genres/") or 0
+
+    assert client.get("/genres/").status_code == 200
+    assert client.get("/movies/999999").status_code == 404
+    assert client.get("/no-such-page").status_code == 404
+    resp = client.get("/metrics")
+
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/plain")
+    body = resp.text
+    assert "# TYPE http_request_duration_seconds histogram" in body
+    assert sample(body, "http_request_duration_seconds_count", method="GET", route="/genres/") == count_before + 1
+    assert sample(body, "http_request_duration_seconds_bucket", method="GET", route="/genres/", le="+Inf") == count_before + 1
+    assert sample(body, "http_responses_total", method="GET", route="/movies/{movie_id}", status="404") >= 1
+    assert sample(body, "http_responses_total", method="GET", route="unmatched", status="404") >= 1
+    # The scrape itself is in flight while the body is rendered.
+    assert sample(body, "http_requests_in_flight") == 1
+
+
+def test_pool_gauges_and_checkout_time(engine):
+    metrics.instrument_engine(engine, "test-pool")
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+            body = metrics.render()
+            assert sample(body, "db_pool_checked_out", pool="test-pool") == 1
+        body = metrics.render()
+        assert sample(body, "db_pool_checked_out", pool="test-pool") == 0
+        assert sample(body, "db_pool_overflow", pool="test-pool") == 0
+        assert sample(body, "db_pool_size", pool="test-pool") == engine.pool.size()
+        assert sample(body, "db_pool_checkout_seconds_count", pool="test-pool") == 1
+    finally:
+        metrics._pools.pop("test-pool")
+
+
+class FakeResponse:
+    ok = True
+    status_code = 200
+    text = ""
+
+    def json(self):
+        return {"Title": "Inception"}
+
+
+def test_upstream_calls_are_timed_by_outcome(client, monkeypatch):
+    if not OMDB_API_KEY:
+        monkeypatch.setattr(external, "OMDB_API_KEY", "test-key")
+    before = metrics.render()
+    ok_before = sample(before, "upstream_request_duration_seconds_count", upstream="omdb", outcome="200") or 0
+    failed_before = sample(before, "upstream_request_duration_seconds_count", upstream="omdb", outcome="error") or 0
+
+    monkeypatch.setattr(external.requests, "get", lambda *args, **kwargs: FakeResponse())
+    assert client.get("/external/omdb", params={"t": "Inception"}).json() == {"Title": "Inception"}
+
+    def unreachable(*args, **kwargs):
+        raise external.requests.ConnectionError()
+
+    monkeypatch.setattr(external.requests, "get", unreachable)
+    assert client.get("/external/omdb", params={"t": "Inception"}).status_code == 502
+
+    body = metrics.render()
+    assert sample(body, "upstream_request_duration_seconds_count", upstream="omdb", outcome="200") == ok_before + 1
+    assert sample(body, "upstream_request_duration_seconds_count", upstream="omdb", outcome="error") == failed_before + 1
+
+
+def test_label_values_are_escaped():
+    histogram = metrics.Histogram("example_seconds", "Example.", ("route",), buckets=(1.0,))
+    histogram.observe(0.5, 'a"b\\c')
+    lines = histogram.render()
+    assert 'example_seconds_bucket{route="a\\"b\\\\c",le="1.0"} 1' in lines
+    assert 'example_seconds_bucket{route="a\\"b\\\\c",le="+Inf"} 1' in lines
+    assert 'example_seconds_count{route="a\\"b\\\\c"} 1' in lines
@@ -0,0 +1,77 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from database import Base
+from migrations import MIGRATIONS, applied_versions, migrate
+from query_plans import check_query_plans
+
+SECONDARY_INDEXES = [
+    ("movie_genres", "ix_movie_genres_genre_id"),
+    ("movie_cast", "ix_movie_cast_person_id"),
+    ("ratings", "ix_ratings_movie_id"),
+    ("favorites", "ix_favorites_movie_id"),
+    ("genres", "ix_genres_name_lower"),
+    ("persons", "ix_persons_full_name_lower"),
+    ("movies", "ix_movies_title_lower"),
+    ("movies", "ix_movies_title_id"),
+]
+
+
+@pytest.fixture()
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'migrations.db'}")
+    Base.metadata.create_all(bind=engine)
+    return engine
+
+
+def index_names(engine, table):
+    # The inspector skips expression indexes such as lower(name) on SQLite.
+    with engine.connect() as conn:
+        rows = conn.exec_driver_sql("SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = ?", (table,))
+        return {name for (name,) in rows}
+
+
+def test_migrate_adds_indexes_to_existing_tables_once(engine):
+    with engine.begin() as conn:
+        for _table, index in SECONDARY_INDEXES:
+            conn.exec_driver_sql(f"DROP INDEX {index}")
+
+    assert migrate(engine) == [version for version, _, _ in MIGRATIONS]
+    for table, index in SECONDARY_INDEXES:
+        assert index in index_names(engine, table)
+    assert migrate(engine) == []
+    assert applied_versions(engine) == {version for version, _, _ in MIGRATIONS}
+
+
+def test_query_plan_check_reports_scans_over_the_size_threshold(engine):
+    with engine.begin() as conn:
+        conn.exec_driver_sql("DROP INDEX ix_ratings_movie_id")
+    with sessionmaker(bind=engine)() as db:
+        report = {entry["query"]: entry for entry in check_query_plans(db, 0)}
+        assert report["ratings: summary"]["violations"] == ["ratings"]
+        # Empty tables are below any positive threshold.
+        assert all(not entry["violations"] for entry in check_query_plans(db, 1))
+
+    migrate(engine)
+    # A new engine: pooled SQLite connections keep plans prepared before the index existed.
+    with sessionmaker(bind=create_engine(engine.url))() as db:
+        assert [entry for entry in check_query_plans(db, 0) if entry["scans"]] == []
+
+
+def test_query_plan_check_runs_the_routers_searches(engine):
+    migrate(engine)
+    with sessionmaker(bind=create_engine(engine.url))() as db:
+        report = {entry["query"]: entry for entry in check_query_plans(db, 0)}
+    for label in ("genres: search", "people: search", "movies: search", "movies: admin list", "chatbot: search"):
+        assert report[label]["scans"] == [], label
+
+
+def test_query_plan_check_catches_a_sorted_title_listing(engine):
+    migrate(engine)
+    with sessionmaker(bind=create_engine(engine.url))() as db:
+        assert {entry["query"]: entry for entry in check_query_plans(db, 0)}["movies: title page"]["scans"] == []
+    with engine.begin() as conn:
+        conn.exec_driver_sql("DROP INDEX ix_movies_title_id")
+    with sessionmaker(bind=create_engine(engine.url))() as db:
+        assert {entry["query"]: entry for entry in check_query_plans(db, 0)}["movies: title page"]["scans"] == ["movies"]
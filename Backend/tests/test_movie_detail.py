@@ -0,0 +1,137 @@
+import csv
+
+import pytest
+
+import import_movies_csv
+from conftest import count_statements
+from models import CastRole, Genre, Movie, MovieCast, MovieGenre, Person
+
+
+@pytest.fixture()
+def movie(db_session):
+    movie = Movie(title="Inception")
+    genres = [Genre(name="Sci-Fi"), Genre(name="Action")]
+    nolan = Person(full_name="Christopher Nolan")
+    leo = Person(full_name="Leonardo DiCaprio")
+    db_session.add_all([movie, *genres, nolan, leo])
+    db_session.flush()
+    for genre in genres:
+        db_session.add(MovieGenre(movie_id=movie.movie_id, genre_id=genre.genre_id))
+    db_session.add_all(
+        [
+            MovieCast(movie_id=movie.movie_id, person_id=nolan.person_id, role=CastRole.Director),
+            MovieCast(movie_id=movie.movie_id, person_id=nolan.person_id, role=CastRole.Writer),
+            MovieCast(
+                movie_id=movie.movie_id,
+                person_id=leo.person_id,
+                role=CastRole.Actor,
+                character_name="Cobb",
+            ),
+        ]
+    )
+    db_session.commit()
+    return movie
+
+
+def test_detail_embeds_genres_and_cast_in_one_query(client, engine, movie):
+    movie_id = movie.movie_id
+    statements = count_statements(engine)
+    resp = client.get(f"/movies/{movie_id}")
+    assert resp.status_code == 200
+    assert len(statements) == 1
+
+    body = resp.json()
+    assert body["genres"] == ["Action", "Sci-Fi"]
+    assert [p["full_name"] for p in body["cast"]["directors"]] == ["Christopher Nolan"]
+    assert [p["full_name"] for p in body["cast"]["writers"]] == ["Christopher Nolan"]
+    assert body["cast"]["actors"] == [
+        {
+            "person_id": body["cast"]["actors"][0]["person_id"],
+            "full_name": "Leonardo DiCaprio",
+            "character_name": "Cobb",
+            "avatar_url": None,
+        }
+    ]
+
+
+def test_detail_revalidation_returns_304_without_queries(client, engine, movie):
+    movie_id = movie.movie_id
+    etag = client.get(f"/movies/{movie_id}").headers["ETag"]
+    assert not etag.startswith("W/")
+
+    statements = count_statements(engine)
+    resp = client.get(f"/movies/{movie_id}", headers={"If-None-Match": etag})
+    assert resp.status_code == 304
+    assert resp.content == b""
+    assert statements == []
+
+
+def test_detail_etag_changes_after_admin_writes(client, db_session, movie, admin_headers):
+    headers = admin_headers
+    first = client.get(f"/movies/{movie.movie_id}").headers["ETag"]
+
+    client.put(f"/movies/{movie.movie_id}", json={"title": "Inception (2010)"}, headers=headers)
+    second = client.get(f"/movies/{movie.movie_id}", headers={"If-None-Match": first})
+    assert second.status_code == 200
+    assert second.headers["ETag"] != first
+
+    person = db_session.query(Person).filter(Person.full_name == "Leonardo DiCaprio").one()
+    client.put(f"/people/{person.person_id}", json={"full_name": "Leo DiCaprio"}, headers=headers)
+    third = client.get(f"/movies/{movie.movie_id}", headers={"If-None-Match": second.headers["ETag"]})
+    assert third.status_code == 200
+    assert third.json()["cast"]["actors"][0]["full_name"] == "Leo DiCaprio"
+
+
+def test_detail_etag_changes_when_the_importer_updates_a_movie(
+    client, engine, SessionLocal, db_session, movie, tmp_path, monkeypatch
+):
+    monkeypatch.setattr(import_movies_csv, "engine", engine)
+    monkeypatch.setattr(import_movies_csv, "SessionLocal", SessionLocal)
+    path = tmp_path / "movies.csv"
+
+    def write(description):
+        with path.open("w", newline="", encoding="utf-8") as handle:
+            writer = csv.DictWriter(handle, fieldnames=sorted(import_movies_csv.EXPECTED_COLUMNS))
+            writer.writeheader()
+            writer.writerow({"title": "Inception", "description": description})
+
+    write("Dreams within dreams.")
+    import_movies_csv.import_csv(path)
+    first = client.get(f"/movies/{movie.movie_id}")
+    assert first.json()["description"] == "Dreams within dreams."
+
+    write("A heist inside a dream.")
+    import_movies_csv.import_csv(path)
+    # The client reuses db_session across requests; a request's own session starts fresh.
+    db_session.expire_all()
+    second = client.get(f"/movies/{movie.movie_id}", headers={"If-None-Match": first.headers["ETag"]})
+    assert second.status_code == 200
+    assert second.headers["ETag"] != first.headers["ETag"]
+    assert second.json()["description"] == "A heist inside a dream."
+
+
+def test_detail_returns_404_for_missing_movie(client):
+    assert client.get("/movies/999").status_code == 404
+
+
+def test_batch_returns_cards_in_request_order_with_missing_ids(client, engine, db_session, movie):
+    other = Movie(title="Memento")
+    db_session.add(other)
+    db_session.commit()
+    ids = [other.movie_id, 999, movie.movie_id]
+
+    statements = count_statements(engine)
+    resp = client.get("/movies/batch", params={"ids": ",".join(str(i) for i in ids)})
+    assert resp.status_code == 200
+    assert len(statements) == 1
+
+    body = resp.json()
+    assert [card["title"] for card in body["results"]] == ["Memento", "Inception"]
+    assert body["results"][1]["genres"] == ["Action", "Sci-Fi"]
+    assert body["missing_ids"] == [999]
+
+
+def test_batch_rejects_bad_ids(client):
+    assert client.get("/movies/batch", params={"ids": "1,abc"}).status_code == 400
+    too_many = ",".join(str(i) for i in range(1, 400))
+    assert client.get("/movies/batch", params={"ids": too_many}).status_code == 400
@@ -0,0 +1,61 @@
+import user_overlay
+from conftest import auth, count_statements, make_movies
+from models import Favorite
+
+
+def test_overlay_reports_watchlist_and_own_rating(client, db_session, user_id):
+    first, second, third = make_movies(db_session, 3)
+    client.post("/watchlist/add", json={"movie_id": first}, headers=auth(user_id))
+    client.post("/ratings/", json={"movie_id": second, "rating": 4.5}, headers=auth(user_id))
+
+    resp = client.get("/me/overlay", params={"ids": f"{first},{second},{third}"}, headers=auth(user_id))
+    assert resp.status_code == 200
+    assert resp.json()["results"] == [
+        {"movie_id": first, "in_watchlist": True, "user_rating": None},
+        {"movie_id": second, "in_watchlist": False, "user_rating": 4.5},
+        {"movie_id": third, "in_watchlist": False, "user_rating": None},
+    ]
+
+
+def test_overlay_is_cached_until_the_user_writes(client, db_session, engine, user_id):
+    movie_ids = make_movies(db_session, 2)
+    # A long watchlist outside the requested page must not be read.
+    extra = make_movies(db_session, 50)
+    db_session.add_all(Favorite(user_id=user_id, movie_id=movie_id) for movie_id in extra)
+    db_session.commit()
+    ids = ",".join(map(str, movie_ids))
+    client.get("/me/overlay", params={"ids": ids}, headers=auth(user_id))
+
+    statements = count_statements(engine)
+    client.get("/me/overlay", params={"ids": ids}, headers=auth(user_id))
+    assert statements == []
+
+    client.post("/ratings/", json={"movie_id": movie_ids[1], "rating": 2.0}, headers=auth(user_id))
+    statements.clear()
+    body = client.get("/me/overlay", params={"ids": ids}, headers=auth(user_id)).json()
+    assert body["results"][1]["user_rating"] == 2.0
+    assert len(statements) == 1
+
+
+def test_rows_loaded_across_a_write_are_not_kept(client, db_session, user_id, monkeypatch):
+    (movie_id,) = make_movies(db_session, 1)
+    load = user_overlay._load_overlay_rows
+
+    def load_then_write(db, user_id, movie_ids):
+        # The read finishes just before the user's watchlist add commits and forgets the id.
+        rows = load(db, user_id, movie_ids)
+        client.post("/watchlist/add", json={"movie_id": movie_id}, headers=auth(user_id))
+        return rows
+
+    monkeypatch.setattr(user_overlay, "_load_overlay_rows", load_then_write)
+    body = client.get("/me/overlay", params={"ids": str(movie_id)}, headers=auth(user_id)).json()
+    assert body["results"][0]["in_watchlist"] is False
+
+    monkeypatch.setattr(user_overlay, "_load_overlay_rows", load)
+    body = client.get("/me/overlay", params={"ids": str(movie_id)}, headers=auth(user_id)).json()
+    assert body["results"][0]["in_watchlist"] is True
+
+
+def test_overlay_requires_auth_and_valid_ids(client, user_id):
+    assert client.get("/me/overlay", params={"ids": "1"}).status_code in (401, 403)
+    assert client.get("/me/overlay", params={"ids": "1,x"}, headers=auth(user_id)).status_code == 400
@@ -0,0 +1,120 @@
+import threading
+import time
+
+import pytest
+
+import profiling
+from conftest import token_for
+from models import UserRole
+from routers import chatbot as chatbot_router
+from routers import genres as genres_router
+
+
+@pytest.fixture()
+def SessionLocal(SessionLocal, monkeypatch):
+    # The middleware checks the caller's role before any dependency runs.
+    monkeypatch.setattr(profiling, "SessionLocal", SessionLocal)
+    return SessionLocal
+
+
+def spin(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+def fake_generate(_question, _movies):
+    spin(0.1)
+    return "ok"
+
+
+def stacks_of(client, headers, resp) -> list[str]:
+    profile_id = resp.headers["X-Profile-Id"]
+    body = client.get(f"/health/profiles/{profile_id}", headers=headers).text
+    return [line.rsplit(" ", 1)[0] for line in body.splitlines()]
+
+
+def test_admin_flag_profiles_a_thread_pool_endpoint(client, db_session, monkeypatch):
+    admin = token_for(db_session, UserRole.admin)
+    monkeypatch.setattr(chatbot_router, "search_movies", lambda _db, _q: [])
+    monkeypatch.setattr(chatbot_router, "generate_llm_answer", fake_generate)
+
+    resp = client.post("/chatbot/chat?question=inception", headers={**admin, "X-Profile": "1"})
+
+    assert resp.status_code == 200
+    assert resp.json() == {"answer": "ok"}
+    stacks = stacks_of(client, admin, resp)
+    spinning = [stack for stack in stacks if "fake_generate" in stack]
+    assert spinning
+    # Await chain from the middleware down, then the worker thread running the sync endpoint.
+    frames = spinning[0].split(";")
+    assert frames[0].startswith("ProfilerMiddleware.__call__ (profiling.py:")
+    assert any(frame.startswith("chat (routers/chatbot.py:") for frame in frames)
+    assert frames[-1].startswith("spin (")
+
+    summary = client.get("/health/profiles", headers=admin).json()["profiles"][0]
+    assert summary["id"] == resp.headers["X-Profile-Id"]
+    assert summary["method"] == "POST"
+    assert summary["path"] == "/chatbot/chat"
+    assert summary["status"] == 200
+    assert summary["samples"] > 0
+
+
+def test_query_flag_follows_run_db_into_the_thread_pool(client, db_session, monkeypatch):
+    admin = token_for(db_session, UserRole.admin)
+
+    def slow_list_genres(_db, _query):
+        spin(0.05)
+        return []
+
+    monkeypatch.setattr(genres_router, "_list_genres", slow_list_genres)
+
+    resp = client.get("/genres/?_profile=1", headers=admin)
+
+    assert resp.json() == []
+    stacks = stacks_of(client, admin, resp)
+    assert any("list_genres (routers/genres.py:" in stack and "slow_list_genres" in stack for stack in stacks)
+
+
+def test_sampler_is_joined_off_the_event_loop(client, db_session, monkeypatch):
+    admin = token_for(db_session, UserRole.admin)
+    joined_on = []
+    join = profiling.Sampler.join
+
+    def record_join(sampler, timeout=None):
+        joined_on.append(threading.get_ident() == sampler.loop_thread)
+        join(sampler, timeout)
+
+    monkeypatch.setattr(profiling.Sampler, "join", record_join)
+
+    resp = client.get("/genres/", headers={**admin, "X-Profile": "1"})
+
+    assert "X-Profile-Id" in resp.headers
+    assert joined_on == [False]
+
+
+def test_flag_is_ignored_without_an_admin_token(client, db_session, monkeypatch):
+    user = token_for(db_session, UserRole.user)
+    monkeypatch.setattr(chatbot_router, "search_movies", lambda _db, _q: [])
+    monkeypatch.setattr(chatbot_router, "generate_llm_answer", lambda _q, _m: "ok")
+
+    for headers in ({"X-Profile": "1"}, {**user, "X-Profile": "1"}, {"X-Profile": "1", "Authorization": "Bearer junk"}):
+        resp = client.post("/chatbot/chat?question=x", headers=headers)
+        assert resp.status_code == 200
+        assert "X-Profile-Id" not in resp.headers
+
+
+def test_unknown_profile_is_404(client, db_session):
+    admin = token_for(db_session, UserRole.admin)
+    assert client.get("/health/profiles/missing", headers=admin).status_code == 404
+    assert client.get("/health/profiles").status_code in (401, 403)
+
+
+def test_store_keeps_the_newest_profiles():
+    store = profiling.ProfileStore(keep=2)
+    profiles = [profiling.Profile("GET", f"/{i}", 0.001) for i in range(3)]
+    for profile in profiles:
+        store.add(profile)
+
+    assert store.get(profiles[0].id) is None
+    assert [summary["path"] for summary in store.summaries()] == ["/2", "/1"]
@@ -0,0 +1,126 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from conftest import auth
+from deps import get_db
+from main import app
+from models import CastRole, Genre, Movie, MovieCast, MovieGenre, Person, User, UserRole
+from query_stats import QueryStatsMiddleware, assert_max_queries
+from search import ensure_search_index
+
+
+@pytest.fixture()
+def engine(engine):
+    # One-time full-text setup is not part of any request's budget.
+    ensure_search_index(engine)
+    return engine
+
+
+@pytest.fixture()
+def catalog(db_session):
+    admin = User(username="admin", email="admin@example.com", password_hash="x", role=UserRole.admin)
+    genres = [Genre(name=name) for name in ("Drama", "Comedy", "Horror")]
+    people = [Person(full_name=f"Person {i}") for i in range(3)]
+    movies = [Movie(title=f"Movie {i}", imdb_score=7, imdb_vote_count=100 * i) for i in range(5)]
+    db_session.add_all([admin, *genres, *people, *movies])
+    db_session.commit()
+    for movie in movies:
+        db_session.add_all(MovieGenre(movie_id=movie.movie_id, genre_id=genre.genre_id) for genre in genres)
+        db_session.add_all(
+            MovieCast(movie_id=movie.movie_id, person_id=person.person_id, role=CastRole.Actor) for person in people
+        )
+    db_session.commit()
+    return {
+        "admin": admin.user_id,
+        "movies": [movie.movie_id for movie in movies],
+    }
+
+
+# (method, path, json body, budget). Budgets are for a cold request; most reads are then served
+# from the catalog cache or an in-memory index. Raise one only with a reason in the commit.
+READ_BUDGETS = [
+    ("GET", "/genres/", None, 1),
+    ("GET", "/genres/?query=dra", None, 1),
+    ("GET", "/people/", None, 1),
+    ("GET", "/people/?query=pers", None, 1),
+    ("GET", "/homepage/", None, 1),
+    ("GET", "/homepage/feed", None, 2),
+    ("GET", "/movies/1", None, 1),
+    ("GET", "/movies/batch?ids=1,2,3,4,5", None, 1),
+    ("GET", "/movies/search?query=movie", None, 3),
+    ("GET", "/movies/suggest?q=mov", None, 2),
+    ("GET", "/movies/suggest?q=mvoie", None, 2),
+    ("GET", "/movies/discover?genres=Drama", None, 2),
+    ("GET", "/movies/discover?genres=Drama&sort=score", None, 2),
+    ("GET", "/leaderboards/top", None, 4),
+    ("GET", "/leaderboards/trending", None, 4),
+    ("POST", "/ratings/summary", {"movie_ids": [1, 2, 3, 4, 5]}, 1),
+]
+
+
+@pytest.mark.parametrize("method, path, body, budget", READ_BUDGETS)
+def test_read_query_budgets(client, engine, catalog, method, path, body, budget):
+    with assert_max_queries(engine, budget):
+        resp = client.request(method, path, json=body)
+    assert resp.status_code == 200
+
+
+# (path, budget) for reads that need a signed-in caller. They are sent with the admin's token,
+# so the admin-only routes include the one principal lookup.
+SIGNED_IN_READ_BUDGETS = [
+    ("/me/overlay?ids=1,2,3,4,5", 1),
+    ("/watchlist/", 1),
+    ("/ratings/1", 3),
+    ("/movies?limit=2", 3),
+    ("/movies?query=movie", 3),
+    ("/movies/1/genres", 2),
+    ("/movies/1/cast", 2),
+]
+
+
+@pytest.mark.parametrize("path, budget", SIGNED_IN_READ_BUDGETS)
+def test_signed_in_read_query_budgets(client, engine, catalog, path, budget):
+    headers = auth(catalog["admin"])
+    with assert_max_queries(engine, budget):
+        resp = client.get(path, headers=headers)
+    assert resp.status_code == 200
+
+
+def test_movie_writes_resolve_genres_in_one_lookup(client, engine, catalog):
+    headers = auth(catalog["admin"])
+    # One SELECT for all named genres (it used to be one per genre) plus an INSERT per new genre.
+    with assert_max_queries(engine, 7):
+        resp = client.post(
+            "/movies/",
+            json={"title": "New", "genres": ["drama", "Comedy", "Horror", "Noir", "Western"]},
+            headers=headers,
+        )
+    assert resp.status_code == 201
+    movie_id = resp.json()["movie_id"]
+
+    with assert_max_queries(engine, 7):
+        resp = client.put(f"/movies/{movie_id}", json={"genres": ["Noir", "Drama", "Musical"]}, headers=headers)
+    assert resp.status_code == 200
+
+
+def test_assert_max_queries_reports_repeated_statements(engine, catalog, db_session):
+    with pytest.raises(AssertionError, match="repeated"):
+        with assert_max_queries(engine, 2):
+            for movie_id in catalog["movies"]:
+                db_session.query(MovieGenre).filter(MovieGenre.movie_id == movie_id).all()
+
+
+def test_debug_middleware_reports_sql_count_and_time(db_session, catalog):
+    def override_get_db():
+        yield db_session
+
+    app.dependency_overrides[get_db] = override_get_db
+    try:
+        with TestClient(QueryStatsMiddleware(app)) as client:
+            resp = client.get("/movies/batch", params={"ids": "1,2"})
+            cached = client.get("/health/cache")
+    finally:
+        app.dependency_overrides.clear()
+    assert resp.headers["X-SQL-Count"] == "1"
+    assert float(resp.headers["X-SQL-Time-Ms"]) >= 0
+    assert cached.headers["X-SQL-Count"] == "0"
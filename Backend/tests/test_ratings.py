@@ -1,45 +1,14 @@
+import threading
 from datetime import datetime
 
 import pytest
-from fastapi.testclient import TestClient
 from jose import jwt
-from sqlalchemy import create_engine
+from sqlalchemy import event
 from sqlalchemy.orm import sessionmaker
 
 from config import JWT_ALGORITHM, JWT_SECRET
-from database import Base
-from deps import get_db
-from main import app
-from models import Movie, User
-
-
-@pytest.fixture()
-def db_session(tmp_path):
-    db_path = tmp_path / "ratings.db"
-    engine = create_engine(
-        f"sqlite:///{db_path}", connect_args={"check_same_thread": False}
-    )
-    Base.metadata.create_all(bind=engine)
-    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-
-@pytest.fixture()
-def client(db_session):
-    def override_get_db():
-        try:
-            yield db_session
-        finally:
-            pass
-
-    app.dependency_overrides[get_db] = override_get_db
-    with TestClient(app) as test_client:
-        yield test_client
-    app.dependency_overrides.clear()
+from models import Movie, MovieRatingStats, Rating, User
+from rating_stats import find_drift, normalize_rating, rebuild_rating_stats, upsert_rating
 
 
 def make_token(user_id: int) -> str:
@@ -169,3 +138,130 @@ def test_get_rating_returns_404_when_movie_missing(client, db_session):
     token = make_token(user.user_id)
     resp = client.get("/ratings/999", headers={"Authorization": f"Bearer {token}"})
     assert resp.status_code == 404
+
+
+def test_rating_aggregate_tracks_overwrites_without_rescanning(client, db_session):
+    users = [create_user(db_session, f"user{i}@example.com") for i in range(3)]
+    movie = create_movie(db_session, "Test Movie")
+    movie_id = movie.movie_id
+    for user, value in zip(users, (5.0, 3.0, 1.0)):
+        client.post(
+            "/ratings/",
+            json={"movie_id": movie_id, "rating": value},
+            headers={"Authorization": f"Bearer {make_token(user.user_id)}"},
+        )
+    body = client.post(
+        "/ratings/",
+        json={"movie_id": movie_id, "rating": 4.0},
+        headers={"Authorization": f"Bearer {make_token(users[2].user_id)}"},
+    ).json()
+    assert body["count"] == 3
+    assert body["average"] == pytest.approx(4.0)
+
+    stats = db_session.get(MovieRatingStats, movie_id)
+    assert float(stats.rating_sum) == pytest.approx(12.0)
+
+    statements = []
+    engine = db_session.get_bind()
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    client.get(f"/ratings/{movie_id}", headers={"Authorization": f"Bearer {make_token(users[0].user_id)}"})
+    assert not any("avg(" in statement.lower() for statement in statements)
+
+
+def test_rebuild_rating_stats_repairs_drift(db_session):
+    users = [create_user(db_session, f"user{i}@example.com") for i in range(2)]
+    movie = create_movie(db_session, "Test Movie")
+    db_session.add_all(
+        [
+            Rating(user_id=users[0].user_id, movie_id=movie.movie_id, rating=2.0),
+            Rating(user_id=users[1].user_id, movie_id=movie.movie_id, rating=3.5),
+        ]
+    )
+    db_session.commit()
+    assert [item["movie_id"] for item in find_drift(db_session)] == [movie.movie_id]
+
+    assert rebuild_rating_stats(db_session) == 1
+    db_session.commit()
+    assert find_drift(db_session) == []
+    stats = db_session.get(MovieRatingStats, movie.movie_id)
+    assert (float(stats.rating_sum), stats.rating_count) == (5.5, 2)
+
+
+def test_concurrent_ratings_keep_aggregate_consistent(db_session):
+    users = [create_user(db_session, f"user{i}@example.com") for i in range(8)]
+    movie = create_movie(db_session, "Test Movie")
+    movie_id = movie.movie_id
+    user_ids = [user.user_id for user in users]
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=db_session.get_bind())
+    errors = []
+
+    def hammer(user_id):
+        # Every user rates repeatedly: first-time inserts and overwrites race on the same row.
+        try:
+            for step in range(10):
+                with SessionLocal() as db:
+                    upsert_rating(db, user_id, movie_id, normalize_rating((user_id + step) % 6))
+                    db.commit()
+        except Exception as exc:  # pragma: no cover - surfaced by the assertion below
+            errors.append(exc)
+
+    threads = [threading.Thread(target=hammer, args=(user_id,)) for user_id in user_ids for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    db_session.expire_all()
+    stats = db_session.get(MovieRatingStats, movie_id)
+    assert stats.rating_count == len(user_ids)
+    assert find_drift(db_session) == []
+
+
+def test_rating_summary_batches_movies_with_histogram(client, db_session):
+    users = [create_user(db_session, f"user{i}@example.com") for i in range(3)]
+    user_ids = [user.user_id for user in users]
+    rated = create_movie(db_session, "Rated")
+    unrated = create_movie(db_session, "Unrated")
+    for user, value in zip(users, (4.5, 3.0, 0.2)):
+        client.post(
+            "/ratings/",
+            json={"movie_id": rated.movie_id, "rating": value},
+            headers={"Authorization": f"Bearer {make_token(user.user_id)}"},
+        )
+
+    rated_id, unrated_id = rated.movie_id, unrated.movie_id
+    statements = []
+    event.listen(db_session.get_bind(), "before_cursor_execute", lambda *args: statements.append(args[2]))
+    resp = client.post("/ratings/summary", json={"movie_ids": [unrated_id, rated_id]})
+    assert resp.status_code == 200
+    assert len(statements) == 1
+    first, second = resp.json()["results"]
+    assert first == {
+        "movie_id": unrated_id,
+        "average": 0.0,
+        "count": 0,
+        "histogram": {"0": 0, "1": 0, "2": 0, "3": 0, "4": 0, "5": 0},
+    }
+    assert second["count"] == 3
+    assert second["average"] == pytest.approx(7.7 / 3)
+    assert second["histogram"] == {"0": 1, "1": 0, "2": 0, "3": 1, "4": 0, "5": 1}
+    assert "user_rating" not in second
+
+    resp = client.post(
+        "/ratings/summary",
+        json={"movie_ids": [rated_id, unrated_id]},
+        headers={"Authorization": f"Bearer {make_token(user_ids[1])}"},
+    )
+    mine, other = resp.json()["results"]
+    assert mine["user_rating"] == pytest.approx(3.0)
+    assert other["user_rating"] is None
+
+
+def test_rating_summary_rejects_bad_token(client):
+    resp = client.post(
+        "/ratings/summary",
+        json={"movie_ids": [1]},
+        headers={"Authorization": "Bearer bad-token"},
+    )
+    assert resp.status_code == 401
@@ -0,0 +1,126 @@
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+import deps
+from conftest import auth
+from database import Base, alias_engine
+from main import app
+from models import Favorite, Genre, HomepageSettings, Movie, User, UserRole
+
+
+@pytest.fixture()
+def engines(tmp_path, monkeypatch):
+    primary, replica = (
+        create_engine(f"sqlite:///{tmp_path / name}", connect_args={"check_same_thread": False})
+        for name in ("primary.db", "replica.db")
+    )
+    for bind in (primary, replica):
+        Base.metadata.create_all(bind=bind)
+        with sessionmaker(bind=bind)() as db:
+            db.add(User(username="admin", email="admin@example.com", password_hash="x", role=UserRole.admin))
+            db.add(Genre(name="Drama"))
+            db.commit()
+    alias_engine(replica, primary, replica=True)
+    monkeypatch.setattr(deps, "SessionLocal", sessionmaker(autocommit=False, autoflush=False, bind=primary))
+    monkeypatch.setattr(deps, "ReadSessionLocal", sessionmaker(autocommit=False, autoflush=False, bind=replica))
+    return primary, replica
+
+
+def genre_names(client, **kwargs):
+    return [genre["name"] for genre in client.get("/genres/", **kwargs).json()]
+
+
+def test_reads_use_replica_until_the_client_writes(engines):
+    primary, replica = engines
+    replica_reads = []
+    event.listen(replica, "before_cursor_execute", lambda *args: replica_reads.append(args[2]))
+
+    with TestClient(app) as writer, TestClient(app) as other:
+        assert genre_names(writer) == ["Drama"]
+        assert replica_reads
+
+        resp = writer.post("/genres/", json={"name": "Comedy"}, headers=auth(1))
+        assert resp.status_code == 201
+        assert float(resp.headers[deps.PRIMARY_PIN_HEADER]) > time.time()
+        assert writer.cookies.get(deps.PRIMARY_PIN_COOKIE)
+
+        # The replica has not caught up: the writer is pinned to the primary, everyone else is not.
+        assert genre_names(writer) == ["Comedy", "Drama"]
+        assert genre_names(other) == ["Drama"]
+        pin = {deps.PRIMARY_PIN_HEADER: resp.headers[deps.PRIMARY_PIN_HEADER]}
+        assert genre_names(other, headers=pin) == ["Comedy", "Drama"]
+
+
+def test_pin_marker_is_bounded_and_only_set_by_successful_writes(engines):
+    with TestClient(app) as client:
+        forged = {deps.PRIMARY_PIN_HEADER: str(time.time() + 3600)}
+        client.post("/genres/", json={"name": "Comedy"}, headers={"Authorization": "Bearer nope"})
+        assert deps.PRIMARY_PIN_COOKIE not in client.cookies
+        client.post("/genres/", json={"name": "Comedy"}, headers=auth(1))
+        client.cookies.clear()
+        assert genre_names(client, headers=forged) == ["Drama"]
+
+
+def replicate(replica, *rows):
+    with sessionmaker(bind=replica)() as db:
+        db.add_all(rows)
+        db.commit()
+
+
+def test_replica_reads_after_a_write_are_not_cached(engines):
+    primary, replica = engines
+    with TestClient(app) as writer, TestClient(app) as other:
+        assert writer.post("/genres/", json={"name": "Comedy"}, headers=auth(1)).status_code == 201
+        assert genre_names(other) == ["Drama"]
+
+        # Once the replica has caught up (and the writer's pin has expired) nobody sees the lagging copy.
+        replicate(replica, Genre(genre_id=2, name="Comedy"))
+        writer.cookies.clear()
+        assert genre_names(writer) == ["Comedy", "Drama"]
+        assert genre_names(other) == ["Comedy", "Drama"]
+
+
+def test_snapshots_are_built_from_the_primary(engines):
+    primary, replica = engines
+    with sessionmaker(bind=primary)() as db:
+        db.add(HomepageSettings(top_ten_title="Primary picks"))
+        db.commit()
+    replica_reads = []
+    event.listen(replica, "before_cursor_execute", lambda *args: replica_reads.append(args[2]))
+
+    with TestClient(app) as client:
+        feed = client.get("/homepage/feed").json()
+
+    assert feed["rails"][0]["title"] == "Primary picks"
+    assert not any("homepage_settings" in statement for statement in replica_reads)
+
+
+def test_read_only_posts_use_the_replica_without_pinning(engines):
+    primary, replica = engines
+    replica_reads = []
+    event.listen(replica, "before_cursor_execute", lambda *args: replica_reads.append(args[2]))
+
+    with TestClient(app) as client:
+        resp = client.post("/ratings/summary", json={"movie_ids": [1]})
+
+    assert resp.status_code == 200
+    assert replica_reads
+    assert deps.PRIMARY_PIN_HEADER not in resp.headers
+    assert deps.PRIMARY_PIN_COOKIE not in client.cookies
+
+
+def test_overlay_reads_the_users_writes_from_the_primary(engines):
+    primary, replica = engines
+    for bind in (primary, replica):
+        replicate(bind, Movie(movie_id=1, title="Heat"))
+    # The favorite has not reached the replica, and the client's pin has expired.
+    replicate(primary, Favorite(user_id=1, movie_id=1))
+
+    with TestClient(app) as client:
+        body = client.get("/me/overlay", params={"ids": "1"}, headers=auth(1)).json()
+
+    assert body["results"][0]["in_watchlist"] is True
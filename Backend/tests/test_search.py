@@ -0,0 +1,141 @@
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
+
+import search
+from database import Base
+from models import Movie
+from pagination import encode_cursor
+
+
+def add_movies(db, *movies):
+    for data in movies:
+        db.add(Movie(**data))
+    db.commit()
+
+
+def test_search_ranks_title_matches_above_description_matches(client, db_session):
+    add_movies(
+        db_session,
+        {"title": "Quiet Harbor", "description": "A storm hits the coast."},
+        {"title": "Storm", "description": "A small town waits."},
+        {"title": "Unrelated", "description": "Nothing to see."},
+    )
+
+    resp = client.get("/movies/search", params={"query": "storm"})
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body["total_results"] == 2
+    assert [r["title"] for r in body["results"]] == ["Storm", "Quiet Harbor"]
+    assert body["results"][0]["score"] > body["results"][1]["score"]
+
+
+def test_search_matches_prefixes_and_all_terms(client, db_session):
+    add_movies(
+        db_session,
+        {"title": "The Dark Knight"},
+        {"title": "Dark Water"},
+        {"title": "Knight and Day"},
+    )
+
+    resp = client.get("/movies/search", params={"query": "dark kni"})
+    assert [r["title"] for r in resp.json()["results"]] == ["The Dark Knight"]
+
+
+def test_search_index_follows_updates_and_deletes(client, db_session):
+    add_movies(db_session, {"title": "Old Name"})
+    client.get("/movies/search", params={"query": "old"})
+
+    movie = db_session.query(Movie).first()
+    movie.title = "New Name"
+    db_session.commit()
+    assert client.get("/movies/search", params={"query": "old"}).json()["total_results"] == 0
+    assert client.get("/movies/search", params={"query": "new"}).json()["total_results"] == 1
+
+    db_session.delete(movie)
+    db_session.commit()
+    assert client.get("/movies/search", params={"query": "new"}).json()["total_results"] == 0
+
+
+def test_search_paginates_with_total(client, db_session):
+    add_movies(db_session, *({"title": f"Alien {i}"} for i in range(5)))
+
+    resp = client.get("/movies/search", params={"query": "alien", "page": 2, "limit": 2})
+    body = resp.json()
+    assert body["total_results"] == 5
+    assert len(body["results"]) == 2
+
+    resp = client.get("/movies/search", params={"query": "alien", "page": 9, "limit": 2})
+    body = resp.json()
+    assert body["total_results"] == 5
+    assert body["results"] == []
+
+
+def test_search_cursor_walks_all_results_without_total(client, db_session):
+    add_movies(db_session, *({"title": f"Alien {i}"} for i in range(5)))
+
+    seen = []
+    params = {"query": "alien", "limit": 2, "include_total": "false"}
+    while True:
+        body = client.get("/movies/search", params=params).json()
+        assert body["total_results"] is None
+        seen.extend(r["title"] for r in body["results"])
+        if not body["next_cursor"]:
+            break
+        params["cursor"] = body["next_cursor"]
+
+    assert sorted(seen) == [f"Alien {i}" for i in range(5)]
+    assert len(seen) == len(set(seen))
+
+
+def test_search_rejects_malformed_cursor(client):
+    resp = client.get("/movies/search", params={"query": "alien", "cursor": "not-a-cursor"})
+    assert resp.status_code == 400
+
+
+def test_transient_index_failure_is_retried(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'retry.db'}")
+    Base.metadata.create_all(bind=engine)
+    real_ensure_search_keys = search._ensure_search_keys
+    calls = []
+
+    def flaky(conn, dialect):
+        calls.append(dialect)
+        if len(calls) == 1:
+            raise OperationalError("ALTER TABLE", {}, Exception("database is locked"))
+        real_ensure_search_keys(conn, dialect)
+
+    monkeypatch.setattr(search, "_ensure_search_keys", flaky)
+
+    assert search.ensure_search_index(engine) is False
+    assert search.ensure_search_index(engine) is True
+    assert search.ensure_search_index(engine) is True
+    assert len(calls) == 2
+
+
+def test_search_cursor_with_wrong_value_types_is_rejected(client, db_session):
+    add_movies(db_session, {"title": "Alien"})
+
+    for values in (["1"], [1.5], [True], ["Alien", "7"], [None, 1]):
+        resp = client.get("/movies/search", params={"query": "alien", "cursor": encode_cursor(*values)})
+        assert resp.status_code == 400
+
+
+def test_list_movies_cursor_walks_titles_in_order(client, db_session, admin_headers):
+    titles = ["Up", "Alien", "Heat", "Alien", "Jaws"]
+    add_movies(db_session, *({"title": title} for title in titles))
+
+    seen = []
+    params = {"limit": 2, "include_total": "false"}
+    while True:
+        body = client.get("/movies", params=params, headers=admin_headers).json()
+        seen.extend((r["title"], r["movie_id"]) for r in body["results"])
+        if not body["next_cursor"]:
+            break
+        params["cursor"] = body["next_cursor"]
+
+    assert [title for title, _ in seen] == sorted(titles)
+    assert len({movie_id for _, movie_id in seen}) == len(titles)
+
+    for values in (["Alien", "2"], ["Alien"], [3, 4]):
+        resp = client.get("/movies", params={"cursor": encode_cursor(*values)}, headers=admin_headers)
+        assert resp.status_code == 400
@@ -0,0 +1,88 @@
+import time
+from collections import deque
+
+import pytest
+from sqlalchemy import event, select, text
+
+import slow_queries
+from conftest import token_for
+from models import Genre, Movie, UserRole
+
+
+@pytest.fixture()
+def engine(engine):
+    @event.listens_for(engine, "connect")
+    def add_sleep(dbapi_connection, _record):
+        dbapi_connection.create_function("sleep_ms", 1, lambda ms: time.sleep(ms / 1000) or ms)
+
+    # Reconnect so the pooled connection from create_all gets the function too.
+    engine.dispose()
+    slow_queries.install(engine)
+    return engine
+
+
+@pytest.fixture()
+def log(monkeypatch):
+    log = slow_queries.slow_query_log
+    monkeypatch.setattr(log, "threshold_ms", 50)
+    monkeypatch.setattr(log, "_entries", deque(maxlen=3))
+    monkeypatch.setattr(log, "total", 0)
+    return log
+
+
+def test_only_statements_over_the_threshold_are_kept_with_params_and_plan(db_session, log):
+    db_session.add(Movie(title="Christopher Nolan"))
+    db_session.commit()
+    db_session.execute(text("SELECT sleep_ms(1)"))
+    db_session.execute(
+        select(Movie.movie_id, text("sleep_ms(60)")).where(Movie.title.ilike("%nolan%")).select_from(Movie)
+    )
+    db_session.execute(text("SELECT sleep_ms(:ms)"), {"ms": 70})
+
+    entries = log.entries()
+    assert [entry["parameters"] for entry in entries] == [[70], ["%nolan%"]]
+    assert entries[0]["duration_ms"] >= 50
+    assert entries[0]["route"] is None
+    search = entries[1]
+    assert "lower(movies.title) LIKE lower(?)" in search["statement"]
+    assert "SCAN movies" in search["plan"]
+
+
+def test_ring_keeps_the_newest_entries(db_session, log):
+    for ms in (51, 52, 53, 54, 55):
+        db_session.execute(text("SELECT sleep_ms(:ms)"), {"ms": ms})
+
+    assert [entry["parameters"] for entry in log.entries()] == [[55], [54], [53]]
+    assert log.total == 5
+
+
+def test_entries_name_the_route_and_are_admin_only(client, db_session, log, monkeypatch):
+    db_session.add(Genre(name="Drama"))
+    db_session.commit()
+    admin = token_for(db_session, UserRole.admin)
+    user = token_for(db_session, UserRole.user)
+    # Log every statement so the genre list query is captured.
+    monkeypatch.setattr(log, "threshold_ms", 0.0001)
+
+    assert client.get("/genres/").status_code == 200
+    assert client.get("/health/slow-queries", headers=user).status_code == 403
+    resp = client.get("/health/slow-queries", headers=admin)
+
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body["threshold_ms"] == 0.0001
+    genre_list = next(entry for entry in body["entries"] if "FROM genres" in entry["statement"])
+    assert genre_list["method"] == "GET"
+    assert genre_list["route"] == "/genres/"
+    assert genre_list["plan"]
+
+    assert client.delete("/health/slow-queries", headers=admin).json() == {"ok": True}
+    # Only the admin lookup of the DELETE request itself, if any, remains.
+    assert all(entry["path"] == "/health/slow-queries" for entry in log.entries())
+
+
+def test_failed_statements_do_not_leak_timers(engine, log):
+    with engine.connect() as conn:
+        with pytest.raises(Exception):
+            conn.execute(text("SELECT * FROM no_such_table"))
+        assert conn.info["slow_query_started"] == []
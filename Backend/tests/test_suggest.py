@@ -0,0 +1,94 @@
+import time
+from datetime import date
+from types import SimpleNamespace
+
+
+import database
+import suggest
+from config import SUGGEST_INDEX_TTL_SECONDS
+from models import Movie, Person
+from suggest import SuggestIndex
+
+
+def make_movie(movie_id, title, votes=0):
+    return SimpleNamespace(
+        movie_id=movie_id,
+        title=title,
+        release_date=date(2010, 1, 1),
+        poster_url=None,
+        imdb_vote_count=votes,
+    )
+
+
+def test_lookup_matches_word_prefixes_and_prefers_popular_titles():
+    index = SuggestIndex()
+    index.upsert_movie(make_movie(1, "The Dark Knight", votes=2_000_000))
+    index.upsert_movie(make_movie(2, "Dark City", votes=200_000))
+    index.upsert_movie(make_movie(3, "Heat"))
+
+    labels = [r["label"] for r in index.lookup("dar")]
+    assert labels == ["Dark City", "The Dark Knight"]
+    assert index.lookup("dark kni")[0]["label"] == "The Dark Knight"
+
+
+def test_lookup_tolerates_typos_and_diacritics():
+    index = SuggestIndex()
+    index.upsert_movie(make_movie(1, "Interstellar"))
+    index.upsert_movie(make_movie(2, "Bố Già"))
+
+    assert [r["label"] for r in index.lookup("intersteller")] == ["Interstellar"]
+    assert [r["label"] for r in index.lookup("bo gia")] == ["Bố Già"]
+
+
+def test_typo_fallback_scans_a_bounded_candidate_pool(monkeypatch):
+    monkeypatch.setattr(suggest, "MAX_FUZZY_CANDIDATES", 50)
+    index = SuggestIndex()
+    for movie_id in range(1, 501):
+        index.upsert_movie(make_movie(movie_id, f"The Movie {movie_id}"))
+    index.upsert_movie(make_movie(1000, "Interstellar"))
+
+    # Every title shares " th"/"the"; the rare grams of the typo still reach the right entry.
+    assert [r["label"] for r in index.lookup("the intersteller")] == ["Interstellar"]
+
+
+def test_remove_and_rename_update_both_indexes():
+    index = SuggestIndex()
+    index.upsert_movie(make_movie(1, "Alien"))
+    index.upsert_movie(make_movie(1, "Aliens"))
+    assert [r["label"] for r in index.lookup("alien")] == ["Aliens"]
+
+    index.remove_movie(1)
+    assert index.lookup("alien") == []
+    assert len(index) == 0
+
+
+def test_suggest_endpoint_covers_people_and_tracks_movie_writes(client, db_session, admin_headers):
+    db_session.add(Person(full_name="Christopher Nolan"))
+    db_session.add(Movie(title="Memento"))
+    db_session.commit()
+    headers = admin_headers
+
+    body = client.get("/movies/suggest", params={"q": "nol"}).json()
+    assert [(r["type"], r["label"]) for r in body["results"]] == [("person", "Christopher Nolan")]
+
+    resp = client.post("/movies/", json={"title": "Tenet"}, headers=headers)
+    movie_id = resp.json()["movie_id"]
+    assert [r["id"] for r in client.get("/movies/suggest", params={"q": "ten"}).json()["results"]] == [movie_id]
+
+    client.put(f"/movies/{movie_id}", json={"title": "Oppenheimer"}, headers=headers)
+    assert client.get("/movies/suggest", params={"q": "tenet"}).json()["results"] == []
+
+    client.delete(f"/movies/{movie_id}", headers=headers)
+    assert client.get("/movies/suggest", params={"q": "oppen"}).json()["results"] == []
+
+
+def test_suggest_index_is_rebuilt_after_its_ttl(client, db_session, monkeypatch):
+    assert client.get("/movies/suggest", params={"q": "ten"}).json()["results"] == []
+    # Written by the CSV importer or another worker, which never touch this worker's index.
+    db_session.add(Movie(title="Tenet"))
+    db_session.commit()
+    assert client.get("/movies/suggest", params={"q": "ten"}).json()["results"] == []
+
+    later = time.monotonic() + SUGGEST_INDEX_TTL_SECONDS + 1
+    monkeypatch.setattr(database, "time", SimpleNamespace(monotonic=lambda: later))
+    assert [r["label"] for r in client.get("/movies/suggest", params={"q": "ten"}).json()["results"]] == ["Tenet"]
@@ -0,0 +1,55 @@
+from datetime import datetime
+
+from conftest import auth, count_statements, make_movies
+from models import Favorite, Genre, MovieGenre
+from routers import watchlist
+
+
+def test_bulk_add_skips_duplicates_and_unknown_movies_in_one_statement(client, db_session, engine, user_id):
+    movie_ids = make_movies(db_session, 3)
+    client.post("/watchlist/add", json={"movie_id": movie_ids[0]}, headers=auth(user_id))
+
+    statements = count_statements(engine)
+    resp = client.post("/watchlist/bulk", json={"movie_ids": movie_ids + [9999]}, headers=auth(user_id))
+    assert resp.json() == {"added": 2, "skipped": 2}
+    assert [s.split()[0] for s in statements] == ["INSERT"]
+
+    resp = client.request("DELETE", "/watchlist/bulk", json={"movie_ids": movie_ids[:2]}, headers=auth(user_id))
+    assert resp.json() == {"removed": 2}
+    assert db_session.query(Favorite).count() == 1
+
+
+def test_bulk_add_without_returning_reports_what_it_added(client, db_session, user_id, monkeypatch):
+    movie_ids = make_movies(db_session, 3)
+    client.post("/watchlist/add", json={"movie_id": movie_ids[0]}, headers=auth(user_id))
+    monkeypatch.setattr(watchlist, "upsert_insert", lambda db: None)
+
+    resp = client.post("/watchlist/bulk", json={"movie_ids": movie_ids + [9999]}, headers=auth(user_id))
+    assert resp.json() == {"added": 2, "skipped": 2}
+    assert db_session.query(Favorite).count() == 3
+
+
+def test_watchlist_pages_hydrated_cards_newest_first(client, db_session, user_id):
+    movie_ids = make_movies(db_session, 5)
+    db_session.add(Genre(name="Drama"))
+    db_session.commit()
+    db_session.add(MovieGenre(movie_id=movie_ids[0], genre_id=1))
+    for offset, movie_id in enumerate(movie_ids):
+        db_session.add(Favorite(user_id=user_id, movie_id=movie_id, created_at=datetime(2024, 1, 1 + offset)))
+    db_session.commit()
+
+    first = client.get("/watchlist/", params={"limit": 3}, headers=auth(user_id)).json()
+    assert first["has_more"] is True
+    assert [card["movie_id"] for card in first["results"]] == movie_ids[:-4:-1]
+    second = client.get("/watchlist/", params={"limit": 3, "page": 2}, headers=auth(user_id)).json()
+    assert second["has_more"] is False
+    assert [card["movie_id"] for card in second["results"]] == [movie_ids[1], movie_ids[0]]
+    assert second["results"][1]["title"] == "Movie 0"
+    assert second["results"][1]["genres"] == ["Drama"]
+
+
+def test_remove_from_watchlist(client, db_session, user_id):
+    (movie_id,) = make_movies(db_session, 1)
+    client.post("/watchlist/add", json={"movie_id": movie_id}, headers=auth(user_id))
+    assert client.delete(f"/watchlist/{movie_id}", headers=auth(user_id)).json() == {"ok": True}
+    assert client.delete(f"/watchlist/{movie_id}", headers=auth(user_id)).status_code == 404
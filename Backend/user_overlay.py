@@ -0,0 +1,104 @@
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import literal, null, select, union_all
+
+from database import EngineLocal, on_primary
+from models import Favorite, Rating
+
+# Bounds staleness across workers; writes made by this process are applied immediately.
+OVERLAY_TTL_SECONDS = 30.0
+MAX_CACHED_USERS = 5_000
+MAX_IDS_PER_USER = 2_000
+
+
+class _UserOverlay:
+    __slots__ = ("known", "watchlist", "ratings", "expires_at", "generation")
+
+    def __init__(self):
+        self.known: set[int] = set()
+        self.watchlist: set[int] = set()
+        self.ratings: dict[int, float] = {}
+        self.expires_at = time.monotonic() + OVERLAY_TTL_SECONDS
+        # Bumped by ``forget``; rows loaded across a bump may predate the write.
+        self.generation = 0
+
+
+class OverlayCache:
+    """Per-user watchlist membership and own ratings, filled only for movie ids that were asked about."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._users: OrderedDict[int, _UserOverlay] = OrderedDict()
+
+    def _entry(self, user_id: int) -> _UserOverlay:
+        entry = self._users.get(user_id)
+        if entry is None or entry.expires_at < time.monotonic() or len(entry.known) > MAX_IDS_PER_USER:
+            entry = _UserOverlay()
+            self._users[user_id] = entry
+        self._users.move_to_end(user_id)
+        while len(self._users) > MAX_CACHED_USERS:
+            self._users.popitem(last=False)
+        return entry
+
+    def lookup(self, db, user_id: int, movie_ids: list[int]) -> list[dict]:
+        with self._lock:
+            entry = self._entry(user_id)
+            generation = entry.generation
+            answers = {
+                movie_id: (movie_id in entry.watchlist, entry.ratings.get(movie_id))
+                for movie_id in movie_ids
+                if movie_id in entry.known
+            }
+        missing = [movie_id for movie_id in movie_ids if movie_id not in answers]
+        if missing:
+            # The user's own writes are read back from the primary; a replica may not have them yet.
+            rows = on_primary(db, _load_overlay_rows, user_id, missing)
+            watchlist = {movie_id for movie_id, kind, _rating in rows if kind == "watchlist"}
+            ratings = {movie_id: float(rating) for movie_id, kind, rating in rows if kind == "rating"}
+            for movie_id in missing:
+                answers[movie_id] = (movie_id in watchlist, ratings.get(movie_id))
+            with self._lock:
+                # A ``forget`` during the load: serve the rows, but only the next lookup may keep any.
+                if self._users.get(user_id) is entry and entry.generation == generation:
+                    entry.watchlist.update(watchlist)
+                    entry.ratings.update(ratings)
+                    entry.known.update(missing)
+
+        return [
+            {"movie_id": movie_id, "in_watchlist": answers[movie_id][0], "user_rating": answers[movie_id][1]}
+            for movie_id in movie_ids
+        ]
+
+    def forget(self, user_id: int, movie_ids) -> None:
+        """Drop what is known about ``movie_ids`` so the next lookup re-reads just those rows."""
+        with self._lock:
+            entry = self._users.get(user_id)
+            if entry is None:
+                return
+            entry.generation += 1
+            for movie_id in movie_ids:
+                entry.known.discard(movie_id)
+                entry.watchlist.discard(movie_id)
+                entry.ratings.pop(movie_id, None)
+
+
+def _load_overlay_rows(db, user_id: int, movie_ids: list[int]):
+    # Both branches are primary-key range reads on (user_id, movie_id).
+    favorites = select(Favorite.movie_id, literal("watchlist"), null()).where(
+        Favorite.user_id == user_id, Favorite.movie_id.in_(movie_ids)
+    )
+    ratings = select(Rating.movie_id, literal("rating"), Rating.rating).where(
+        Rating.user_id == user_id, Rating.movie_id.in_(movie_ids)
+    )
+    return db.execute(union_all(favorites, ratings)).all()
+
+
+def forget_overlay(db, user_id: int, movie_ids) -> None:
+    cache = overlay_caches.loaded(db)
+    if cache is not None:
+        cache.forget(user_id, movie_ids)
+
+
+overlay_caches = EngineLocal(lambda _db: OverlayCache())
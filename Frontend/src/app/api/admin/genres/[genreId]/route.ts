@@ -1,5 +1,6 @@
 import { NextResponse } from 'next/server';
 import { z } from 'zod';
+import { backendFetch, withPrimaryPin } from '@/lib/backend-proxy';
 
 const GenreSchema = z.object({
   name: z.string().min(1).max(50)
@@ -15,8 +16,7 @@ export async function PUT(req: Request, { params }: { params: { genreId: string
     return NextResponse.json({ error: 'Validation failed', issues: parsed.error.issues }, { status: 400 });
   }
 
-  const backendBase = (process.env.BACKEND_API_URL || 'http://localhost:8000').replace(/\/$/, '');
-  const res = await fetch(`${backendBase}/genres/${params.genreId}`, {
+  const res = await backendFetch(req, `/genres/${params.genreId}`, {
     method: 'PUT',
     headers: {
       'content-type': 'application/json',
@@ -31,15 +31,14 @@ export async function PUT(req: Request, { params }: { params: { genreId: string
     return NextResponse.json({ error }, { status: res.status });
   }
 
-  return NextResponse.json(data, { status: res.status });
+  return withPrimaryPin(res, NextResponse.json(data, { status: res.status }));
 }
 
 export async function DELETE(req: Request, { params }: { params: { genreId: string } }) {
   const authHeader = req.headers.get('authorization');
   if (!authHeader) return NextResponse.json({ error: 'Missing auth token' }, { status: 401 });
 
-  const backendBase = (process.env.BACKEND_API_URL || 'http://localhost:8000').replace(/\/$/, '');
-  const res = await fetch(`${backendBase}/genres/${params.genreId}`, {
+  const res = await backendFetch(req, `/genres/${params.genreId}`, {
     method: 'DELETE',
     headers: { Authorization: authHeader }
   });
@@ -50,5 +49,5 @@ export async function DELETE(req: Request, { params }: { params: { genreId: stri
     return NextResponse.json({ error }, { status: res.status });
   }
 
-  return NextResponse.json(data, { status: res.status });
+  return withPrimaryPin(res, NextResponse.json(data, { status: res.status }));
 }
@@ -1,5 +1,6 @@
 import { NextResponse } from 'next/server';
 import { z } from 'zod';
+import { backendFetch, withPrimaryPin } from '@/lib/backend-proxy';
 
 const GenreSchema = z.object({
   name: z.string().min(1).max(50)
@@ -14,8 +15,7 @@ export async function GET(req: Request) {
   const query = searchParams.get('query');
   if (query) params.set('query', query);
 
-  const backendBase = (process.env.BACKEND_API_URL || 'http://localhost:8000').replace(/\/$/, '');
-  const res = await fetch(`${backendBase}/genres?${params.toString()}`, {
+  const res = await backendFetch(req, `/genres?${params.toString()}`, {
     method: 'GET',
     headers: { Authorization: authHeader }
   });
@@ -39,8 +39,7 @@ export async function POST(req: Request) {
     return NextResponse.json({ error: 'Validation failed', issues: parsed.error.issues }, { status: 400 });
   }
 
-  const backendBase = (process.env.BACKEND_API_URL || 'http://localhost:8000').replace(/\/$/, '');
-  const res = await fetch(`${backendBase}/genres`, {
+  const res = await backendFetch(req, '/genres', {
     method: 'POST',
     headers: {
       'content-type': 'application/json',
@@ -55,5 +54,5 @@ export async function POST(req: Request) {
     return NextResponse.json({ error }, { status: res.status });
   }
 
-  return NextResponse.json(data, { status: res.status });
+  return withPrimaryPin(res, NextResponse.json(data, { status: res.status }));
 }
@@ -1,5 +1,6 @@
 import { NextResponse } from 'next/server';
 import { z } from 'zod';
+import { backendFetch, withPrimaryPin } from '@/lib/backend-proxy';
 
 const HomepageSchema = z.object({
   heroMovieId: z.coerce.number().int().optional().nullable(),
@@ -16,8 +17,7 @@ export async function GET(req: Request) {
   const authHeader = req.headers.get('authorization');
   if (!authHeader) return NextResponse.json({ error: 'Missing auth token' }, { status: 401 });
 
-  const backendBase = (process.env.BACKEND_API_URL || 'http://localhost:8000').replace(/\/$/, '');
-  const res = await fetch(`${backendBase}/homepage`, {
+  const res = await backendFetch(req, '/homepage', {
     method: 'GET',
     headers: { Authorization: authHeader }
   });
@@ -52,8 +52,7 @@ export async function PUT(req: Request) {
     new_arrivals_ids: parsed.data.newArrivalsIds ?? undefined
   };
 
-  const backendBase = (process.env.BACKEND_API_URL || 'http://localhost:8000').replace(/\/$/, '');
-  const res = await fetch(`${backendBase}/homepage`, {
+  const res = await backendFetch(req, '/homepage', {
     method: 'PUT',
     headers: {
       'content-type': 'application/json',
@@ -68,5 +67,5 @@ export async function PUT(req: Request) {
     return NextResponse.json({ error }, { status: res.status });
   }
 
-  return NextResponse.json(data, { status: res.status });
+  return withPrimaryPin(res, NextResponse.json(data, { status: res.status }));
 }
@@ -1,5 +1,6 @@
 import { NextResponse } from 'next/server';
 import { z } from 'zod';
+import { backendFetch, withPrimaryPin } from '@/lib/backend-proxy';
 
 const CastSchema = z.object({
   personId: z.coerce.number().int(),
@@ -16,8 +17,7 @@ export async function GET(req: Request, { params }: { params: { movieId: string
   const authHeader = req.headers.get('authorization');
   if (!authHeader) return NextResponse.json({ error: 'Missing auth token' }, { status: 401 });
 
-  const backendBase = (process.env.BACKEND_API_URL || 'http://localhost:8000').replace(/\/$/, '');
-  const res = await fetch(`${backendBase}/movies/${params.movieId}/cast`, {
+  const res = await backendFetch(req, `/movies/${params.movieId}/cast`, {
     method: 'GET',
     headers: { Authorization: authHeader }
   });
@@ -47,8 +47,7 @@ export async function POST(req: Request, { params }: { params: { movieId: string
     character_name: parsed.data.characterName ?? undefined
   };
 
-  const backendBase = (process.env.BACKEND_API_URL || 'http://localhost:8000').replace(/\/$/, '');
-  const res = await fetch(`${backendBase}/movies/${params.movieId}/cast`, {
+  const res = await backendFetch(req, `/movies/${params.movieId}/cast`, {
     method: 'POST',
     headers: {
       'content-type': 'application/json',
@@ -63,7 +62,7 @@ export async function POST(req: Request, { params }: { params: { movieId: string
     return NextResponse.json({ error }, { status: res.status });
   }
 
-  return NextResponse.json(data, { status: res.status });
+  return withPrimaryPin(res, NextResponse.json(data, { status: res.status }));
 }
 
 export async function DELETE(req: Request, { params }: { params: { movieId: string } }) {
@@ -81,8 +80,7 @@ export async function DELETE(req: Request, { params }: { params: { movieId: stri
     role: parsed.data.role
   };
 
-  const backendBase = (process.env.BACKEND_API_URL || 'http://localhost:8000').replace(/\/$/, '');
-  const res = await fetch(`${backendBase}/movies/${params.movieId}/cast`, {
+  const res = await backendFetch(req, `/movies/${params.movieId}/cast`, {
     method: 'DELETE',
     headers: {
       'content-type': 'application/json',
@@ -97,5 +95,5 @@ export async function DELETE(req: Request, { params }: { params: { movieId: stri
     return NextResponse.json({ error }, { status: res.status });
   }
 
-  return NextResponse.json(data, { status: res.status });
+  return withPrimaryPin(res, NextResponse.json(data, { status: res.status }));
 }
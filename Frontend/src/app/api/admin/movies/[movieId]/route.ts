@@ -1,5 +1,6 @@
 import { NextResponse } from 'next/server';
 import { z } from 'zod';
+import { backendFetch, withPrimaryPin } from '@/lib/backend-proxy';
 
 const MovieUpdateSchema = z.object({
   title: z.string().min(1).max(255).optional().nullable(),
@@ -21,8 +22,7 @@ export async function GET(req: Request, { params }: { params: { movieId: string
   const authHeader = req.headers.get('authorization');
   if (!authHeader) return NextResponse.json({ error: 'Missing auth token' }, { status: 401 });
 
-  const backendBase = (process.env.BACKEND_API_URL || 'http://localhost:8000').replace(/\/$/, '');
-  const detailRes = await fetch(`${backendBase}/movies/${params.movieId}`, {
+  const detailRes = await backendFetch(req, `/movies/${params.movieId}`, {
     method: 'GET',
     headers: { Authorization: authHeader }
   });
@@ -32,7 +32,7 @@ export async function GET(req: Request, { params }: { params: { movieId: string
     return NextResponse.json({ error }, { status: detailRes.status });
   }
 
-  const genresRes = await fetch(`${backendBase}/movies/${params.movieId}/genres`, {
+  const genresRes = await backendFetch(req, `/movies/${params.movieId}/genres`, {
     method: 'GET',
     headers: { Authorization: authHeader }
   });
@@ -77,8 +77,7 @@ export async function PUT(req: Request, { params }: { params: { movieId: string
     genres: parsed.data.genres ?? undefined
   };
 
-  const backendBase = (process.env.BACKEND_API_URL || 'http://localhost:8000').replace(/\/$/, '');
-  const res = await fetch(`${backendBase}/movies/${params.movieId}`, {
+  const res = await backendFetch(req, `/movies/${params.movieId}`, {
     method: 'PUT',
     headers: {
       'content-type': 'application/json',
@@ -93,15 +92,14 @@ export async function PUT(req: Request, { params }: { params: { movieId: string
     return NextResponse.json({ error }, { status: res.status });
   }
 
-  return NextResponse.json(data, { status: res.status });
+  return withPrimaryPin(res, NextResponse.json(data, { status: res.status }));
 }
 
 export async function DELETE(req: Request, { params }: { params: { movieId: string } }) {
   const authHeader = req.headers.get('authorization');
   if (!authHeader) return NextResponse.json({ error: 'Missing auth token' }, { status: 401 });
 
-  const backendBase = (process.env.BACKEND_API_URL || 'http://localhost:8000').replace(/\/$/, '');
-  const res = await fetch(`${backendBase}/movies/${params.movieId}`, {
+  const res = await backendFetch(req, `/movies/${params.movieId}`, {
     method: 'DELETE',
     headers: {
       Authorization: authHeader
@@ -114,5 +112,5 @@ export async function DELETE(req: Request, { params }: { params: { movieId: stri
     return NextResponse.json({ error }, { status: res.status });
   }
 
-  return NextResponse.json(data, { status: res.status });
+  return withPrimaryPin(res, NextResponse.json(data, { status: res.status }));
 }
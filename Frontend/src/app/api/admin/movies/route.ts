@@ -1,6 +1,7 @@
 import { NextResponse } from 'next/server';
 import { z } from 'zod';
 import { rateLimit } from '@/lib/rate-limit';
+import { backendFetch, withPrimaryPin } from '@/lib/backend-proxy';
 
 const MovieSchema = z.object({
   title: z.string().min(1).max(255),
@@ -31,8 +32,7 @@ export async function GET(req: Request) {
   if (page) params.set('page', page);
   if (limit) params.set('limit', limit);
 
-  const backendBase = (process.env.BACKEND_API_URL || 'http://localhost:8000').replace(/\/$/, '');
-  const res = await fetch(`${backendBase}/movies?${params.toString()}`, {
+  const res = await backendFetch(req, `/movies?${params.toString()}`, {
     method: 'GET',
     headers: {
       Authorization: authHeader
@@ -78,8 +78,7 @@ export async function POST(req: Request) {
     genres: parsed.data.genres || undefined
   };
 
-  const backendBase = (process.env.BACKEND_API_URL || 'http://localhost:8000').replace(/\/$/, '');
-  const res = await fetch(`${backendBase}/movies`, {
+  const res = await backendFetch(req, '/movies', {
     method: 'POST',
     headers: {
       'content-type': 'application/json',
@@ -94,5 +93,5 @@ export async function POST(req: Request) {
     return NextResponse.json({ error }, { status: res.status });
   }
 
-  return NextResponse.json(data, { status: res.status });
+  return withPrimaryPin(res, NextResponse.json(data, { status: res.status }));
 }
@@ -1,5 +1,6 @@
 import { NextResponse } from 'next/server';
 import { z } from 'zod';
+import { backendFetch, withPrimaryPin } from '@/lib/backend-proxy';
 
 const PersonSchema = z.object({
   fullName: z.string().min(1).max(100).optional().nullable(),
@@ -25,8 +26,7 @@ export async function PUT(req: Request, { params }: { params: { personId: string
     bio: parsed.data.bio ?? undefined
   };
 
-  const backendBase = (process.env.BACKEND_API_URL || 'http://localhost:8000').replace(/\/$/, '');
-  const res = await fetch(`${backendBase}/people/${params.personId}`, {
+  const res = await backendFetch(req, `/people/${params.personId}`, {
     method: 'PUT',
     headers: {
       'content-type': 'application/json',
@@ -41,15 +41,14 @@ export async function PUT(req: Request, { params }: { params: { personId: string
     return NextResponse.json({ error }, { status: res.status });
   }
 
-  return NextResponse.json(data, { status: res.status });
+  return withPrimaryPin(res, NextResponse.json(data, { status: res.status }));
 }
 
 export async function DELETE(req: Request, { params }: { params: { personId: string } }) {
   const authHeader = req.headers.get('authorization');
   if (!authHeader) return NextResponse.json({ error: 'Missing auth token' }, { status: 401 });
 
-  const backendBase = (process.env.BACKEND_API_URL || 'http://localhost:8000').replace(/\/$/, '');
-  const res = await fetch(`${backendBase}/people/${params.personId}`, {
+  const res = await backendFetch(req, `/people/${params.personId}`, {
     method: 'DELETE',
     headers: { Authorization: authHeader }
   });
@@ -60,5 +59,5 @@ export async function DELETE(req: Request, { params }: { params: { personId: str
     return NextResponse.json({ error }, { status: res.status });
   }
 
-  return NextResponse.json(data, { status: res.status });
+  return withPrimaryPin(res, NextResponse.json(data, { status: res.status }));
 }
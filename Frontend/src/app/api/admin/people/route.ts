@@ -1,5 +1,6 @@
 import { NextResponse } from 'next/server';
 import { z } from 'zod';
+import { backendFetch, withPrimaryPin } from '@/lib/backend-proxy';
 
 const PersonSchema = z.object({
   fullName: z.string().min(1).max(100),
@@ -17,8 +18,7 @@ export async function GET(req: Request) {
   const query = searchParams.get('query');
   if (query) params.set('query', query);
 
-  const backendBase = (process.env.BACKEND_API_URL || 'http://localhost:8000').replace(/\/$/, '');
-  const res = await fetch(`${backendBase}/people?${params.toString()}`, {
+  const res = await backendFetch(req, `/people?${params.toString()}`, {
     method: 'GET',
     headers: { Authorization: authHeader }
   });
@@ -49,8 +49,7 @@ export async function POST(req: Request) {
     bio: parsed.data.bio || undefined
   };
 
-  const backendBase = (process.env.BACKEND_API_URL || 'http://localhost:8000').replace(/\/$/, '');
-  const res = await fetch(`${backendBase}/people`, {
+  const res = await backendFetch(req, '/people', {
     method: 'POST',
     headers: {
       'content-type': 'application/json',
@@ -65,5 +64,5 @@ export async function POST(req: Request) {
     return NextResponse.json({ error }, { status: res.status });
   }
 
-  return NextResponse.json(data, { status: res.status });
+  return withPrimaryPin(res, NextResponse.json(data, { status: res.status }));
 }
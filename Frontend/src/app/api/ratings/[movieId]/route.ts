@@ -1,5 +1,6 @@
 import { NextResponse } from 'next/server';
 import { rateLimit } from '@/lib/rate-limit';
+import { backendFetch } from '@/lib/backend-proxy';
 
 export async function GET(req: Request, { params }: { params: { movieId: string } }) {
   const ip = req.headers.get('x-forwarded-for')?.split(',')[0]?.trim() || 'anon';
@@ -14,8 +15,7 @@ export async function GET(req: Request, { params }: { params: { movieId: string
     return NextResponse.json({ error: 'Invalid movie id' }, { status: 400 });
   }
 
-  const backendBase = (process.env.BACKEND_API_URL || 'http://localhost:8000').replace(/\/$/, '');
-  const res = await fetch(`${backendBase}/ratings/${movieId}`, {
+  const res = await backendFetch(req, `/ratings/${movieId}`, {
     method: 'GET',
     headers: { Authorization: authHeader }
   });
@@ -1,6 +1,7 @@
 import { NextResponse } from 'next/server';
 import { z } from 'zod';
 import { rateLimit } from '@/lib/rate-limit';
+import { backendFetch, withPrimaryPin } from '@/lib/backend-proxy';
 
 const RatingSchema = z.object({
   movieId: z.coerce.number().int(),
@@ -26,8 +27,7 @@ export async function POST(req: Request) {
     rating: parsed.data.rating
   };
 
-  const backendBase = (process.env.BACKEND_API_URL || 'http://localhost:8000').replace(/\/$/, '');
-  const res = await fetch(`${backendBase}/ratings/`, {
+  const res = await backendFetch(req, '/ratings/', {
     method: 'POST',
     headers: {
       'content-type': 'application/json',
@@ -49,10 +49,11 @@ export async function POST(req: Request) {
     return NextResponse.json({ error }, { status: res.status });
   }
 
-  return NextResponse.json({
+  const response = NextResponse.json({
     movieId: data.movie_id ?? parsed.data.movieId,
     average: data.average ?? 0,
     count: data.count ?? 0,
     userRating: data.user_rating ?? null
   });
+  return withPrimaryPin(res, response);
 }
@@ -1,5 +1,6 @@
 import { NextResponse } from 'next/server';
 import { rateLimit } from '@/lib/rate-limit';
+import { backendFetch } from '@/lib/backend-proxy';
 
 type BackendSearchResult = {
   movie_id: number;
@@ -35,9 +36,8 @@ export async function GET(req: Request) {
   const page = Math.max(1, parseNumber(searchParams.get('page'), 1));
   const limit = Math.min(50, Math.max(1, parseNumber(searchParams.get('limit'), 8)));
 
-  const backendBase = (process.env.BACKEND_API_URL || 'http://localhost:8000').replace(/\/$/, '');
   const params = new URLSearchParams({ query: q, page: String(page), limit: String(limit) });
-  const res = await fetch(`${backendBase}/movies/search?${params.toString()}`);
+  const res = await backendFetch(req, `/movies/search?${params.toString()}`);
   const data = (await res.json().catch(() => null)) as BackendSearchResponse | null;
 
   if (!res.ok) {
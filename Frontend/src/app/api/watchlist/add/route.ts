@@ -1,6 +1,7 @@
 import { NextResponse } from 'next/server';
 import { z } from 'zod';
 import { rateLimit } from '@/lib/rate-limit';
+import { backendFetch, withPrimaryPin } from '@/lib/backend-proxy';
 
 const AddSchema = z.object({
   movieId: z.coerce.number().int(),
@@ -26,8 +27,7 @@ export async function POST(req: Request) {
     movie_title: parsed.data.movieTitle
   };
 
-  const backendBase = (process.env.BACKEND_API_URL || 'http://localhost:8000').replace(/\/$/, '');
-  const res = await fetch(`${backendBase}/watchlist/add`, {
+  const res = await backendFetch(req, '/watchlist/add', {
     method: 'POST',
     headers: {
       'content-type': 'application/json',
@@ -37,5 +37,5 @@ export async function POST(req: Request) {
   });
 
   const data = await res.json().catch(() => ({}));
-  return NextResponse.json(data, { status: res.status });
+  return withPrimaryPin(res, NextResponse.json(data, { status: res.status }));
 }
@@ -1,10 +1,19 @@
 import { NextResponse } from 'next/server';
 import { rateLimit } from '@/lib/rate-limit';
-import { prisma } from '@/lib/prisma';
+import { backendFetch } from '@/lib/backend-proxy';
 
-type FavoriteRow = {
+type WatchlistCard = {
   movie_id: number;
-  created_at?: string;
+  title: string;
+  year: number | null;
+  poster_url: string | null;
+  added_at?: string;
+};
+
+type WatchlistPage = {
+  page: number;
+  has_more: boolean;
+  results: WatchlistCard[];
 };
 
 type WatchlistItem = {
@@ -23,39 +32,29 @@ export async function GET(req: Request) {
   const authHeader = req.headers.get('authorization');
   if (!authHeader) return NextResponse.json({ error: 'Missing auth token' }, { status: 401 });
 
-  const backendBase = (process.env.BACKEND_API_URL || 'http://localhost:8000').replace(/\/$/, '');
-  const res = await fetch(`${backendBase}/watchlist/`, {
+  const incoming = new URL(req.url);
+  const params = new URLSearchParams({
+    page: incoming.searchParams.get('page') || '1',
+    limit: incoming.searchParams.get('limit') || '100'
+  });
+  const res = await backendFetch(req, `/watchlist/?${params}`, {
     method: 'GET',
     headers: { Authorization: authHeader }
   });
 
-  const data = (await res.json().catch(() => [])) as FavoriteRow[] | { error?: string };
+  const data = (await res.json().catch(() => ({}))) as Partial<WatchlistPage> & { error?: string };
   if (!res.ok) {
-    const error = (data as { error?: string })?.error || 'Failed to load watchlist';
+    const error = data?.error || 'Failed to load watchlist';
     return NextResponse.json({ error }, { status: res.status });
   }
 
-  const favorites = Array.isArray(data) ? data : [];
-  const movieIds = favorites.map((fav) => fav.movie_id).filter((id) => typeof id === 'number');
-
-  const movies = movieIds.length
-    ? await prisma.movie.findMany({
-        where: { movieId: { in: movieIds } },
-        select: { movieId: true, title: true, releaseDate: true, posterUrl: true }
-      })
-    : [];
-
-  const movieMap = new Map(movies.map((movie) => [movie.movieId, movie]));
-  const items: WatchlistItem[] = favorites.map((fav) => {
-    const movie = movieMap.get(fav.movie_id);
-    return {
-      movieId: fav.movie_id,
-      title: movie?.title ?? `Movie ${fav.movie_id}`,
-      year: movie?.releaseDate ? String(movie.releaseDate.getUTCFullYear()) : null,
-      posterUrl: movie?.posterUrl ?? null,
-      createdAt: fav.created_at
-    };
-  });
+  const items: WatchlistItem[] = (data.results ?? []).map((card) => ({
+    movieId: card.movie_id,
+    title: card.title,
+    year: card.year != null ? String(card.year) : null,
+    posterUrl: card.poster_url ?? null,
+    createdAt: card.added_at
+  }));
 
-  return NextResponse.json({ items });
+  return NextResponse.json({ items, page: data.page ?? 1, hasMore: Boolean(data.has_more) });
 }
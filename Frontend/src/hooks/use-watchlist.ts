@@ -11,6 +11,12 @@ type WatchlistItem = {
   createdAt?: string;
 };
 
+type WatchlistPage = {
+  items?: WatchlistItem[];
+  page?: number;
+  hasMore?: boolean;
+};
+
 type WatchlistState = {
   items: WatchlistItem[];
   status: 'idle' | 'loading' | 'ready' | 'error';
@@ -43,22 +49,29 @@ export function useWatchlist(options: Options = {}) {
     }
 
     setState((prev) => ({ ...prev, status: 'loading', error: null }));
-    const res = await fetch('/api/watchlist', {
-      headers: { Authorization: `Bearer ${token}` }
-    });
-
-    const data = (await res.json().catch(() => ({}))) as { items?: WatchlistItem[]; error?: string };
-    if (!res.ok) {
-      setState((prev) => ({
-        ...prev,
-        status: 'error',
-        error: data?.error || 'Failed to load watchlist',
-        loaded: true
-      }));
-      return;
+    // The backend pages the list (at most 100 per page); follow hasMore until it is complete.
+    const items: WatchlistItem[] = [];
+    for (let page = 1; ; page += 1) {
+      const res = await fetch(`/api/watchlist?page=${page}`, {
+        headers: { Authorization: `Bearer ${token}` }
+      });
+
+      const data = (await res.json().catch(() => ({}))) as WatchlistPage & { error?: string };
+      if (!res.ok) {
+        setState((prev) => ({
+          ...prev,
+          status: 'error',
+          error: data?.error || 'Failed to load watchlist',
+          loaded: true
+        }));
+        return;
+      }
+
+      items.push(...(data.items ?? []));
+      if (!data.hasMore) break;
     }
 
-    setState({ items: data.items ?? [], status: 'ready', error: null, loaded: true });
+    setState({ items, status: 'ready', error: null, loaded: true });
   }, [token]);
 
   const add = useCallback(
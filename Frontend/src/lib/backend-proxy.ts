@@ -0,0 +1,32 @@
+// Route handlers call the backend directly, so they carry its read-your-writes pin by hand:
+// after a write the backend answers with a `read_primary_until` cookie (and header), and while
+// the client sends it back its reads go to the primary instead of a lagging replica.
+const PRIMARY_PIN_COOKIE = 'read_primary_until';
+const PRIMARY_PIN_HEADER = 'x-read-primary-until';
+
+export function backendBase() {
+  return (process.env.BACKEND_API_URL || 'http://localhost:8000').replace(/\/$/, '');
+}
+
+export function backendFetch(req: Request, path: string, init: RequestInit = {}) {
+  const headers = new Headers(init.headers);
+  const pin = req.headers.get(PRIMARY_PIN_HEADER);
+  if (pin) headers.set(PRIMARY_PIN_HEADER, pin);
+  const cookie = req.headers
+    .get('cookie')
+    ?.split(';')
+    .map((part) => part.trim())
+    .find((part) => part.startsWith(`${PRIMARY_PIN_COOKIE}=`));
+  if (cookie) headers.set('cookie', cookie);
+  return fetch(`${backendBase()}${path}`, { ...init, headers });
+}
+
+export function withPrimaryPin<T extends Response>(backendRes: Response, response: T): T {
+  const pin = backendRes.headers.get(PRIMARY_PIN_HEADER);
+  if (!pin) return response;
+  response.headers.set(PRIMARY_PIN_HEADER, pin);
+  for (const cookie of backendRes.headers.getSetCookie()) {
+    if (cookie.startsWith(`${PRIMARY_PIN_COOKIE}=`)) response.headers.append('set-cookie', cookie);
+  }
+  return response;
+}